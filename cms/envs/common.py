@@ -327,6 +327,13 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Local disk cache for static content too large to cache in memcached. DIRECTORY (None to
+# disable the disk cache) should be on local disk, and MAX_SIZE is its size bound in bytes.
+STATIC_CONTENT_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -0,0 +1,197 @@
+"""
+A local disk tier for the static content cache.
+
+Memcached only holds assets smaller than 1MB, so larger assets (lecture PDFs, videos) used to be
+streamed out of GridFS on every request. Those assets are instead written once to a local
+directory, and served from a read-only memory map of the file: the kernel's page cache holds the
+data (shared by all of the server processes), and Range requests only touch the pages they need.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContent
+
+log = logging.getLogger(__name__)
+
+# Size of the chunks in which memory mapped content is streamed to the client.
+MMAP_CHUNK_SIZE = 64 * 1024
+
+# Once the cache exceeds its size bound, evict files until it is this fraction of the bound,
+# so that files aren't evicted on every write.
+EVICTION_TARGET = 0.9
+
+_DISK_CACHE = {}
+_DISK_CACHE_LOCK = threading.Lock()
+
+
+def get_asset_disk_cache():
+    """
+    Return the AssetDiskCache configured by settings.STATIC_CONTENT_DISK_CACHE, or None if it
+    isn't configured.
+    """
+    config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None) or {}
+    directory = config.get('DIRECTORY')
+    if not directory:
+        return None
+    with _DISK_CACHE_LOCK:
+        if directory not in _DISK_CACHE:
+            _DISK_CACHE[directory] = AssetDiskCache(directory, config.get('MAX_SIZE', 0))
+        return _DISK_CACHE[directory]
+
+
+def metadata_only(content):
+    """
+    Return a copy of ``content`` without its data, to cache the metadata of an asset whose data is
+    in the disk cache.
+    """
+    return StaticContent(
+        content.location, content.name, content.content_type, None,
+        last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+        import_path=content.import_path, length=content.length, locked=content.locked
+    )
+
+
+class MemoryMappedContent(StaticContent):
+    """
+    StaticContent whose data is a read-only memory map of a file in the disk cache.
+    """
+    def __init__(self, content, data_map):
+        super(MemoryMappedContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+        self._map = data_map
+
+    @property
+    def data(self):
+        return self._map[:]
+
+    def stream_data(self):
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        for position in xrange(first_byte, last_byte + 1, MMAP_CHUNK_SIZE):
+            yield self._map[position:min(position + MMAP_CHUNK_SIZE, last_byte + 1)]
+
+    def close(self):
+        self._map.close()
+
+
+class AssetDiskCache(object):
+    """
+    A directory of asset files, bounded to ``max_size`` bytes (0 for unbounded) by evicting the
+    least recently used files.
+
+    Files are named after the asset's location and last modified time, so a re-uploaded asset is
+    never served stale (its old file just ages out of the cache). Files are written to a temporary
+    file and renamed into place, and recency is tracked by file modification times, so the
+    directory can be shared by all of the processes of a server. For the same reason, the size of
+    the cache is taken from the directory (not counted by each process) whenever a file is added.
+    """
+    def __init__(self, directory, max_size=0):
+        self.directory = directory
+        self.max_size = max_size
+        self._evict_lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @property
+    def size(self):
+        """
+        The total size in bytes of the files in the cache.
+        """
+        return sum(size for __, __, size in self._files())
+
+    def path(self, content):
+        """
+        Return the path of the file which caches the data of ``content``.
+        """
+        key = u'{}:{}'.format(content.location, content.last_modified_at.isoformat())
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, content):
+        """
+        Return a MemoryMappedContent of the data cached for ``content`` (which needs only its
+        metadata), or None if its data isn't cached.
+        """
+        path = self.path(content)
+        try:
+            with open(path, 'rb') as data_file:
+                data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        if len(data_map) != content.length:
+            data_map.close()
+            return None
+        return MemoryMappedContent(content, data_map)
+
+    def add(self, content):
+        """
+        Write the data streamed from ``content`` to the cache, and return a MemoryMappedContent of
+        it (or None if it couldn't be cached).
+        """
+        path = self.path(content)
+        temp_path = None
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            log.exception(u"Unable to write %s to the static content disk cache", unicode(content.location))
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        if self.max_size:
+            self.evict(self.max_size, int(self.max_size * EVICTION_TARGET))
+        return self.get(content)
+
+    def evict(self, max_size, target_size):
+        """
+        If the cache holds more than ``max_size`` bytes, delete the least recently used files until
+        it holds at most ``target_size`` bytes.
+        """
+        with self._evict_lock:
+            files = sorted(self._files())
+            size = sum(file_size for __, __, file_size in files)
+            if size <= max_size:
+                return
+            for __, path, file_size in files:
+                if size <= target_size:
+                    break
+                try:
+                    # processes which have the file mapped keep their mapping
+                    os.remove(path)
+                except OSError:
+                    pass
+                size -= file_size
+
+    def _files(self):
+        """
+        Return a list of (mtime, path, size) of the files in the cache.
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp'):
+                # being written
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        return files
@@ -3,6 +3,7 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
@@ -15,6 +16,7 @@ from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.disk_cache import get_asset_disk_cache, metadata_only
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -23,6 +25,12 @@ from xmodule.exceptions import NotFoundError
 
 log = logging.getLogger(__name__)
 
+# Assets smaller than this are cached in memcached, larger ones in the disk cache.
+MAX_MEMCACHED_CONTENT_SIZE = 1048576
+
+# Range headers with more ranges than this are ignored.
+MAX_RANGES = 64
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -42,39 +50,28 @@ class StaticContentServer(object):
                 return response
 
             # first look in our cache so we don't have to round-trip to the DB
-            content = get_cached_content(loc)
-            if content is None:
-                # nope, not in cache, let's fetch from DB
-                try:
-                    content = AssetManager.find(loc, as_stream=True)
-                except (ItemNotFoundError, NotFoundError):
-                    response = HttpResponse()
-                    response.status_code = 404
-                    return response
-
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
-                if content.length is not None:
-                    if content.length < 1048576:
-                        # since we've queried as a stream, let's read in the stream into memory to set in cache
-                        content = content.copy_to_in_mem()
-                        set_cached_content(content)
-            else:
-                # NOP here, but we may wish to add a "cache-hit" counter in the future
-                pass
+            try:
+                content = get_content(loc)
+            except (ItemNotFoundError, NotFoundError):
+                response = HttpResponse()
+                response.status_code = 404
+                return response
 
             # Check that user has access to content
             if getattr(content, "locked", False):
                 if not hasattr(request, "user") or not request.user.is_authenticated():
+                    close_content(content)
                     return HttpResponseForbidden('Unauthorized')
                 if not request.user.is_staff:
                     if getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled_by_partial(
                         request.user, loc.course_key
                     ):
+                        close_content(content)
                         return HttpResponseForbidden('Unauthorized')
                     if not getattr(loc, 'deprecated', False) and not CourseEnrollment.is_enrolled(
                         request.user, loc.course_key
                     ):
+                        close_content(content)
                         return HttpResponseForbidden('Unauthorized')
 
             # convert over the DB persistent last modified timestamp to a HTTP compatible
@@ -86,6 +83,7 @@ class StaticContentServer(object):
             if 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
+                    close_content(content)
                     return HttpResponseNotModified()
 
             # *** File streaming within a byte range ***
@@ -96,10 +94,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,43 +106,149 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_RANGES:
+                        # Don't let a client make us stream (overlapping) parts of the content many times over.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        # Unsatisfiable ranges are ignored, unless none of the ranges are satisfiable.
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            close_content(content)
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = HttpResponse(ContentStream(content, content.stream_data_in_range(first, last)))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
+                            response['Content-Type'] = content.content_type
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a multipart
+                            # message. http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_range_response(content, ranges)
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = HttpResponse(ContentStream(content, content.stream_data()))
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
 
             return response
 
 
+def get_content(loc):
+    """
+    Return the StaticContent for ``loc`` from the cache, or from the contentstore (caching it).
+
+    Assets smaller than 1MB are cached in memcached. We haven't found a means to stream data out of
+    memcached, so larger assets are cached in the local disk cache (when it's configured), and
+    only their metadata in memcached.
+
+    Raises NotFoundError or ItemNotFoundError if there is no such asset.
+    """
+    disk_cache = get_asset_disk_cache()
+    content = get_cached_content(loc)
+    if content is not None:
+        if content.data is not None:
+            return content
+        # only the metadata is cached, look for the data in the disk cache
+        cached_content = disk_cache.get(content) if disk_cache is not None else None
+        if cached_content is not None:
+            return cached_content
+
+    # nope, not in cache, let's fetch from DB
+    content = AssetManager.find(loc, as_stream=True)
+
+    # since we fetched it from DB, let's cache it going forward
+    if content.length is not None:
+        if content.length < MAX_MEMCACHED_CONTENT_SIZE:
+            # since we've queried as a stream, let's read in the stream into memory to set in cache
+            content = content.copy_to_in_mem()
+            set_cached_content(content)
+        elif disk_cache is not None:
+            cached_content = disk_cache.add(content)
+            if cached_content is None:
+                # the stream was (partly) read while trying to cache it
+                return AssetManager.find(loc, as_stream=True)
+            content = cached_content
+            set_cached_content(metadata_only(content))
+    return content
+
+
+class ContentStream(object):
+    """
+    An iterable of the ``chunks`` of a response's body, streamed from ``content``.
+
+    The response closes it once it has been sent, which closes ``content`` (releasing its memory
+    map or GridFS stream).
+    """
+    def __init__(self, content, chunks):
+        self.content = content
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        close_content(self.content)
+
+
+def close_content(content):
+    """
+    Close ``content``, if it holds a memory map or a stream.
+    """
+    close = getattr(content, 'close', None)
+    if close is not None:
+        close()
+
+
+def multipart_range_response(content, ranges):
+    """
+    Return a multipart/byteranges response with the parts of ``content`` in the (satisfiable) byte
+    ``ranges``.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    boundary = uuid4().hex
+    part_headers = [
+        '--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {first}-{last}/{length}\r\n\r\n'.format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def stream_parts():
+        """
+        Stream the parts of the response.
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    response = HttpResponse(ContentStream(content, stream_parts()))
+    response['Content-Length'] = str(
+        sum(len(part_header) + (last - first + 1) + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+        len(closing)
+    )
+    response['Content-Type'] = 'multipart/byteranges; boundary={}'.format(boundary)
+    return response
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -3,20 +3,29 @@ Tests for StaticContentServer
 """
 import copy
 import ddt
+from datetime import datetime
 import logging
+import os
+import shutil
 import unittest
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
+from mock import patch
 
+from xmodule.contentstore.content import StaticContent
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
+from opaque_keys.edx.locator import CourseLocator
 
+from cache_toolbox.core import del_cached_content
+from contentserver.disk_cache import AssetDiskCache
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -146,7 +155,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with each of the ranges.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +163,40 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+        for first, last in [(first_byte, last_byte), (max(0, self.length_unlocked - 100), self.length_unlocked - 1)]:
+            self.assertIn(
+                'Content-Range: bytes {first}-{last}/{length}'.format(
+                    first=first, last=last, length=self.length_unlocked
+                ),
+                resp.content
+            )
+
+    def test_range_request_disk_cache(self):
+        """
+        Test that assets too large for memcached are served (and range requested) from the disk cache.
+        """
+        disk_cache = {'DIRECTORY': mkdtemp(), 'MAX_SIZE': 0}
+        self.addCleanup(shutil.rmtree, disk_cache['DIRECTORY'])
+        del_cached_content(self.unlocked_asset)
+        with override_settings(STATIC_CONTENT_DISK_CACHE=disk_cache):
+            with patch('contentserver.middleware.MAX_MEMCACHED_CONTENT_SIZE', 0):
+                full = self.client.get(self.url_unlocked)
+                self.assertEqual(len(os.listdir(disk_cache['DIRECTORY'])), 1)
+                with patch('contentserver.middleware.AssetManager.find') as mock_find:
+                    with patch('contentserver.disk_cache.MemoryMappedContent.close') as mock_close:
+                        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-2')
+                        self.assertEqual(resp.content, full.content[1:3])
+                        # the memory map is closed once the response has been sent
+                        self.assertFalse(mock_close.called)
+                        resp.close()
+                        self.assertTrue(mock_close.called)
+                    self.assertFalse(mock_find.called)
+
+        self.assertEqual(resp.status_code, 206)
 
     @ddt.data(
         'bytes 0-',
@@ -236,3 +276,54 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache.
+    """
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.disk_cache = AssetDiskCache(self.directory, max_size=25)
+
+    def _content(self, name, data):
+        """
+        Return StaticContent for an asset with ``data``.
+        """
+        location = CourseLocator('edX', 'toy', '2012_Fall').make_asset_key('asset', name)
+        return StaticContent(location, name, 'text/plain', data, last_modified_at=datetime(2015, 1, 1), length=len(data))
+
+    def test_add_and_get(self):
+        content = self._content('a.txt', '0123456789')
+        self.assertIsNone(self.disk_cache.get(content))
+
+        cached = self.disk_cache.add(content)
+        self.assertEqual(''.join(cached.stream_data()), '0123456789')
+        self.assertEqual(''.join(self.disk_cache.get(content).stream_data_in_range(2, 4)), '234')
+
+        # a re-uploaded asset isn't served from the old file
+        content.last_modified_at = datetime(2015, 1, 2)
+        self.assertIsNone(self.disk_cache.get(content))
+
+    def test_lru_eviction(self):
+        first, second, third = [self._content(name, '0123456789') for name in ('a.txt', 'b.txt', 'c.txt')]
+        self.disk_cache.add(first)
+        self.disk_cache.add(second)
+        # make 'first' the most recently used
+        os.utime(self.disk_cache.path(second), (0, 0))
+
+        self.disk_cache.add(third)
+        self.assertIsNotNone(self.disk_cache.get(first))
+        self.assertIsNone(self.disk_cache.get(second))
+        self.assertIsNotNone(self.disk_cache.get(third))
+        self.assertEqual(self.disk_cache.size, 20)
+
+    def test_shared_directory(self):
+        # another process adding files to the directory counts towards the size bound
+        other_disk_cache = AssetDiskCache(self.directory, max_size=25)
+        for disk_cache, name in [(self.disk_cache, 'a.txt'), (other_disk_cache, 'b.txt'), (self.disk_cache, 'c.txt')]:
+            disk_cache.add(self._content(name, '0123456789'))
+            self.assertLessEqual(self.disk_cache.size, 25)
+        self.assertEqual(other_disk_cache.size, 20)
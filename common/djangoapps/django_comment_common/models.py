@@ -1,11 +1,14 @@
 import logging
+from uuid import uuid4
 
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User
 
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.utils.translation import ugettext_noop
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment
 
 from xmodule.modulestore.django import modulestore
@@ -17,6 +20,16 @@ FORUM_ROLE_MODERATOR = ugettext_noop('Moderator')
 FORUM_ROLE_COMMUNITY_TA = ugettext_noop('Community TA')
 FORUM_ROLE_STUDENT = ugettext_noop('Student')
 
+# Permissions which students don't have in courses which don't allow forum posts
+STUDENT_POSTING_PERMISSION_PREFIXES = ('edit', 'update', 'create')
+
+# How long the permissions of a user in a course are cached for. Changes to users' roles, and to
+# the roles' permissions, invalidate them; changes to the course's forum_posts_allowed only become
+# effective after this many seconds.
+PERMISSIONS_CACHE_LIFESPAN = 60
+
+PERMISSIONS_REQUEST_CACHE_KEY = 'django_comment_common.permissions'
+
 
 @receiver(post_save, sender=CourseEnrollment)
 def assign_default_role_on_enrollment(sender, instance, **kwargs):
@@ -88,7 +101,7 @@ class Role(models.Model):
         if course is None:
             raise ItemNotFoundError(self.course_id)
         if self.name == FORUM_ROLE_STUDENT and \
-           (permission.startswith('edit') or permission.startswith('update') or permission.startswith('create')) and \
+           permission.startswith(STUDENT_POSTING_PERMISSION_PREFIXES) and \
            (not course.forum_posts_allowed):
             return False
 
@@ -105,3 +118,120 @@ class Permission(models.Model):
 
     def __unicode__(self):
         return self.name
+
+
+def get_user_permissions(user, course_id):
+    """
+    Returns the names of all of the permissions `user` has in the course, from all of their roles
+    in it, as a frozenset.
+
+    The permissions are resolved once per request (in the request cache), and cached across
+    requests until the user's roles, or their permissions, change.
+    """
+    request_cache = RequestCache.get_request_cache().data.setdefault(PERMISSIONS_REQUEST_CACHE_KEY, {})
+    if (user.id, course_id) in request_cache:
+        return request_cache[(user.id, course_id)]
+
+    cache_key = _user_permissions_cache_key(user.id, course_id)
+    permissions = cache.get(cache_key)
+    if permissions is None:
+        permissions = set()
+        course = None
+        for role in user.roles.filter(course_id=course_id).prefetch_related('permissions'):
+            if course is None:
+                course = modulestore().get_course(course_id)
+                if course is None:
+                    raise ItemNotFoundError(course_id)
+            role_permissions = set(permission.name for permission in role.permissions.all())
+            if role.name == FORUM_ROLE_STUDENT and not course.forum_posts_allowed:
+                role_permissions = set(
+                    name for name in role_permissions if not name.startswith(STUDENT_POSTING_PERMISSION_PREFIXES)
+                )
+            permissions |= role_permissions
+        permissions = frozenset(permissions)
+        cache.set(cache_key, permissions, PERMISSIONS_CACHE_LIFESPAN)
+
+    request_cache[(user.id, course_id)] = permissions
+    return permissions
+
+
+def _permissions_version(course_id):
+    """
+    Returns the version of the roles (and their permissions) of the course, which changes
+    whenever any of its roles' permissions change.
+    """
+    version_key = u'django_comment_common.permissions_version.{}'.format(course_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid4().hex
+        cache.set(version_key, version)
+    return version
+
+
+def _user_permissions_cache_key(user_id, course_id):
+    """
+    Returns the cache key of the permissions of the user in the course.
+    """
+    return u'django_comment_common.permissions.{}.{}.{}'.format(user_id, course_id, _permissions_version(course_id))
+
+
+def _invalidate_user_permissions(user_id, course_id):
+    """
+    Invalidates the cached permissions of the user in the course.
+    """
+    cache.delete(_user_permissions_cache_key(user_id, course_id))
+    RequestCache.get_request_cache().data.pop(PERMISSIONS_REQUEST_CACHE_KEY, None)
+
+
+def _invalidate_course_permissions(course_id):
+    """
+    Invalidates the cached permissions of all of the users in the course.
+    """
+    cache.delete(u'django_comment_common.permissions_version.{}'.format(course_id))
+    RequestCache.get_request_cache().data.pop(PERMISSIONS_REQUEST_CACHE_KEY, None)
+
+
+@receiver(m2m_changed, sender=Role.users.through)
+def invalidate_permissions_on_role_users_change(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached permissions of users who are added to, or removed from, roles.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # user.roles was changed
+        roles = Role.objects.filter(pk__in=pk_set) if action != 'pre_clear' else instance.roles.all()
+        for course_id in set(role.course_id for role in roles):
+            _invalidate_user_permissions(instance.id, course_id)
+    else:
+        # role.users was changed
+        user_ids = pk_set if action != 'pre_clear' else instance.users.values_list('id', flat=True)
+        for user_id in user_ids:
+            _invalidate_user_permissions(user_id, instance.course_id)
+
+
+@receiver(m2m_changed, sender=Permission.roles.through)
+def invalidate_permissions_on_role_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached permissions of the courses whose roles' permissions change.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # role.permissions was changed
+        course_ids = [instance.course_id]
+    else:
+        # permission.roles was changed
+        roles = Role.objects.filter(pk__in=pk_set) if action != 'pre_clear' else instance.roles.all()
+        course_ids = set(role.course_id for role in roles)
+    for course_id in course_ids:
+        _invalidate_course_permissions(course_id)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_permissions_on_role_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached permissions of the course of roles which are changed or deleted.
+    """
+    _invalidate_course_permissions(instance.course_id)
@@ -1,8 +1,13 @@
 from django.test import TestCase
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
-from django_comment_common.models import Role
+from django_comment_common.models import Role, FORUM_ROLE_MODERATOR, FORUM_ROLE_STUDENT, get_user_permissions
+from django_comment_common.utils import seed_permissions_roles
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment, User
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
 
 
 class RoleAssignmentTest(TestCase):
@@ -54,3 +59,50 @@ class RoleAssignmentTest(TestCase):
     #     )
     #     self.assertNotIn(student_role, self.student_user.roles.all())
     #     self.assertIn(student_role, another_student.roles.all())
+
+
+class UserPermissionsTest(ModuleStoreTestCase):
+    """
+    Tests of resolving, and caching, users' forum permissions.
+    """
+    def setUp(self):
+        super(UserPermissionsTest, self).setUp()
+        self.course = CourseFactory.create()
+        seed_permissions_roles(self.course.id)
+        self.student = UserFactory.create()
+        CourseEnrollment.enroll(self.student, self.course.id)
+
+    def test_permissions(self):
+        permissions = get_user_permissions(self.student, self.course.id)
+        self.assertIn('create_thread', permissions)
+        self.assertNotIn('openclose_thread', permissions)
+
+    def test_cached(self):
+        get_user_permissions(self.student, self.course.id)
+        # in the same request
+        with self.assertNumQueries(0):
+            get_user_permissions(self.student, self.course.id)
+        # in another request
+        RequestCache().clear_request_cache()
+        with self.assertNumQueries(0):
+            get_user_permissions(self.student, self.course.id)
+
+    def test_role_users_change(self):
+        moderator_role = Role.objects.get(course_id=self.course.id, name=FORUM_ROLE_MODERATOR)
+        self.assertNotIn('openclose_thread', get_user_permissions(self.student, self.course.id))
+
+        moderator_role.users.add(self.student)
+        self.assertIn('openclose_thread', get_user_permissions(self.student, self.course.id))
+
+        self.student.roles.remove(moderator_role)
+        self.assertNotIn('openclose_thread', get_user_permissions(self.student, self.course.id))
+
+    def test_role_permissions_change(self):
+        student_role = Role.objects.get(course_id=self.course.id, name=FORUM_ROLE_STUDENT)
+        self.assertNotIn('openclose_thread', get_user_permissions(self.student, self.course.id))
+
+        student_role.add_permission('openclose_thread')
+        self.assertIn('openclose_thread', get_user_permissions(self.student, self.course.id))
+
+        student_role.permissions.clear()
+        self.assertEqual(get_user_permissions(self.student, self.course.id), frozenset())
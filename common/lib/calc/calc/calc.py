@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -229,8 +232,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = parse_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -258,6 +260,234 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+# The following evaluation actions are used by evaluate_samples(), where the
+# values may be numpy arrays, which can't be compared with operator strings.
+
+def _operands(parse_result):
+    """
+    Return the values in `parse_result`, leaving out operators and parentheses.
+    """
+    return [k for k in parse_result if not isinstance(k, basestring)]
+
+
+def eval_array_atom(parse_result):
+    """
+    Like eval_atom, for arrays.
+    """
+    return _operands(parse_result)[0]
+
+
+def eval_array_power(parse_result):
+    """
+    Like eval_power, for arrays.
+    """
+    return reduce(lambda a, b: b ** a, reversed(_operands(parse_result)))
+
+
+def eval_array_parallel(parse_result):
+    """
+    Like eval_parallel, for arrays.
+
+    A zero among the inputs raises an error, rather than giving NaN.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    return 1. / sum(1. / e for e in _operands(parse_result))
+
+
+def eval_array_sum(parse_result):
+    """
+    Like eval_sum, for arrays.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def eval_array_product(parse_result):
+    """
+    Like eval_product, for arrays.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of a list of variable dictionaries.
+
+    Return the same list of results that calling evaluator() with each
+    dictionary in `variables_list` would, and raise the same errors.
+
+    Where possible, all of the samples are evaluated at once, with each
+    variable as a numpy array of its values.  If that fails in any way
+    (including any floating point error), each sample is evaluated in turn
+    with evaluator(), so that errors and special values are as before.
+    """
+    try:
+        return _evaluate_arrays(variables_list, functions, math_expr, case_sensitive)
+    except Exception:  # pylint: disable=broad-except
+        return [
+            evaluator(variables, functions, math_expr, case_sensitive)
+            for variables in variables_list
+        ]
+
+
+def _evaluate_arrays(variables_list, functions, math_expr, case_sensitive):
+    """
+    Evaluate `math_expr` for all of `variables_list` at once, using numpy arrays.
+    """
+    num_samples = len(variables_list)
+    if num_samples == 0 or math_expr.strip() == "":
+        raise ValueError("Nothing to evaluate together")
+    names = set(variables_list[0])
+    if any(set(variables) != names for variables in variables_list):
+        raise ValueError("The samples don't all have the same variables")
+
+    variables = {}
+    for name in names:
+        values = numpy.array([sample[name] for sample in variables_list])
+        if values.dtype.kind not in 'fc':
+            raise ValueError("Only float and complex values are evaluated together")
+        variables[name] = values
+
+    math_interpreter = parse_expression(math_expr, case_sensitive)
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    evaluate_actions = {
+        'number': eval_number,
+        'variable': lambda x: all_variables[casify(x[0])],
+        'function': lambda x: all_functions[casify(x[0])](x[1]),
+        'atom': eval_array_atom,
+        'power': eval_array_power,
+        'parallel': eval_array_parallel,
+        'product': eval_array_product,
+        'sum': eval_array_sum
+    }
+
+    # Where plain Python numbers would raise (e.g. dividing by zero) numpy
+    # would carry on with inf or NaN, so make numpy raise instead.
+    with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+        result = math_interpreter.reduce_tree(evaluate_actions)
+
+    if not isinstance(result, numpy.ndarray):
+        # The expression doesn't depend on the sampled variables.
+        return [result] * num_samples
+    if result.shape != (num_samples,):
+        raise ValueError("Unexpected result shape {}".format(result.shape))
+    return list(result)
+
+
+def _build_grammar():
+    """
+    Build the pyparsing grammar for algebraic expressions.
+
+    The grammar gives a tree with proper groupings to reflect parenthesis and
+    order of operations. It leaves all operators in the tree and does not
+    parse any strings of numbers into their float versions.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+# The grammar is the same for every expression, so it is only built once.
+GRAMMAR = _build_grammar()
+
+# Parsed expressions, most recently used last, keyed by (math_expr, case_sensitive).
+PARSE_CACHE_SIZE = 1000
+_PARSE_CACHE = OrderedDict()
+_PARSE_CACHE_LOCK = threading.Lock()
+
+
+def parse_expression(math_expr, case_sensitive=False):
+    """
+    Return a ParseAugmenter that has parsed `math_expr`.
+
+    Recently parsed expressions are cached.  The ParseAugmenter is shared
+    between callers, so it must not be changed.
+    """
+    key = (math_expr, case_sensitive)
+    with _PARSE_CACHE_LOCK:
+        math_interpreter = _PARSE_CACHE.pop(key, None)
+        if math_interpreter is not None:
+            # Re-insert it to mark it as the most recently used.
+            _PARSE_CACHE[key] = math_interpreter
+            return math_interpreter
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE[key] = math_interpreter
+        while len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    return math_interpreter
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -278,23 +508,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -303,61 +516,29 @@ class ParseAugmenter(object):
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
 
+        Also store the names of the variables and functions in the tree in
+        `variables_used` and `functions_used`.
+
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = GRAMMAR.parseString(self.math_expr)[0]
+
+        def find_names(node):
+            """
+            Add the variable and function names in `node` and its children.
+            """
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            for kid in node:
+                if isinstance(kid, ParseResults):
+                    find_names(kid)
+
+        find_names(self.tree)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
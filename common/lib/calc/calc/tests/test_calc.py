@@ -559,3 +559,65 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parse_cache(self):
+        """
+        Check that an expression is only parsed once
+        """
+        parsed = calc.parse_expression("x^2 + sin(y)")
+        self.assertIs(parsed, calc.parse_expression("x^2 + sin(y)"))
+        self.assertEqual(parsed.variables_used, set(['x', 'y']))
+        self.assertEqual(parsed.functions_used, set(['sin']))
+        self.assertIsNot(parsed, calc.parse_expression("x^2 + sin(y)", case_sensitive=True))
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Check that calc.evaluate_samples gives the same results and errors as
+    calling calc.evaluator on each sample.
+    """
+
+    def setUp(self):
+        super(EvaluateSamplesTest, self).setUp()
+        self.samples = [{'x': x, 'y': 4.0 - x} for x in [0.5, 1.0, 1.5, 2.0, 3.5]]
+
+    def assert_same_as_evaluator(self, math_expr, case_sensitive=False):
+        """
+        Compare evaluate_samples and evaluator for `math_expr`
+        """
+        expected = [
+            calc.evaluator(variables, {}, math_expr, case_sensitive) for variables in self.samples
+        ]
+        results = calc.evaluate_samples(self.samples, {}, math_expr, case_sensitive)
+        self.assertEqual(len(results), len(expected))
+        for result, expected_result in zip(results, expected):
+            if numpy.isnan(expected_result):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertEqual(result, expected_result)
+
+    def test_same_results(self):
+        expressions = [
+            "x + y", "x^2 - y/3", "-x^y^0.5", "sqrt(x) * cos(y) + i*x", "x || y",
+            "5k || x", "X*1k + 3%", "fact(4) * x", "arccot(x - 2)", "pi * 2", "",
+        ]
+        for math_expr in expressions:
+            self.assert_same_as_evaluator(math_expr)
+        self.assert_same_as_evaluator("x*y", case_sensitive=True)
+
+    def test_special_values(self):
+        # These give NaN for some samples only, or raise errors in numpy.
+        self.assert_same_as_evaluator("(x - 1.5) || y")
+        self.assert_same_as_evaluator("sqrt(x - 2)")
+
+    def test_same_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.samples, {}, "1/(x - 2)")
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples(self.samples, {}, "(x - 2)^0.5")
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.evaluate_samples(self.samples, {}, "fact(x)")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.samples, {}, "x + z")
+        with self.assertRaises(ParseException):
+            calc.evaluate_samples(self.samples, {}, "x +* y")
@@ -30,6 +30,7 @@ import capa.responsetypes as responsetypes
 from capa.util import contextualize_text, convert_files_to_filenames
 import capa.xqueue_interface as xqueue_interface
 from capa.safe_exec import safe_exec
+from capa.safe_exec.safe_exec import LRUCache
 
 
 # extra things displayed after "show answers" is pressed
@@ -58,6 +59,32 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Parsed problem XML, keyed by the text it was parsed from.  Each LoncapaProblem
+# changes its tree, so it works on a copy of the cached one.
+TEMPLATE_CACHE = LRUCache(max_size=8 * 1024 * 1024, max_count=2000)
+
+
+def parse_problem_text(problem_text):
+    """
+    Returns `(problem_text, tree)` for the text of a problem: the text with
+    <startouttext/> and <endouttext/> converted to <text></text>, and a new
+    element tree parsed from it.
+
+    This is the same for every student, so it is parsed once per process, and
+    the parsed tree is copied for each problem.  <include> tags are left in
+    the tree, since the files they refer to may change.
+
+    """
+    template = TEMPLATE_CACHE.get(problem_text)
+    if template is None:
+        # Convert startouttext and endouttext to proper <text></text>
+        converted_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        converted_text = re.sub(r"endouttext\s*/", "/text", converted_text)
+        template = (converted_text, etree.XML(converted_text))
+        TEMPLATE_CACHE.set(problem_text, template, len(problem_text))
+    converted_text, tree = template
+    return converted_text, deepcopy(tree)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,13 +181,8 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
         # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        self.problem_text, self.tree = parse_problem_text(problem_text)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -177,9 +199,9 @@ class LoncapaProblem(object):
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
 
-        # dictionary of InputType objects associated with this problem
-        #   input_id string -> InputType object
-        self.inputs = {}
+        # The InputType objects and the HTML are made when first needed.  See `inputs`.
+        self._inputs = None
+        self._extracted_tree = None
 
         # Run response late_transforms last (see MultipleChoiceResponse)
         # Sort the responses to be in *_1 *_2 ... order.
@@ -189,7 +211,36 @@ class LoncapaProblem(object):
             if hasattr(response, 'late_transforms'):
                 response.late_transforms(self)
 
-        self.extracted_tree = self._extract_html(self.tree)
+    @property
+    def inputs(self):
+        """
+        Dictionary of InputType objects associated with this problem,
+        input_id string -> InputType object.
+
+        The inputs are made while extracting the problem's HTML.  Grading only
+        needs the responders, so that is put off until the inputs or the HTML
+        are first used, which makes problems that are only graded (e.g. when
+        computing grades or rescoring) much cheaper to load.
+        """
+        if self._inputs is None:
+            self._extract_inputs()
+        return self._inputs
+
+    @property
+    def extracted_tree(self):
+        """
+        The problem's HTML as an element tree, extracted when first needed.
+        """
+        if self._extracted_tree is None:
+            self._extract_inputs()
+        return self._extracted_tree
+
+    def _extract_inputs(self):
+        """
+        Extracts the problem's HTML, which makes its InputType objects.
+        """
+        self._inputs = {}
+        self._extracted_tree = self._extract_html(self.tree)
 
     def do_reset(self):
         """
@@ -508,6 +559,9 @@ class LoncapaProblem(object):
         Main method called externally to get the HTML to be rendered for this capa Problem.
         """
         self.do_targeted_feedback(self.tree)
+        if self._inputs is None:
+            # The inputs are made while extracting the HTML below.
+            self._inputs = {}
         html = contextualize_text(etree.tostring(self._extract_html(self.tree)), self.context)
         return html
 
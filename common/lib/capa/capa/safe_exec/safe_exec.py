@@ -4,9 +4,14 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import sandbox_pool
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
 import hashlib
+import json
+import threading
+import zlib
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -70,6 +75,147 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+# The types and names of globals that can be passed to the sandbox, as in codejail's json_safe().
+JSON_SAFE_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+JSON_UNSAFE_KEYS = ("__builtins__",)
+
+# Strings at least this long are only hashed once while they're in use.  The
+# problem's script_code and other large globals are passed to safe_exec again
+# each time the problem is checked.
+LARGE_STRING_SIZE = 1024
+
+
+class LRUCache(object):
+    """
+    A thread safe LRU cache for one process.
+
+    It is bounded by the total size of its values, as given to set(), and
+    optionally by the number of values.
+
+    """
+    def __init__(self, max_size, max_count=None):
+        self.max_size = max_size
+        self.max_count = max_count
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the value for `key`, or None."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            # Re-insert it to mark it as the most recently used.
+            self._entries[key] = entry
+        return entry[0]
+
+    def set(self, key, value, size):
+        """Stores `value`, whose size is `size`, evicting the least recently used values."""
+        if size > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size or (self.max_count and len(self._entries) > self.max_count):
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        """Empties the cache."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# Results of recent executions in this process.  It sits in front of the shared
+# `cache` passed to safe_exec, and holds the same compressed values.
+LOCAL_CACHE = LRUCache(max_size=16 * 1024 * 1024)
+
+# Digests of the large strings seen recently, keyed by id().  Each entry keeps
+# its string alive, so that the id isn't reused while the entry exists.
+STRING_DIGESTS = LRUCache(max_size=float('inf'), max_count=256)
+
+
+def _value_digest(value):
+    """
+    Returns a digest of the JSON form of `value`.
+
+    Raises TypeError or ValueError if `value` can't be converted to JSON.
+    """
+    large_string = isinstance(value, basestring) and len(value) >= LARGE_STRING_SIZE
+    if large_string:
+        entry = STRING_DIGESTS.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+    digest = hashlib.md5(json.dumps(value, sort_keys=True)).digest()
+    if large_string:
+        STRING_DIGESTS.set(id(value), (value, digest), 0)
+    return digest
+
+
+def _cache_key(code, globals_dict, random_seed):
+    """
+    Returns the cache key for running `code` with `globals_dict` and `random_seed`.
+
+    Only the globals that would be passed to the sandbox are included.
+    """
+    md5er = hashlib.md5()
+    md5er.update(code.encode('utf-8') if isinstance(code, unicode) else code)
+    for name in sorted(globals_dict):
+        value = globals_dict[name]
+        if name in JSON_UNSAFE_KEYS or not isinstance(value, JSON_SAFE_TYPES):
+            continue
+        try:
+            digest = _value_digest(value)
+        except (TypeError, ValueError):
+            continue
+        md5er.update(repr(name))
+        md5er.update(digest)
+    return "safe_exec.v2.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _same_value(before, after):
+    """
+    Is the global value `after`, read back from the sandbox, the same as `before`?
+    """
+    if type(before) is not type(after) and not (isinstance(before, basestring) and isinstance(after, basestring)):
+        return False
+    return before == after
+
+
+def _encode_results(emsg, cleaned_results, globals_before=None):
+    """
+    Returns the value to cache for an execution.
+
+    `emsg` is the exception message, if any, else None.  `cleaned_results` is
+    the JSON safe globals dictionary after the execution.  Globals that are
+    unchanged from `globals_before` are left out, since they'll already be
+    in the globals dictionary when the result is used.
+
+    """
+    if globals_before:
+        cleaned_results = dict(
+            (name, value) for name, value in cleaned_results.iteritems()
+            if name not in globals_before or not _same_value(globals_before[name], value)
+        )
+    return (emsg, zlib.compress(json.dumps(cleaned_results)))
+
+
+def _decode_results(cached):
+    """
+    Returns the exception message and the changed globals from a cached value.
+    """
+    emsg, compressed_results = cached
+    return emsg, json.loads(zlib.decompress(compressed_results))
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -107,29 +253,39 @@ def safe_exec(
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
     """
-    # Check the cache for a previous result.
+    # Check the cache for a previous result, first in this process.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = _cache_key(code, globals_dict, random_seed)
+        cached = LOCAL_CACHE.get(key)
+        tier = 'process'
+        if cached is None:
+            cached = cache.get(key)
+            tier = 'shared'
+            if cached is not None:
+                LOCAL_CACHE.set(key, cached, len(cached[1]))
+        dog_stats_api.increment(
+            'capa.safe_exec.cache',
+            tags=['result:hit', 'tier:' + tier] if cached is not None else ['result:miss'],
+        )
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
-            # message, if any, else None; and the resulting globals dictionary.
-            emsg, cleaned_results = cached
+            # message, if any, else None; and the globals that changed.
+            emsg, cleaned_results = _decode_results(cached)
             globals_dict.update(cleaned_results)
             if emsg:
                 raise SafeExecException(emsg)
             return
+        globals_before = dict(globals_dict)
 
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
+    pool = sandbox_pool.get_pool()
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif pool is not None:
+        exec_fn = pool.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
@@ -148,7 +304,9 @@ def safe_exec(
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        cached = _encode_results(emsg, cleaned_results, globals_before)
+        LOCAL_CACHE.set(key, cached, len(cached[1]))
+        cache.set(key, cached)
 
     # If an exception happened, raise it now.
     if emsg:
@@ -0,0 +1,469 @@
+"""
+A pool of warm sandbox processes for capa's safe_exec.
+
+codejail starts a new sandboxed Python for every execution, and that Python
+then imports numpy, scipy and the other modules that problem code uses.  For
+problems with a little randomization code, that startup is most of the time
+spent rendering them.
+
+Each worker in this pool is a long-lived sandboxed Python (a "zygote"), started
+with the same command line as codejail's, that has already imported those
+modules.  The zygote never reads a request itself: when one arrives, it forks a
+fresh child that reads it, and that child forks another to execute the code.
+The code's process replaces the zygote's pipes to this process with /dev/null,
+applies codejail's resource limits (including no subprocesses) and runs the
+code.  Both children exit when the code is done, and anything the code started
+is killed with them, so each execution still gets a process of its own, and
+starts from a copy of the zygote that no earlier request or result has been in.
+
+Workers are replaced after a number of executions, or when their memory use
+grows past a threshold.  Queue wait, execution time and recycles are sent to
+DataDog, and are counted in `SandboxPool.stats`.
+
+The pool is off unless `configure()` is called with a size, and only used when
+codejail is configured to run Python in a sandbox.
+
+"""
+
+import json
+import logging
+import os
+import os.path
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import Queue
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# The modules the zygotes import before they fork.  See ASSUMED_IMPORTS in
+# safe_exec.py, which makes these available to the executed code.
+PRELOADED_MODULES = [
+    "json",
+    "random",
+    "math",
+    "numpy",
+    "scipy",
+    "calc",
+    "eia",
+    "chem.chemcalc",
+    "chem.chemtools",
+    "chem.miller",
+    "verifiers.draganddrop",
+]
+
+# The program the zygotes run.  It reads one JSON request per line from stdin,
+# and writes one JSON response per line to stdout.
+ZYGOTE_CODE = r"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+for modname in %(preloaded_modules)r:
+    try:
+        __import__(modname)
+    except Exception:
+        pass
+
+MAXFD = os.sysconf("SC_OPEN_MAX")
+
+requests = sys.stdin
+responses = sys.stdout
+sys.stdout = open(os.devnull, "w")
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+
+def jsonable(value):
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+def isolate_child(result_fd):
+    # Leave the code nothing of the zygote's: its pipes to the LMS (stdin and
+    # stdout) are replaced by /dev/null, and its other files are closed.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    os.closerange(3, result_fd)
+    os.closerange(result_fd + 1, MAXFD)
+    # Its own process group, so that it can be killed with anything it starts.
+    os.setpgid(0, 0)
+
+
+def set_process_limits(limits):
+    # The limits codejail sets on the processes it starts.
+    # No subprocesses.
+    nproc = limits.get("NPROC", 0)
+    resource.setrlimit(resource.RLIMIT_NPROC, (nproc, nproc))
+    # CPU seconds, with a soft limit first, so the code gets a SIGXCPU.
+    cpu = limits.get("CPU")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    # Total process virtual memory.
+    vmem = limits.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+    # Size of written files.  Can be zero (nothing can be written).
+    fsize = limits.get("FSIZE", 0)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+
+def run_child(request, result_fd):
+    isolate_child(result_fd)
+    os.chdir(request["tmpdir"])
+    os.environ["TMPDIR"] = os.path.join(request["tmpdir"], "tmp")
+    set_process_limits(request["limits"])
+
+    # A new process would seed these from the OS, so don't let every child
+    # inherit the zygote's state.
+    import random
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    for pydir in request["python_path"]:
+        sys.path.append(pydir)
+
+    g_dict = request["globals"]
+    try:
+        exec request["code"] in g_dict
+        g_dict = dict((k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in BAD_KEYS)
+        result = {"status": 0, "globals": g_dict}
+    except BaseException:
+        result = {"status": 1, "stderr": traceback.format_exc()}
+    # The length comes first, so the zygote knows when it has the whole result
+    # without waiting for the pipe to be closed.
+    result = json.dumps(result)
+    out = os.fdopen(result_fd, "w")
+    out.write(str(len(result)) + "\n" + result)
+    out.close()
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        # The child hasn't made its group yet, or it has already ended.
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def execute(request):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            run_child(request, write_fd)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        # The child has already made its group.
+        pass
+
+    realtime = request["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    received = ""
+    length = None
+    killed = False
+    while length is None or len(received) < length:
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - time.time(), 0)
+        readable, _, _ = select.select([read_fd], [], [], timeout)
+        if not readable:
+            killed = True
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        received += chunk
+        if length is None and "\n" in received:
+            length, _, received = received.partition("\n")
+            length = int(length)
+    os.close(read_fd)
+    # Nothing the code started outlives it.
+    kill_group(pid)
+    _, status = os.waitpid(pid, 0)
+
+    if killed:
+        return {"status": -signal.SIGKILL, "stderr": "Execution exceeded the real time limit"}
+    if length is None or len(received) < length:
+        return {"status": status or 1, "stderr": "Execution ended without a result (status %%d)" %% status}
+    return json.loads(received)
+
+
+def serve_request():
+    # Runs in a child of the zygote, so that the request and its result are
+    # never in the memory of the zygote, and of the children forked after.
+    line = requests.readline()
+    if not line:
+        os._exit(EXIT_NO_REQUEST)
+    response = execute(json.loads(line))
+    response["maxrss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    responses.write(json.dumps(response) + "\n")
+    responses.flush()
+
+
+EXIT_NO_REQUEST = 3
+
+while True:
+    # Wait for a request (or the end of stdin) without reading any of it.
+    select.select([requests], [], [])
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            serve_request()
+            status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == EXIT_NO_REQUEST:
+        break
+    if status != 0:
+        response = {"status": 1, "stderr": "Sandbox request failed (status %%d)" %% status}
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+"""
+
+
+class SandboxWorkerError(Exception):
+    """A sandbox worker stopped responding."""
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One zygote process, started with `cmdline`.
+    """
+    def __init__(self, cmdline):
+        code = ZYGOTE_CODE % {'preloaded_modules': PRELOADED_MODULES}
+        self.process = subprocess.Popen(
+            cmdline + ["-c", code],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env={},
+            close_fds=True,
+        )
+        self.executions = 0
+        self.memory = 0
+
+    def execute(self, request):
+        """
+        Runs `request` in a fresh child of the zygote, and returns the response.
+        """
+        self.executions += 1
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except IOError as exc:
+            raise SandboxWorkerError(str(exc))
+        if not line:
+            raise SandboxWorkerError("Sandbox worker exited with status %r" % self.process.poll())
+        response = json.loads(line)
+        self.memory = response.pop("maxrss", 0)
+        return response
+
+    def close(self):
+        """
+        Stops the zygote.  It exits when its stdin is closed.
+        """
+        try:
+            self.process.stdin.close()
+            self.process.stdout.close()
+        except IOError:
+            pass
+        self.process.wait()
+
+
+class SandboxPool(object):
+    """
+    A fixed number of SandboxWorkers, shared by the threads of one process.
+
+    `cmdline` starts a sandboxed Python, which runs as `user`.  Workers are
+    started the first time they are needed.  A worker is replaced after
+    `max_executions` executions, or when its memory use is more than
+    `max_memory` bytes.
+
+    """
+    def __init__(self, cmdline, size, user=None, max_executions=None, max_memory=None):
+        self.cmdline = cmdline
+        self.user = user
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self.stats = {
+            'executions': 0,
+            'queue_wait': 0.0,
+            'exec_time': 0.0,
+            'recycles': 0,
+        }
+        self._stats_lock = threading.Lock()
+        # Holds the idle workers.  None stands for a worker that isn't running yet.
+        self._idle = Queue.Queue()
+        for __ in range(size):
+            self._idle.put(None)
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Executes `code` like codejail.safe_exec.safe_exec does.
+        """
+        python_path = python_path or ()
+        extra_files = extra_files or ()
+        extra_names = set(name for name, contents in extra_files)
+
+        tmpdir = tempfile.mkdtemp(prefix="codejail-")
+        tmptmp = os.path.join(tmpdir, "tmp")
+        try:
+            os.chmod(tmpdir, 0775)
+            for pydir in python_path:
+                pybase = os.path.basename(pydir)
+                if pybase in extra_names:
+                    continue
+                if os.path.isdir(pydir):
+                    shutil.copytree(pydir, os.path.join(tmpdir, pybase))
+                else:
+                    shutil.copyfile(pydir, os.path.join(tmpdir, pybase))
+            for name, contents in extra_files:
+                with open(os.path.join(tmpdir, name), "wb") as extra_file:
+                    extra_file.write(contents)
+            os.mkdir(tmptmp)
+            os.chmod(tmptmp, 0777)
+
+            request = {
+                'code': code,
+                'globals': json_safe(globals_dict),
+                'python_path': [os.path.basename(pydir) for pydir in python_path],
+                'tmpdir': tmpdir,
+                'limits': jail_code.LIMITS,
+            }
+            log.debug("Executing jailed code %s in the sandbox pool", slug)
+            response = self._execute(request)
+        finally:
+            if self.user and os.path.exists(tmptmp):
+                # Files the sandbox made belong to the sandbox user.
+                subprocess.call(["sudo", "-u", self.user, "rm", "-rf", tmptmp])
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if response["status"] != 0:
+            raise SafeExecException("Couldn't execute jailed code: %s" % response["stderr"])
+        globals_dict.update(response["globals"])
+
+    def _execute(self, request):
+        """
+        Runs `request` on an idle worker, waiting for one if they are all busy.
+        """
+        start = time.time()
+        worker = self._idle.get()
+        queue_wait = time.time() - start
+        try:
+            if worker is None:
+                worker = SandboxWorker(self.cmdline)
+            start = time.time()
+            try:
+                response = worker.execute(request)
+            except SandboxWorkerError:
+                worker.close()
+                worker = None
+                raise
+            exec_time = time.time() - start
+        finally:
+            self._idle.put(self._recycle_if_needed(worker))
+
+        dog_stats_api.histogram('capa.safe_exec.pool.queue_wait', queue_wait)
+        dog_stats_api.histogram('capa.safe_exec.pool.exec_time', exec_time)
+        with self._stats_lock:
+            self.stats['executions'] += 1
+            self.stats['queue_wait'] += queue_wait
+            self.stats['exec_time'] += exec_time
+        return response
+
+    def _recycle_if_needed(self, worker):
+        """
+        Returns `worker`, or None if it has been stopped so that it will be replaced.
+        """
+        if worker is None:
+            return None
+        worn_out = self.max_executions and worker.executions >= self.max_executions
+        too_big = self.max_memory and worker.memory > self.max_memory
+        if not (worn_out or too_big):
+            return worker
+        worker.close()
+        dog_stats_api.increment('capa.safe_exec.pool.recycle')
+        with self._stats_lock:
+            self.stats['recycles'] += 1
+        return None
+
+    def close(self):
+        """
+        Stops the idle workers.
+        """
+        for __ in range(self.size):
+            worker = self._idle.get()
+            if worker is not None:
+                worker.close()
+            self._idle.put(None)
+
+
+POOL_OPTIONS = {}
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure(size=0, max_executions=100, max_memory=None):
+    """
+    Sets up the pool used by safe_exec.
+
+    `size` is the number of workers each process can use, and 0 disables the
+    pool.  See SandboxPool for the other options.
+
+    """
+    global _POOL  # pylint: disable=global-statement
+    POOL_OPTIONS.clear()
+    POOL_OPTIONS.update(size=size, max_executions=max_executions, max_memory=max_memory)
+    _POOL = None
+
+
+def get_pool():
+    """
+    Returns the pool for the current process, or None if there isn't one.
+
+    Web servers fork their workers after startup, so each process starts its
+    own zygotes the first time it needs them.
+
+    """
+    global _POOL  # pylint: disable=global-statement
+    if not POOL_OPTIONS.get('size') or not jail_code.is_configured("python"):
+        return None
+    with _POOL_LOCK:
+        if _POOL is None or _POOL[0] != os.getpid():
+            command = jail_code.COMMANDS["python"]
+            pool = SandboxPool(command["cmdline_start"], user=command["user"], **POOL_OPTIONS)
+            _POOL = (os.getpid(), pool)
+        return _POOL[1]
@@ -10,6 +10,7 @@ import unittest
 from nose.plugins.skip import SkipTest
 
 from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec.safe_exec import LOCAL_CACHE, _cache_key, _decode_results, _encode_results
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -110,6 +111,16 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super(TestSafeExecCaching, self).setUp()
+        LOCAL_CACHE.clear()
+
+    def fiddle_with_cache(self, cache, emsg, results):
+        """Replace the only cached result, in both the shared and the process cache."""
+        self.assertEqual(len(cache), 1)
+        cache[cache.keys()[0]] = _encode_results(emsg, results)
+        LOCAL_CACHE.clear()
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -118,10 +129,10 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
         self.assertEqual(g['a'], 3)
         # A result has been cached
-        self.assertEqual(cache.values()[0], (None, {'a': 3}))
+        self.assertEqual(_decode_results(cache.values()[0]), (None, {'a': 3}))
 
         # Fiddle with the cache, then try it again.
-        cache[cache.keys()[0]] = (None, {'a': 17})
+        self.fiddle_with_cache(cache, None, {'a': 17})
 
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
@@ -148,24 +159,59 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # The exception should be in the cache now.
         self.assertEqual(len(cache), 1)
-        cache_exc_msg, cache_globals = cache.values()[0]
+        cache_exc_msg, cache_globals = _decode_results(cache.values()[0])
         self.assertIn("ZeroDivisionError", cache_exc_msg)
 
         # Change the value stored in the cache, the result should change.
-        cache[cache.keys()[0]] = ("Hey there!", {})
+        self.fiddle_with_cache(cache, "Hey there!", {})
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
 
         self.assertEqual(len(cache), 1)
-        cache_exc_msg, cache_globals = cache.values()[0]
+        cache_exc_msg, cache_globals = _decode_results(cache.values()[0])
         self.assertEqual("Hey there!", cache_exc_msg)
 
         # Change it again, now no exception!
-        cache[cache.keys()[0]] = (None, {'a': 17})
+        self.fiddle_with_cache(cache, None, {'a': 17})
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_process_cache_hit(self):
+        cache = {}
+        safe_exec("a = int(math.pi)", {}, cache=DictCache(cache))
+
+        # The shared cache isn't read when this process has the result.
+        cache.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(cache, {})
+
+    def test_unchanged_globals_not_cached(self):
+        script_code = "# A large problem script.\n" * 1000
+        g = {'script_code': script_code, 'b': 1}
+        cache = {}
+        safe_exec("a = b + 1", g, cache=DictCache(cache))
+        self.assertEqual(_decode_results(cache.values()[0]), (None, {'a': 2}))
+
+        LOCAL_CACHE.clear()
+        g = {'script_code': script_code, 'b': 1}
+        safe_exec("a = b + 1", g, cache=DictCache(cache))
+        self.assertEqual(g, {'script_code': script_code, 'b': 1, 'a': 2})
+
+    def test_cache_key(self):
+        key = _cache_key("a = b", {'b': [1, {'c': 2, 'd': 3}]}, 17)
+        # The same globals in a different order have the same key.
+        self.assertEqual(key, _cache_key("a = b", {'b': [1, {'d': 3, 'c': 2}]}, 17))
+        # Globals that can't be sent to the sandbox are ignored.
+        self.assertEqual(key, _cache_key("a = b", {'b': [1, {'c': 2, 'd': 3}], 'f': object()}, 17))
+        # Anything else that's different changes the key.
+        self.assertNotEqual(key, _cache_key("a = b", {'b': [1, {'c': 2, 'd': 4}]}, 17))
+        self.assertNotEqual(key, _cache_key("a = b", {'b': [1, {'c': 2, 'd': 3}]}, 18))
+        self.assertNotEqual(key, _cache_key("a = c", {'b': [1, {'c': 2, 'd': 3}]}, 17))
+        self.assertNotEqual(key, _cache_key("a = b", {'b': [1, {'c': 2, 'd': 3}], 'e': 1}, 17))
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -0,0 +1,90 @@
+"""Test sandbox_pool.py"""
+
+import os
+import sys
+import time
+import unittest
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from mock import patch
+
+from capa.safe_exec.sandbox_pool import SandboxPool
+
+
+class TestSandboxPool(unittest.TestCase):
+    """Run code in a pool of plain, unsandboxed Pythons."""
+
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = SandboxPool([sys.executable, "-E", "-B"], size=1, max_executions=3)
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g, {'a': 17, 'b': 18})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_executions_are_isolated(self):
+        g = {}
+        self.pool.safe_exec("import os, sys; sys.leaked = True; pid = os.getpid()", g)
+        first_pid = g['pid']
+        self.pool.safe_exec("import os, sys; pid = os.getpid(); leaked = hasattr(sys, 'leaked')", g)
+        self.assertNotEqual(g['pid'], first_pid)
+        self.assertFalse(g['leaked'])
+
+    def test_workers_are_recycled(self):
+        for i in range(7):
+            self.pool.safe_exec("a = %d" % i, {})
+        self.assertEqual(self.pool.stats['executions'], 7)
+        self.assertEqual(self.pool.stats['recycles'], 2)
+
+    def test_cannot_use_zygote_pipes(self):
+        # Writing a result to the zygote's stdout doesn't make it the result of the next execution.
+        g = {}
+        self.pool.safe_exec(
+            "import os\n"
+            "os.write(1, '{\"status\": 0, \"globals\": {\"forged\": true}}\\n')\n"
+            "os.write(2, 'error output\\n')\n"
+            "stolen = os.read(0, 100)\n",
+            g
+        )
+        self.assertEqual(g['stolen'], '')
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g, {'a': 1})
+
+    @unittest.skipIf(os.getuid() == 0, "root isn't limited in the number of processes")
+    def test_no_subprocesses(self):
+        with patch.dict(jail_code.LIMITS, {'NPROC': 0}):
+            with self.assertRaises(SafeExecException) as cm:
+                self.pool.safe_exec("import os; os.fork()", {})
+        self.assertIn("OSError", cm.exception.message)
+
+    def test_subprocesses_are_killed(self):
+        # Where processes are allowed, they end with the execution that started them.
+        g = {}
+        with patch.dict(jail_code.LIMITS, {'NPROC': 100}):
+            self.pool.safe_exec(
+                "import os, time\n"
+                "child = os.fork()\n"
+                "if child == 0:\n"
+                "    time.sleep(60)\n"
+                "    os._exit(0)\n",
+                g
+            )
+        time.sleep(0.5)
+        self.assertFalse(self._is_running(g['child']))
+
+    def _is_running(self, pid):
+        """Is the process `pid` running (and not a zombie)?"""
+        try:
+            with open("/proc/%d/stat" % pid) as stat_file:
+                return stat_file.read().split(")")[-1].split()[0] != "Z"
+        except IOError:
+            return False
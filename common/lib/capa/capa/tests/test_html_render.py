@@ -6,6 +6,7 @@ import textwrap
 import mock
 
 from .response_xml_factory import StringResponseXMLFactory, CustomResponseXMLFactory
+from capa.capa_problem import LoncapaProblem
 from . import test_capa_system, new_loncapa_problem
 
 
@@ -187,8 +188,6 @@ class CapaHtmlRenderTest(unittest.TestCase):
         expected_solution_context = {'id': '1_solution_1'}
 
         expected_calls = [
-            mock.call('textline.html', expected_textline_context),
-            mock.call('solutionspan.html', expected_solution_context),
             mock.call('textline.html', expected_textline_context),
             mock.call('solutionspan.html', expected_solution_context)
         ]
@@ -272,6 +271,56 @@ class CapaHtmlRenderTest(unittest.TestCase):
         the_html = problem.get_html()
         self.assertRegexpMatches(the_html, r"<div>\s+</div>")
 
+    def test_parsed_problem_is_copied(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+            <startouttext/>Test text<endouttext/>
+            </problem>
+        """)
+
+        # The text is parsed once, and each problem gets a tree of its own
+        with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            first_problem = new_loncapa_problem(xml_str)
+            second_problem = new_loncapa_problem(xml_str)
+        self.assertEqual(mock_xml.call_count, 1)
+        self.assertIsNot(first_problem.tree, second_problem.tree)
+        self.assertEqual(first_problem.problem_text, second_problem.problem_text)
+
+        first_problem.tree.find('text').text = 'Changed text'
+        rendered_html = etree.XML(second_problem.get_html())
+        self.assertEqual(rendered_html.find('span').text, 'Test text')
+
+    def test_grade_without_html(self):
+        xml_str = StringResponseXMLFactory().build_xml(answer='Test answer')
+
+        # Grading a problem doesn't extract its HTML
+        with mock.patch.object(LoncapaProblem, '_extract_html') as mock_extract:
+            problem = new_loncapa_problem(xml_str)
+            problem.grade_answers({'1_2_1': 'Test answer'})
+            self.assertEqual(problem.get_score(), {'score': 1, 'total': 1})
+        self.assertFalse(mock_extract.called)
+
+        # The inputs are made when they are first needed
+        self.assertEqual(problem.inputs.keys(), ['1_2_1'])
+        self.assertEqual(problem.inputs['1_2_1'].value, 'Test answer')
+
+    def test_include_changes(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+                <include file="test_include_changes.xml"/>
+            </problem>
+        """)
+
+        # Includes are read again for each problem, even when its text is cached
+        self._create_test_file('test_include_changes.xml', '<test>First include</test>')
+        problem = new_loncapa_problem(xml_str, capa_system=self.capa_system)
+        self.assertEqual(etree.XML(problem.get_html()).find('test').text, 'First include')
+
+        with self.capa_system.filestore.open('test_include_changes.xml', 'w') as include_file:
+            include_file.write('<test>Second include</test>')
+        problem = new_loncapa_problem(xml_str, capa_system=self.capa_system)
+        self.assertEqual(etree.XML(problem.get_html()).find('test').text, 'Second include')
+
     def _create_test_file(self, path, content_str):
         test_fp = self.capa_system.filestore.open(path, "w")
         test_fp.write(content_str)
@@ -302,10 +302,27 @@ class BulkOperationsMixin(object):
             bulk_ops_record.has_library_updated_item = False
 
 
+# Block types and field names repeat across every block of every structure, so share one
+# copy of each. (The builtin intern() only accepts str, and mongo hands back unicode.)
+_INTERNED_STRINGS = {}
+
+
+def intern_string(value):
+    """
+    Return the shared copy of the string ``value``.
+    """
+    return _INTERNED_STRINGS.setdefault(value, value)
+
+
 class EditInfo(object):
     """
     Encapsulates the editing info of a block.
     """
+    __slots__ = (
+        'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+        'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -374,12 +391,32 @@ class BlockData(object):
     Wrap the block data in an object instead of using a straight Python dictionary.
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
+
+    Structures of large courses hold tens of thousands of these, so they use __slots__, share
+    block type and field name strings, and only build their EditInfo when it's first used.
     """
+    __slots__ = ('fields', 'block_type', 'definition', 'defaults', 'definition_loaded', '_edit_info', '_raw_edit_info')
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
         self.from_storable(kwargs)
 
+    @property
+    def edit_info(self):
+        """
+        EditInfo object containing all versioning/editing data.
+        """
+        if self._edit_info is None:
+            self._edit_info = EditInfo(**self._raw_edit_info)
+            self._raw_edit_info = None
+        return self._edit_info
+
+    @edit_info.setter
+    def edit_info(self, edit_info):
+        self._edit_info = edit_info
+        self._raw_edit_info = None
+
     def to_storable(self):
         """
         Serialize to a Mongo-storable format.
@@ -401,7 +438,8 @@ class BlockData(object):
         self.fields = block_data.get('fields', {})
 
         # XBlock type ID.
-        self.block_type = block_data.get('block_type', None)
+        block_type = block_data.get('block_type', None)
+        self.block_type = intern_string(block_type) if block_type is not None else None
 
         # DB id of the record containing the content of this XBlock.
         self.definition = block_data.get('definition', None)
@@ -410,8 +448,9 @@ class BlockData(object):
         # blocks are copied from a library to a course)
         self.defaults = block_data.get('defaults', {})
 
-        # EditInfo object containing all versioning/editing data.
-        self.edit_info = EditInfo(**block_data.get('edit_info', {}))
+        # The EditInfo is built from this on first access of edit_info.
+        self._edit_info = None
+        self._raw_edit_info = block_data.get('edit_info', {})
 
     def __repr__(self):
         # pylint: disable=bad-continuation, redundant-keyword-arg
@@ -791,7 +830,7 @@ class ModuleStoreRead(ModuleStoreAssetBase):
             xblock, fields = (block, block.fields)
         elif isinstance(block, BlockData):
             # BlockData is an object - compare its attributes in dict form.
-            xblock, fields = (None, block.__dict__)
+            xblock, fields = (None, {key: getattr(block, key) for key in qualifiers if hasattr(block, key)})
         else:
             xblock, fields = (None, block)
 
@@ -135,6 +135,12 @@ def create_modulestore_instance(
         if key in _options and isinstance(_options[key], basestring):
             _options[key] = load_function(_options[key])
 
+    # options naming a django cache, e.g. the split modulestore's shared structure cache
+    CACHE_KEYS = ['structure_cache_subsystem']
+    for key in CACHE_KEYS:
+        if key in _options and isinstance(_options[key], basestring):
+            _options[key] = get_cache(_options[key])
+
     if HAS_REQUEST_CACHE:
         request_cache = RequestCache.get_request_cache()
     else:
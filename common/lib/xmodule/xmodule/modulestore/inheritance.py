@@ -3,6 +3,7 @@ Support for inheritance of fields down an XBlock hierarchy.
 """
 from __future__ import absolute_import
 
+from collections import Mapping
 from datetime import datetime
 from pytz import UTC
 from xmodule.partitions.partitions import UserPartition
@@ -182,6 +183,127 @@ class InheritanceMixin(XBlockMixin):
     )
 
 
+class InheritedSettings(object):
+    """
+    An immutable mapping of inherited settings which layers a block's settings over its parent's
+    InheritedSettings instead of copying them, so the settings of a course's blocks share the
+    settings of their common ancestors.
+
+    It doesn't subclass Mapping (it's registered as one instead), as Mapping's classes have no
+    __slots__ in python 2, so each instance would still get a __dict__.
+    """
+    __slots__ = ('_settings', '_parent')
+
+    def __init__(self, settings=None, parent=None):
+        self._settings = settings or {}
+        self._parent = parent
+
+    def new_child(self, settings):
+        """
+        Return the InheritedSettings of ``settings`` layered over these.
+        """
+        return InheritedSettings(settings, self)
+
+    def __getitem__(self, key):
+        layer = self
+        while layer is not None:
+            if key in layer._settings:  # pylint: disable=protected-access
+                return layer._settings[key]  # pylint: disable=protected-access
+            layer = layer._parent  # pylint: disable=protected-access
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        layer = self
+        while layer is not None:
+            if key in layer._settings:  # pylint: disable=protected-access
+                return True
+            layer = layer._parent  # pylint: disable=protected-access
+        return False
+
+    def __iter__(self):
+        seen = set()
+        layer = self
+        while layer is not None:
+            for key in layer._settings:  # pylint: disable=protected-access
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+            layer = layer._parent  # pylint: disable=protected-access
+
+    def __len__(self):
+        return sum(1 for __ in self)
+
+    def get(self, key, default=None):
+        """
+        Return the value of ``key``, or ``default`` if it isn't set.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def iterkeys(self):
+        """
+        Iterate over the keys.
+        """
+        return iter(self)
+
+    def itervalues(self):
+        """
+        Iterate over the values.
+        """
+        for key in self:
+            yield self[key]
+
+    def iteritems(self):
+        """
+        Iterate over the (key, value) pairs.
+        """
+        for key in self:
+            yield (key, self[key])
+
+    def keys(self):
+        """
+        Return a list of the keys.
+        """
+        return list(self)
+
+    def values(self):
+        """
+        Return a list of the values.
+        """
+        return list(self.itervalues())
+
+    def items(self):
+        """
+        Return a list of the (key, value) pairs.
+        """
+        return list(self.iteritems())
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.iteritems()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def copy(self):
+        """
+        Return a (mutable) dict of the settings.
+        """
+        return dict(self.iteritems())
+
+    def __repr__(self):
+        return "InheritedSettings({!r})".format(self.copy())
+
+
+Mapping.register(InheritedSettings)
+
+
 def compute_inherited_metadata(descriptor):
     """Given a descriptor, traverse all of its descendants and do metadata
     inheritance.  Should be called on a CourseDescriptor after importing a
@@ -273,7 +395,7 @@ class InheritanceKeyValueStore(KeyValueStore):
     """
     def __init__(self, initial_values=None, inherited_settings=None):
         super(InheritanceKeyValueStore, self).__init__()
-        self.inherited_settings = inherited_settings or {}
+        self.inherited_settings = inherited_settings if inherited_settings is not None else {}
         self._fields = initial_values or {}
 
     def get(self, key):
@@ -15,7 +15,7 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
+import random
 import re
 from uuid import uuid4
 
@@ -47,7 +47,9 @@ from xmodule.modulestore import ModuleStoreWriteBase, ModuleStoreEnum, BulkOpera
 from xmodule.modulestore.draft_and_published import ModuleStoreDraftAndPublished, DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError
-from xmodule.modulestore.inheritance import InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
+from xmodule.modulestore.inheritance import (
+    InheritanceMixin, inherit_metadata, InheritanceKeyValueStore, InheritedSettings
+)
 from xmodule.modulestore.xml import CourseLocationManager
 
 log = logging.getLogger(__name__)
@@ -74,6 +76,10 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
 # at module level, cache one instance of OSFS per filesystem root.
 _OSFS_INSTANCE = {}
 
+# The version of the format of the cached metadata inheritance trees. Change it whenever the
+# format changes, so that the trees cached in the old format aren't used.
+INHERITANCE_TREE_VERSION = 1
+
 _DETACHED_CATEGORIES = [name for name, __ in XBlock.load_tagged_classes("detached")]
 
 
@@ -657,18 +663,24 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
-        '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
-        '''
+    def _find_inheritance_containers(self, course_id, location=None):
+        """
+        Find the inheritable settings and children of the containers in the course (or just of the
+        container at ``location``).
+
+        Returns a dict mapping the url of each container to a tuple of (its inheritable settings,
+        the urls of its children) and the url of the course's root (None if not among them).
+        """
         # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
+        if location is not None:
+            query['_id.category'] = location.category
+            query['_id.name'] = location.name
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
@@ -685,7 +697,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
-        results_by_url = {}
+        containers = {}
         root = None
 
         # now go through the results and order them by the location url
@@ -694,58 +706,157 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
 
             location_url = unicode(location)
-            if location_url in results_by_url:
+            children = result.get('definition', {}).get('children', [])
+            if location_url in containers:
                 # found either draft or live to complement the other revision
                 # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
                 # show up under both in this logic: https://openedx.atlassian.net/browse/TNL-1075
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
                 # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
+                metadata, existing_children = containers[location_url]
+                containers[location_url] = (metadata, list(set(existing_children + children)))
             else:
-                results_by_url[location_url] = result
+                containers[location_url] = (result.get('metadata', {}), children)
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return containers, root
+
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
 
-        def _compute_inherited_metadata(url):
+        Returns the compact (cacheable) form of the tree, see _inheritance_tree_to_metadata.
+        '''
+        course_id = self.fill_in_run(course_id)
+        # read the edit count before the containers, so that the tree reflects at least those edits
+        edit_version = self._inheritance_edit_version(course_id)
+        containers, root = self._find_inheritance_containers(course_id)
+        return {
+            'version': INHERITANCE_TREE_VERSION,
+            'edit_version': edit_version,
+            'branch': self.get_branch_setting(),
+            'root': root,
+            'containers': containers,
+        }
+
+    def _inheritance_tree_to_metadata(self, tree, metadata_to_inherit=None, subtree_root=None):
+        """
+        Compute the metadata which each block in the course inherits from the compact inheritance
+        ``tree``: a dict mapping each block's url to an InheritedSettings of the inheritable settings of
+        its ancestors (and, for containers, its own) plus the url of its parent under 'parent'.
+
+        The InheritedSettings of each block is layered over its parent's, so they share (rather than
+        copy) the settings of their ancestors.
+
+        If ``subtree_root`` is given, only recompute (in place) the entries for the blocks below it in
+        ``metadata_to_inherit``, which must have the (current) entry of its parent.
+        """
+        containers = tree['containers']
+        branch = tree['branch']
+        if metadata_to_inherit is None:
+            metadata_to_inherit = {}
+
+        def _compute_inherited_metadata(url, my_metadata):
             """
             Helper method for computing inherited metadata for a specific location url
             """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
+            # go through all the children and recurse, but only if they are containers.
+            for child in containers[url][1]:
                 # WARNING: 'parent' is not part of inherited metadata, but
                 # we're piggybacking on this recursive traversal to grab
                 # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
-
-        if root is not None:
-            _compute_inherited_metadata(root)
+                # Each block's own 'parent' hides its ancestors' from the blocks' lookups.
+                if child in containers:
+                    child_metadata = my_metadata.new_child(dict(containers[child][0], parent={branch: url}))
+                    metadata_to_inherit[child] = child_metadata
+                    _compute_inherited_metadata(child, child_metadata)
+                else:
+                    # this is likely a leaf node, so let's record what metadata we need to inherit
+                    metadata_to_inherit[child] = my_metadata.new_child({'parent': {branch: url}})
+
+        if subtree_root is None or subtree_root == tree['root']:
+            if tree['root'] is not None:
+                _compute_inherited_metadata(tree['root'], InheritedSettings(containers[tree['root']][0]))
+        elif subtree_root in containers:
+            parents = metadata_to_inherit[subtree_root]['parent']
+            if parents[branch] == tree['root']:
+                parent_metadata = InheritedSettings(containers[tree['root']][0])
+            else:
+                parent_metadata = metadata_to_inherit[parents[branch]]
+            my_metadata = parent_metadata.new_child(dict(containers[subtree_root][0], parent=dict(parents)))
+            metadata_to_inherit[subtree_root] = my_metadata
+            _compute_inherited_metadata(subtree_root, my_metadata)
 
         return metadata_to_inherit
 
+    def _inheritance_edit_version(self, course_id, count_edit=False):
+        """
+        Return the number of edits to the course's containers counted in the
+        metadata_inheritance_cache_subsystem, after counting one more if ``count_edit``, or None
+        without a metadata_inheritance_cache_subsystem.
+
+        Each edit is counted after it's written to the db, and each cached tree records the count
+        it reflects (its 'edit_version'), so a tree is only used while no edit has been counted
+        since: edits by other processes are never lost by patching or reading an older tree.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            return None
+        key = u'{}-inheritance-edits'.format(course_id)
+        if cache.get(key) is None:
+            # start from a random count, so that trees cached before the count was evicted
+            # (or expired) don't match the new count
+            cache.add(key, random.randint(0, 2 ** 30))
+        if count_edit:
+            return cache.incr(key)
+        return cache.get(key)
+
+    def _get_inheritance_tree(self, course_id, edit_version=None):
+        """
+        Return the compact inheritance tree for the course from the request cache or the
+        metadata_inheritance_cache_subsystem, or None if it isn't cached (in the current format).
+
+        A tree is only returned from the metadata_inheritance_cache_subsystem if it reflects all of
+        the edits counted so far. If ``edit_version`` is given, the tree (from either cache) must
+        reflect exactly that many edits.
+        """
+        if self.request_cache is not None:
+            tree = self.request_cache.data.get('metadata_inheritance_tree', {}).get(unicode(course_id))
+            if tree is not None and (edit_version is None or tree.get('edit_version') == edit_version):
+                return tree
+
+        if self.metadata_inheritance_cache_subsystem is not None:
+            tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+            if edit_version is None:
+                edit_version = self._inheritance_edit_version(course_id)
+            if tree.get('version') == INHERITANCE_TREE_VERSION and tree.get('edit_version') == edit_version:
+                return tree
+        else:
+            logging.warning(
+                'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
+                OK in localdev and testing environment. Not OK in production.'
+            )
+        return None
+
+    def _cache_inheritance_tree(self, course_id, tree, metadata_to_inherit, write_through=True):
+        """
+        Cache the compact inheritance ``tree`` (in the metadata_inheritance_cache_subsystem too if
+        ``write_through``) and the ``metadata_to_inherit`` computed from it for the course.
+        """
+        # now write out computed tree to caching subsystem (e.g. memcached), if available
+        if write_through and self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+
+        # now populate a request_cache, if available.
+        if self.request_cache is not None:
+            self.request_cache.data.setdefault('metadata_inheritance_tree', {})[unicode(course_id)] = tree
+            self.request_cache.data.setdefault('metadata_inheritance', {})[unicode(course_id)] = metadata_to_inherit
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
@@ -754,46 +865,87 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
 
             # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
-            else:
-                logging.warning(
-                    'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
-                    OK in localdev and testing environment. Not OK in production.'
-                )
-
-        if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
+            tree = self._get_inheritance_tree(course_id)
+
+        # if not in subsystem, or we are on force refresh, then we have to compute
+        needs_compute = tree is None
+        if force_refresh:
+            # the course was edited, so the trees cached so far (by any process) are out of date
+            self._inheritance_edit_version(course_id, count_edit=True)
+        if needs_compute:
             tree = self._compute_metadata_inheritance_tree(course_id)
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+        metadata_to_inherit = self._inheritance_tree_to_metadata(tree)
+        self._cache_inheritance_tree(course_id, tree, metadata_to_inherit, write_through=needs_compute)
+        return metadata_to_inherit
 
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
-        if self.request_cache is not None:
-            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
-            # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+    def _update_cached_metadata_inheritance_tree(self, course_id, location):
+        """
+        Update the cached metadata inheritance tree for an edit of the block at ``location``, recomputing
+        only the inherited metadata of its subtree.
 
-        return tree
+        Returns the updated metadata to inherit, or None if there's no up to date cached tree to
+        update, i.e. if another edit of the course was counted since the cached tree was computed.
+        """
+        course_id = self.fill_in_run(course_id)
+        location = as_published(location)
+        if location.category not in BLOCK_TYPES_WITH_CHILDREN:
+            # only containers pass settings down or have children to pass them to
+            return self._get_cached_metadata_inheritance_tree(course_id)
+
+        edit_version = self._inheritance_edit_version(course_id, count_edit=True)
+        base_tree = self._get_inheritance_tree(course_id, None if edit_version is None else edit_version - 1)
+        if base_tree is None or base_tree['branch'] != self.get_branch_setting():
+            return None
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+        url = unicode(location)
+        found, root = self._find_inheritance_containers(course_id, location)
+        containers = dict(base_tree['containers'])
+        old_children = containers.pop(url, (None, []))[1]
+        containers.update(found)
+        tree = dict(base_tree, containers=containers, root=root or base_tree['root'], edit_version=edit_version)
+
+        if url == tree['root']:
+            metadata_to_inherit = self._inheritance_tree_to_metadata(tree)
+        else:
+            request_cached = self.request_cache.data if self.request_cache is not None else {}
+            if request_cached.get('metadata_inheritance_tree', {}).get(unicode(course_id)) is base_tree:
+                metadata_to_inherit = dict(request_cached['metadata_inheritance'][unicode(course_id)])
+            else:
+                metadata_to_inherit = self._inheritance_tree_to_metadata(base_tree)
+            new_children = containers.get(url, (None, []))[1]
+            # forget the children which aren't this block's anymore (unless they've already moved)
+            for child in set(old_children) - set(new_children):
+                if metadata_to_inherit.get(child, {}).get('parent', {}).get(tree['branch']) == url:
+                    del metadata_to_inherit[child]
+            parent = metadata_to_inherit.get(url, {}).get('parent', {}).get(tree['branch'])
+            if parent is not None and parent != tree['root'] and parent not in metadata_to_inherit:
+                # the block's ancestors aren't in the tree, so it can't be patched
+                return None
+            if parent is not None:
+                self._inheritance_tree_to_metadata(tree, metadata_to_inherit, subtree_root=url)
+
+        self._cache_inheritance_tree(course_id, tree, metadata_to_inherit)
+        return metadata_to_inherit
+
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, location=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the ``location`` of the edited block, only the tree below that block is recomputed.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if location is not None:
+                cached_metadata = self._update_cached_metadata_inheritance_tree(course_id, location)
+            if cached_metadata is None:
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1440,7 +1592,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, location=xblock.location
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1,5 +1,6 @@
 import sys
 import logging
+from collections import OrderedDict
 from contracts import contract, new_contract
 from fs.osfs import OSFS
 from lazy import lazy
@@ -38,6 +39,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
     Computes the settings (nee 'metadata') inheritance upon creation.
     """
+    # the max number of definitions to fetch in one query
+    DEFINITION_BATCH_SIZE = 100
+
     @contract(course_entry=CourseEnvelope)
     def __init__(self, modulestore, course_entry, default_class, module_data, lazy, **kwargs):
         """
@@ -77,6 +81,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
+        # ids of the definitions of the blocks loaded (but whose content hasn't been used yet) by this
+        # runtime, and the definitions fetched for them. See get_definition.
+        self._pending_definitions = OrderedDict()
+        self._definitions = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -179,8 +187,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         )
 
         if definition_id is not None and not block_data.definition_loaded:
+            if definition_id not in self._definitions:
+                self._pending_definitions[definition_id] = True
             definition_loader = DefinitionLazyLoader(
-                self.modulestore,
+                self,
                 course_key,
                 block_key.type,
                 definition_id,
@@ -253,6 +263,28 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return module
 
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition ``definition_id`` for the DefinitionLazyLoader of a block of this runtime.
+
+        Blocks are usually loaded in groups (e.g. all the children of a sequential) before any of their
+        content is used, so the first definition to be used is fetched in one query together with up to
+        DEFINITION_BATCH_SIZE of the other pending definitions.
+
+        Raises:
+            ItemNotFoundError if the definition doesn't exist
+        """
+        if definition_id not in self._definitions:
+            batch = [definition_id]
+            self._pending_definitions.pop(definition_id, None)
+            while self._pending_definitions and len(batch) < self.DEFINITION_BATCH_SIZE:
+                batch.append(self._pending_definitions.popitem(last=False)[0])
+            for definition in self.modulestore.get_definitions(course_key, batch):
+                self._definitions[definition['_id']] = definition
+            if definition_id not in self._definitions:
+                raise ItemNotFoundError(definition_id)
+        return self._definitions[definition_id]
+
     def get_edited_by(self, xblock):
         """
         See :meth: cms.lib.xblock.runtime.EditInfoRuntimeMixin.get_edited_by
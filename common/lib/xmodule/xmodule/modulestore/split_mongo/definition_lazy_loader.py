@@ -12,7 +12,8 @@ class DefinitionLazyLoader(object):
     def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
         """
         Simple placeholder for yet-to-be-fetched data
-        :param modulestore: the pymongo db connection with the definitions
+        :param modulestore: where to get the definition from: the split modulestore, or its
+            CachingDescriptorSystem (which batches the fetches of its blocks' definitions)
         :param definition_locator: the id of the record in the above to fetch
         """
         self.modulestore = modulestore
@@ -8,9 +8,9 @@ import pymongo
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
-from contracts import check, new_contract
+from contracts import all_disabled, check, new_contract
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore import BlockData
+from xmodule.modulestore import BlockData, intern_string
 from xmodule.modulestore.split_mongo import BlockKey
 import datetime
 import pytz
@@ -27,18 +27,23 @@ def structure_from_mongo(structure):
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
     """
-    check('seq[2]', structure['root'])
-    check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
-
-    structure['root'] = BlockKey(*structure['root'])
+    # checking every block of a big course is costly, so only do it when contracts are enabled
+    if not all_disabled():
+        check('seq[2]', structure['root'])
+        check('list(dict)', structure['blocks'])
+        for block in structure['blocks']:
+            if 'children' in block['fields']:
+                check('list(list[2])', block['fields']['children'])
+
+    structure['root'] = BlockKey(intern_string(structure['root'][0]), structure['root'][1])
     new_blocks = {}
     for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
+        fields = block['fields']
+        # share the field name strings between all blocks
+        block['fields'] = fields = {intern_string(field_name): value for field_name, value in fields.iteritems()}
+        if 'children' in fields:
+            fields['children'] = [BlockKey(intern_string(child[0]), child[1]) for child in fields['children']]
+        new_blocks[BlockKey(intern_string(block['block_type']), block.pop('block_id'))] = BlockData(**block)
     structure['blocks'] = new_blocks
 
     return structure
@@ -76,11 +81,15 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If ``structure_cache`` (a :class:`StructureCache`) is given, structures are read through it.
         """
+        self.structure_cache = structure_cache
+
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +131,18 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is None:
+            return structure_from_mongo(self.structures.find_one({'_id': key}))
+
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            document = self.structure_cache.get_document(key)
+            if document is None:
+                document = self.structures.find_one({'_id': key})
+                self.structure_cache.set_document(key, document)
+            structure = structure_from_mongo(document)
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -132,7 +152,24 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        if self.structure_cache is None:
+            return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+
+        structures = []
+        missing_ids = []
+        for key in ids:
+            structure = self.structure_cache.get(key)
+            if structure is None:
+                missing_ids.append(key)
+            else:
+                structures.append(structure)
+
+        if missing_ids:
+            for document in self.structures.find({'_id': {'$in': missing_ids}}):
+                structure = structure_from_mongo(document)
+                self.structure_cache.set(structure['_id'], structure)
+                structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
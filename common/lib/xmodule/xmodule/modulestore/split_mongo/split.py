@@ -80,6 +80,8 @@ from xmodule.modulestore import (
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -424,7 +426,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if len(ids):
             # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids))
+            defs_from_db = list(self.db_connection.get_definitions(list(ids)))
             # Add the retrieved definitions to the cache.
             bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
             definitions.extend(defs_from_db)
@@ -636,14 +638,26 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None,
+                 structure_cache_size=0, structure_cache_subsystem=None, structure_cache_timeout=None,
+                 **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_size: if set, the max bytes of structures to keep in a process level
+            cache across requests (structures are immutable per version guid, so they never go stale)
+        :param structure_cache_subsystem: if set, a (django) cache used as a shared tier of that cache
+        :param structure_cache_timeout: timeout for the entries in ``structure_cache_subsystem``
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        if structure_cache_size or structure_cache_subsystem is not None:
+            structure_cache = StructureCache(
+                structure_cache_size, cache=structure_cache_subsystem, timeout=structure_cache_timeout
+            )
+        else:
+            structure_cache = None
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
 
         if default_class is not None:
@@ -788,8 +802,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_index_cache', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_index_cache'] = {}
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1068,34 +1084,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
+        settings = settings.copy() if settings else {}
 
-        def _block_matches_all(block_data):
-            """
-            Check that the block matches all the criteria
-            """
-            # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
-
-        if settings is None:
-            settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
-
+            block_ids = [
+                block_id for block_id in course.structure['blocks'].iterkeys()
+                if block_id.id == block_name
+            ]
+            block_ids = self._filter_blocks(course_locator, course.structure, block_ids, qualifiers, settings, content)
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1104,15 +1103,57 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                items.append(block_id)
+
+        # narrow down the blocks to check with the structure's indexes
+        block_ids = self._get_structure_index(course_locator, course.structure).candidates(qualifiers, settings)
+        if block_ids is None:
+            block_ids = course.structure['blocks'].iterkeys()
+        items = self._filter_blocks(course_locator, course.structure, block_ids, qualifiers, settings, content)
 
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _filter_blocks(self, course_key, structure, block_ids, qualifiers, settings, content):
+        """
+        Return the keys in ``block_ids`` of the blocks of ``structure`` which match all of the
+        get_items criteria. Definitions are only fetched (in one batch) for the blocks which match
+        ``qualifiers`` and ``settings`` when there are ``content`` criteria.
+        """
+        blocks = structure['blocks']
+        matches = [
+            block_id for block_id in block_ids
+            if self._block_matches(blocks[block_id], qualifiers) and
+            self._block_matches(blocks[block_id].fields, settings)
+        ]
+        if not content or not matches:
+            return matches
+
+        definitions = {
+            definition['_id']: definition
+            for definition in self.get_definitions(course_key, [blocks[block_id].definition for block_id in matches])
+        }
+        return [
+            block_id for block_id in matches
+            if blocks[block_id].definition in definitions and
+            self._block_matches(definitions[blocks[block_id].definition]['fields'], content)
+        ]
+
+    def _get_structure_index(self, course_key, structure):
+        """
+        Return the StructureIndex for ``structure``, which is cached for the rest of the request
+        unless the structure may still be changed by an active bulk operation.
+        """
+        if self.request_cache is None or self._get_bulk_ops_record(course_key).active:
+            return StructureIndex(structure)
+
+        indexes = self.request_cache.data.setdefault('structure_index_cache', {})
+        index = indexes.get(structure['_id'])
+        if index is None or index.blocks is not structure['blocks']:
+            index = indexes[structure['_id']] = StructureIndex(structure)
+        return index
+
     def get_parent_location(self, locator, **kwargs):
         """
         Return the location (Locators w/ block_ids) for the parent of this location in this
@@ -1126,7 +1167,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        index = self._get_structure_index(locator.course_key, course.structure)
+        parent_ids = index.parents(BlockKey.from_usage_key(locator))
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
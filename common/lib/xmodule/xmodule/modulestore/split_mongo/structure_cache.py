@@ -0,0 +1,214 @@
+"""
+Process level cache of split modulestore structures.
+
+Structure documents are immutable once written: every edit creates a new structure with a
+new ``_id`` (see :meth:`SplitMongoModuleStore.version_structure`). So a structure fetched by
+version guid can be kept for as long as memory allows and never needs invalidation.
+"""
+import copy
+import cPickle as pickle
+import logging
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+import dogstats_wrapper as dog_stats_api
+
+from xmodule.modulestore import BlockData
+
+
+log = logging.getLogger(__name__)
+
+METRIC_NAME = 'split_modulestore.structure_cache'
+
+
+class StructureCache(object):
+    """
+    A thread safe LRU cache of deserialized structures keyed by version guid, bounded by the
+    approximate memory size of the cached structures.
+
+    If ``cache`` (a django cache) is given, it is used as a second, shared tier holding the
+    compressed raw mongo documents so that a structure only needs fetching from mongo once
+    across all processes.
+
+    Reading a structure edits its blocks (e.g. ``cache_items`` merges the definition fields into
+    them and the descriptor system records subtree edit info), so the cache keeps its own copy
+    of each structure it's given and hands out copies of it.
+    """
+    def __init__(self, max_size, cache=None, timeout=None):
+        """
+        Arguments:
+            max_size (int): the maximum total size, in bytes, of the structures kept in
+                process. Structures bigger than this are never kept in process.
+            cache: an optional django cache used as the shared tier
+            timeout (int): the timeout for entries in the shared tier (default: the cache's own)
+        """
+        self.max_size = max_size
+        self.cache = cache
+        self.timeout = timeout
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """
+        Return a copy of the deserialized structure for ``key`` from the process tier, or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # re-insert to mark it as the most recently used
+                self._entries[key] = entry
+
+        self._record('hit' if entry is not None else 'miss', 'process')
+        return copy_structure(entry[0]) if entry is not None else None
+
+    def set(self, key, structure):
+        """
+        Add a copy of the deserialized ``structure`` to the process tier, evicting the least
+        recently used structures to keep within ``max_size``.
+        """
+        if structure is None:
+            return
+
+        structure = copy_structure(structure)
+        size = structure_size(structure)
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (structure, size)
+            self.size += size
+            evicted = 0
+            while self.size > self.max_size:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                evicted += 1
+
+        if evicted:
+            dog_stats_api.increment(METRIC_NAME + '.evictions', value=evicted)
+
+    def get_document(self, key):
+        """
+        Return the raw mongo document for ``key`` from the shared tier, or None.
+        """
+        if self.cache is None:
+            return None
+
+        document = None
+        try:
+            compressed = self.cache.get(self._cache_key(key))
+            if compressed is not None:
+                document = pickle.loads(zlib.decompress(compressed))
+        except Exception:  # pylint: disable=broad-except
+            # the shared tier is only an optimization, so fall back to mongo
+            log.exception("Unable to read structure %s from the shared cache", key)
+
+        self._record('hit' if document is not None else 'miss', 'shared')
+        return document
+
+    def set_document(self, key, document):
+        """
+        Add the raw mongo ``document`` to the shared tier. Must be called before the document is
+        deserialized, as ``structure_from_mongo`` converts it in place.
+        """
+        if self.cache is None or document is None:
+            return
+
+        try:
+            compressed = zlib.compress(pickle.dumps(document, pickle.HIGHEST_PROTOCOL))
+            self.cache.set(self._cache_key(key), compressed, self.timeout)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to write structure %s to the shared cache", key)
+
+    def clear(self):
+        """
+        Empty the process tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    @staticmethod
+    def _cache_key(key):
+        """
+        Return the shared tier key for the structure with version guid ``key``.
+        """
+        return u'split_structure.{}'.format(key)
+
+    @staticmethod
+    def _record(result, tier):
+        """
+        Record a cache hit or miss.
+        """
+        dog_stats_api.increment(METRIC_NAME, tags=[u'result:{}'.format(result), u'tier:{}'.format(tier)])
+
+
+def copy_structure(structure):
+    """
+    Return a copy of the deserialized ``structure`` whose blocks can be edited as reading a
+    structure does (updating their fields, edit info and definition_loaded) without affecting
+    ``structure``. Field values are shared, so edits that need to change those must still copy
+    the structure first (as ``version_structure`` does).
+    """
+    structure = structure.copy()
+    structure['blocks'] = {
+        block_key: copy_block(block) for block_key, block in structure['blocks'].iteritems()
+    }
+    return structure
+
+
+def copy_block(block):
+    """
+    Return a copy of the BlockData ``block`` with its own fields and edit info.
+    """
+    copied = BlockData.__new__(BlockData)
+    copied.fields = block.fields.copy()
+    copied.block_type = block.block_type
+    copied.definition = block.definition
+    copied.defaults = block.defaults
+    copied.definition_loaded = block.definition_loaded
+    # pylint: disable=protected-access
+    if block._edit_info is not None:
+        copied.edit_info = copy.copy(block._edit_info)
+    else:
+        # the raw edit info is only read to build the EditInfo, so it can be shared
+        copied._edit_info = None
+        copied._raw_edit_info = block._raw_edit_info
+    return copied
+
+
+def structure_size(structure):
+    """
+    Return the approximate size in bytes of the memory held by the deserialized ``structure``.
+    Objects shared within the structure (such as interned strings) are counted once.
+    """
+    size = 0
+    seen = set()
+    pending = [structure]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.iterkeys())
+            pending.extend(obj.itervalues())
+        elif isinstance(obj, (list, tuple)):
+            pending.extend(obj)
+        elif isinstance(obj, BlockData):
+            pending.extend(getattr(obj, name, None) for name in BlockData.__slots__)
+        elif hasattr(obj, '__dict__'):
+            pending.append(obj.__dict__)
+    return size
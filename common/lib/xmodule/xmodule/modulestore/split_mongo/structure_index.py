@@ -0,0 +1,133 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure.
+"""
+import re
+from collections import defaultdict
+
+
+class StructureIndex(object):
+    """
+    Lazily built lookups from block type, settings field values, and children to the keys of the
+    blocks of one structure, so that get_items and get_parent_location don't need to scan every
+    block.
+
+    The index is only valid for as long as the structure isn't edited, so it must not be kept for
+    a structure which is being changed by an active bulk operation.
+
+    Lookups return candidate block keys: callers still need to check each candidate against their
+    criteria (for instance, the candidates for a regex criteria are all of the blocks).
+    """
+    def __init__(self, structure):
+        self.blocks = structure['blocks']
+        self._by_type = None
+        self._by_field = {}
+
+    def candidates(self, qualifiers, settings):
+        """
+        Return the set of keys of the blocks which may match ``qualifiers`` (on the BlockData) and
+        ``settings`` (on the BlockData's fields), or None if any block may match.
+        """
+        candidates = None
+        for field_name, criteria in qualifiers.iteritems():
+            if field_name == 'block_type':
+                candidates = self._intersect(candidates, self._lookup(self.by_type, criteria))
+        for field_name, criteria in settings.iteritems():
+            if _indexable_values(criteria) is not None:
+                candidates = self._intersect(candidates, self._lookup(self.by_field(field_name), criteria))
+        return candidates
+
+    @property
+    def by_type(self):
+        """
+        Map of block_type to the keys of the blocks of that type.
+        """
+        if self._by_type is None:
+            self._by_type = defaultdict(set)
+            for block_key, block in self.blocks.iteritems():
+                self._by_type[block.block_type].add(block_key)
+        return self._by_type
+
+    def by_field(self, field_name):
+        """
+        Map of each (hashable) value of the settings field ``field_name`` to the keys of the blocks
+        with that value. Blocks with a list value are indexed under each of its elements (to match
+        the semantics of get_items). The keys of the blocks with unhashable values are under None.
+        """
+        index = self._by_field.get(field_name)
+        if index is None:
+            index = self._by_field[field_name] = defaultdict(set)
+            for block_key, block in self.blocks.iteritems():
+                if field_name in block.fields:
+                    for value in _flatten(block.fields[field_name]):
+                        try:
+                            index[value].add(block_key)
+                        except TypeError:
+                            index[None].add(block_key)
+        return index
+
+    def parents(self, block_key):
+        """
+        Return the keys of the blocks which have ``block_key`` as a child.
+        """
+        return list(self.by_field('children').get(block_key, ()))
+
+    @staticmethod
+    def _lookup(index, criteria):
+        """
+        Return the set of keys in ``index`` which may match ``criteria``, or None if any may.
+        """
+        values = _indexable_values(criteria)
+        if values is None:
+            return None
+        keys = set(index.get(None, ()))
+        for value in values:
+            keys.update(index.get(value, ()))
+        return keys
+
+    @staticmethod
+    def _intersect(candidates, keys):
+        """
+        Narrow ``candidates`` down to ``keys`` (where None means any block).
+        """
+        if keys is None:
+            return candidates
+        if candidates is None:
+            return keys
+        return candidates & keys
+
+
+def _flatten(value):
+    """
+    Yield the elements of (possibly nested) list ``value``, or ``value`` itself if it isn't a list.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for flattened in _flatten(element):
+                yield flattened
+    else:
+        yield value
+
+
+def _indexable_values(criteria):
+    """
+    Return the values which a field must equal to match ``criteria`` (as in
+    ``ModuleStoreRead._value_matches``), or None if ``criteria`` can't be looked up in an index
+    (regexes, functions, $nin, $exists, and unhashable values).
+    """
+    if isinstance(criteria, dict):
+        if criteria.keys() != ['$in']:
+            return None
+        values = []
+        for value in criteria['$in']:
+            value_values = _indexable_values(value)
+            if value_values is None:
+                return None
+            values.extend(value_values)
+        return values
+    if isinstance(criteria, re._pattern_type) or callable(criteria):  # pylint: disable=protected-access
+        return None
+    try:
+        hash(criteria)
+    except TypeError:
+        return None
+    return [criteria]
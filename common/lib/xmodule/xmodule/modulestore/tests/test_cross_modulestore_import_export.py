@@ -76,6 +76,28 @@ class MemoryCache(object):
         """
         self._data[key] = value
 
+    def add(self, key, value):
+        """
+        Set a key in the cache, unless it's already set.
+
+        Returns whether the key was set.
+        """
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    def incr(self, key):
+        """
+        Increment the value of a key in the cache, which must already be set.
+
+        Returns the new value.
+        """
+        if key not in self._data:
+            raise ValueError("Key '{}' not found".format(key))
+        self._data[key] += 1
+        return self._data[key]
+
 
 class MongoContentstoreBuilder(object):
     """
@@ -0,0 +1,58 @@
+"""
+Tests for the layered InheritedSettings mapping.
+"""
+import unittest
+from collections import Mapping
+
+from xmodule.modulestore.inheritance import InheritedSettings
+
+
+class TestInheritedSettings(unittest.TestCase):
+    """
+    Tests of InheritedSettings.
+    """
+    def setUp(self):
+        super(TestInheritedSettings, self).setUp()
+        self.course = InheritedSettings({'graded': False, 'max_attempts': 2})
+        self.chapter = self.course.new_child({'max_attempts': 3, 'due': '2015-01-01'})
+
+    def test_lookup(self):
+        self.assertEqual(self.chapter['max_attempts'], 3)
+        self.assertEqual(self.chapter['graded'], False)
+        self.assertEqual(self.chapter.get('showanswer', 'always'), 'always')
+        self.assertIn('due', self.chapter)
+        self.assertNotIn('due', self.course)
+        with self.assertRaises(KeyError):
+            self.course['due']  # pylint: disable=pointless-statement
+
+    def test_mapping(self):
+        self.assertEqual(sorted(self.chapter), ['due', 'graded', 'max_attempts'])
+        self.assertEqual(len(self.chapter), 3)
+        self.assertEqual(self.chapter, {'graded': False, 'max_attempts': 3, 'due': '2015-01-01'})
+
+    def test_is_compact(self):
+        self.assertIsInstance(self.chapter, Mapping)
+        self.assertFalse(hasattr(self.chapter, '__dict__'))
+
+    def test_copy(self):
+        copied = self.chapter.copy()
+        copied['max_attempts'] = 5
+        self.assertIsInstance(copied, dict)
+        self.assertEqual(self.chapter['max_attempts'], 3)
+
+    def test_generated_course(self):
+        # a course of 5000 leaves (50 chapters of 10 sequentials of 10 problems)
+        leaves = []
+        course = InheritedSettings({'graded': True, 'max_attempts': 1})
+        for chapter_index in range(50):
+            chapter = course.new_child({'due': 'chapter {}'.format(chapter_index)})
+            for sequential_index in range(10):
+                sequential = chapter.new_child({'max_attempts': sequential_index})
+                leaves.extend(sequential.new_child({'parent': sequential_index}) for __ in range(10))
+
+        self.assertEqual(len(leaves), 5000)
+        self.assertEqual(leaves[-1]['due'], 'chapter 49')
+        self.assertEqual(leaves[-1]['max_attempts'], 9)
+        self.assertEqual(leaves[0]['graded'], True)
+        # the leaves share their ancestors' settings rather than copying them
+        self.assertIs(leaves[0]._parent, leaves[9]._parent)  # pylint: disable=protected-access
@@ -39,7 +39,9 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, as_published
+from xmodule.modulestore.tests.factories import check_number_of_calls
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin
 from xmodule.modulestore.edit_info import EditInfoMixin
@@ -778,6 +780,71 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_incremental_inheritance_tree_refresh(self):
+        """
+        Editing a container's settings only recomputes the inherited metadata of its subtree
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        course = self.draft_store.create_course("TestX", "InheritanceTest", "2015", self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, 'sequential')
+        problem = self.draft_store.create_child(self.dummy_user, sequential.location, 'problem')
+        other_chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+        self.draft_store.refresh_cached_metadata_inheritance_tree(course.id)
+
+        chapter = self.draft_store.get_item(chapter.location)
+        chapter.max_attempts = 3
+        with check_number_of_calls(self.draft_store, '_compute_metadata_inheritance_tree', 0, 0):
+            self.draft_store.update_item(chapter, self.dummy_user)
+
+        metadata = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+        self.assertEqual(metadata[unicode(as_published(sequential.location))]['max_attempts'], 3)
+        self.assertEqual(metadata[unicode(as_published(problem.location))]['max_attempts'], 3)
+        self.assertEqual(
+            metadata[unicode(as_published(problem.location))]['parent'][ModuleStoreEnum.Branch.draft_preferred],
+            unicode(as_published(sequential.location))
+        )
+        self.assertNotIn('max_attempts', metadata[unicode(as_published(other_chapter.location))])
+        # the incrementally updated tree matches a full computation
+        self.draft_store.refresh_cached_metadata_inheritance_tree(course.id)
+        self.assertEqual(self.draft_store._get_cached_metadata_inheritance_tree(course.id), metadata)
+
+        # Clean up the data so we don't break other tests which apparently expect a particular state
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_concurrent_inheritance_tree_refresh(self):
+        """
+        A container edit counted by another process since the cached tree was computed makes the tree
+        be recomputed rather than patched or read
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        course = self.draft_store.create_course("TestX", "ConcurrentInheritanceTest", "2015", self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+        other_chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+        problem = self.draft_store.create_child(self.dummy_user, other_chapter.location, 'problem')
+        self.draft_store.refresh_cached_metadata_inheritance_tree(course.id)
+
+        # another process edits other_chapter and counts its edit, but hasn't cached its tree yet
+        self.draft_store.collection.update(
+            {'_id.category': 'chapter', '_id.name': other_chapter.location.name},
+            {'$set': {'metadata.max_attempts': 5}},
+            multi=True,
+        )
+        self.draft_store._inheritance_edit_version(course.id, count_edit=True)
+
+        chapter = self.draft_store.get_item(chapter.location)
+        chapter.max_attempts = 3
+        with check_number_of_calls(self.draft_store, '_compute_metadata_inheritance_tree', 1, 1):
+            self.draft_store.update_item(chapter, self.dummy_user)
+
+        metadata = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+        self.assertEqual(metadata[unicode(as_published(problem.location))]['max_attempts'], 5)
+
+        # Clean up the data so we don't break other tests which apparently expect a particular state
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
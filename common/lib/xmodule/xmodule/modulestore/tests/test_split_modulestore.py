@@ -9,7 +9,9 @@ import re
 import unittest
 import uuid
 
+from bson.objectid import ObjectId
 from contracts import contract
+from mock import patch
 from nose.plugins.attrib import attr
 
 from openedx.core.lib import tempdir
@@ -968,6 +970,30 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 6)
 
+    def test_get_definitions_in_batch(self):
+        '''
+        The definitions of the blocks loaded together are fetched in one query when the first is used
+        '''
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        chapters = modulestore().get_items(locator, qualifiers={'category': 'chapter'})
+        definition_ids = [chapter.definition_locator.definition_id for chapter in chapters]
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'get_definitions', wraps=db_connection.get_definitions) as get_definitions:
+            runtime = chapters[0].runtime
+            for definition_id in definition_ids:
+                self.assertEqual(runtime.get_definition(locator, definition_id)['_id'], definition_id)
+        self.assertEqual(get_definitions.call_count, 1)
+        self.assertTrue(set(definition_ids) <= set(get_definitions.call_args[0][0]))
+
+    def test_get_missing_definition(self):
+        '''
+        Fetching a definition that doesn't exist raises ItemNotFoundError
+        '''
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        runtime = modulestore().get_course(locator).runtime
+        with self.assertRaises(ItemNotFoundError):
+            runtime.get_definition(locator, ObjectId())
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
@@ -0,0 +1,201 @@
+"""
+Tests for the deserialization and process level cache of split modulestore structures.
+"""
+import copy
+import sys
+import unittest
+
+from bson.objectid import ObjectId
+from mock import MagicMock, patch
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, structure_from_mongo
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache, structure_size
+
+
+class DictCache(dict):
+    """
+    A minimal stand in for a django cache.
+    """
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        self[key] = value
+
+
+def _structure_document(structure_id):
+    """
+    Return a raw (as stored in mongo) structure document with a single block.
+    """
+    return {
+        '_id': structure_id,
+        'root': ['course', 'course'],
+        'blocks': [{
+            'block_type': 'course',
+            'block_id': 'course',
+            'definition': ObjectId(),
+            'fields': {'children': []},
+            'defaults': {},
+            'edit_info': {},
+        }],
+    }
+
+
+class TestStructureFromMongo(unittest.TestCase):
+    """
+    Tests of the compact BlockData built by structure_from_mongo.
+    """
+    def test_shared_strings(self):
+        def _document():
+            """
+            Return a structure document whose strings are distinct objects, as when read from mongo.
+            """
+            document = _structure_document(ObjectId())
+            block = document['blocks'][0]
+            block['block_type'] = u''.join(['cour', 'se'])
+            block['fields'] = {u''.join(['child', 'ren']): []}
+            return document
+
+        first = structure_from_mongo(_document())
+        second = structure_from_mongo(_document())
+        first_key, first_block = first['blocks'].items()[0]
+        second_key, second_block = second['blocks'].items()[0]
+
+        self.assertIs(first_key.type, second_key.type)
+        self.assertIs(first_block.block_type, second_block.block_type)
+        self.assertIs(first_block.fields.keys()[0], second_block.fields.keys()[0])
+
+    def test_lazy_edit_info(self):
+        document = _structure_document(ObjectId())
+        previous_version = ObjectId()
+        document['blocks'][0]['edit_info'] = {'previous_version': previous_version, 'edited_by': 'me'}
+        block = structure_from_mongo(document)['blocks'][BlockKey('course', 'course')]
+
+        copied = copy.deepcopy(block)
+        self.assertEqual(copied.edit_info.previous_version, previous_version)
+        self.assertEqual(block.edit_info.previous_version, previous_version)
+        self.assertIsNone(block.edit_info.update_version)
+        self.assertEqual(block.to_storable()['edit_info']['edited_by'], 'me')
+
+        block.edit_info.edited_by = 'you'
+        self.assertEqual(block.edit_info.edited_by, 'you')
+        self.assertEqual(copied.edit_info.edited_by, 'me')
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of StructureCache.
+    """
+    def setUp(self):
+        super(TestStructureCache, self).setUp()
+        self.structures = {key: structure_from_mongo(_structure_document(key)) for key in 'abcd'}
+        # every structure has the same shape, so they're all the same size
+        self.structure_size = structure_size(self.structures['a'])
+
+    def test_lru_eviction(self):
+        cache = StructureCache(3 * self.structure_size)
+        for key in 'abc':
+            cache.set(key, self.structures[key])
+        # touch 'a' so that 'b' is the least recently used
+        self.assertEqual(cache.get('a')['_id'], 'a')
+
+        cache.set('d', self.structures['d'])
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b'), None)
+        for key in ('a', 'c', 'd'):
+            self.assertIn(key, cache)
+        self.assertEqual(cache.size, 3 * self.structure_size)
+
+    def test_oversized_structure(self):
+        cache = StructureCache(self.structure_size)
+        cache.set('a', self.structures['a'])
+        big = structure_from_mongo(_structure_document('big'))
+        big['blocks'].values()[0].fields['data'] = u'x' * self.structure_size
+        cache.set('big', big)
+        self.assertNotIn('big', cache)
+        self.assertIn('a', cache)
+
+    def test_size_of_deserialized_structure(self):
+        structure = self.structures['a']
+        self.assertGreater(self.structure_size, sys.getsizeof(structure) + sys.getsizeof(structure['blocks']))
+
+        structure['blocks'].values()[0].fields['data'] = u'x' * 10000
+        self.assertGreater(structure_size(structure), self.structure_size + 10000)
+
+    def test_replace(self):
+        cache = StructureCache(3 * self.structure_size)
+        cache.set('a', self.structures['a'])
+        cache.set('a', self.structures['a'])
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, self.structure_size)
+
+    def test_copies(self):
+        cache = StructureCache(3 * self.structure_size)
+        structure = self.structures['a']
+        cache.set('a', structure)
+
+        # edit the structure's blocks as reading them does
+        for edited in (structure, cache.get('a')):
+            block = edited['blocks'][BlockKey('course', 'course')]
+            block.fields.update({'display_name': 'Edited'})
+            block.definition_loaded = True
+            block.edit_info._subtree_edited_on = 'now'  # pylint: disable=protected-access
+
+        block = cache.get('a')['blocks'][BlockKey('course', 'course')]
+        self.assertEqual(block.fields, {'children': []})
+        self.assertFalse(block.definition_loaded)
+        self.assertIsNone(block.edit_info._subtree_edited_on)  # pylint: disable=protected-access
+        self.assertIsNot(cache.get('a')['blocks'], cache.get('a')['blocks'])
+
+    def test_shared_tier(self):
+        shared = DictCache()
+        document = _structure_document(ObjectId())
+        StructureCache(0, cache=shared).set_document(document['_id'], document)
+
+        self.assertEqual(StructureCache(0, cache=shared).get_document(document['_id']), document)
+        self.assertIsNone(StructureCache(0, cache=shared).get_document(ObjectId()))
+        self.assertIsNone(StructureCache(0).get_document(document['_id']))
+
+
+class TestMongoConnectionStructureCache(unittest.TestCase):
+    """
+    Tests that MongoConnection reads structures through its StructureCache.
+    """
+    def setUp(self):
+        super(TestMongoConnectionStructureCache, self).setUp()
+        self.shared = DictCache()
+        self.connection = self._connection(StructureCache(1024 * 1024, cache=self.shared))
+
+    def _connection(self, structure_cache):
+        """
+        Return a MongoConnection with a mocked out database.
+        """
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.pymongo'):
+            with patch('xmodule.modulestore.split_mongo.mongo_connection.MongoProxy', return_value=MagicMock()):
+                connection = MongoConnection('db', 'collection', 'host', structure_cache=structure_cache)
+        connection.structures = MagicMock()
+        return connection
+
+    def test_get_structure(self):
+        structure_id = ObjectId()
+        self.connection.structures.find_one.side_effect = lambda query: _structure_document(structure_id)
+
+        structure = self.connection.get_structure(structure_id)
+        self.assertEqual(structure['root'], BlockKey('course', 'course'))
+        self.assertEqual(self.connection.get_structure(structure_id)['_id'], structure_id)
+        self.assertEqual(self.connection.structures.find_one.call_count, 1)
+
+        # another process finds the structure in the shared tier
+        other_connection = self._connection(StructureCache(1024 * 1024, cache=self.shared))
+        other_structure = other_connection.get_structure(structure_id)
+        self.assertEqual(other_structure['root'], BlockKey('course', 'course'))
+        self.assertFalse(other_connection.structures.find_one.called)
+
+    def test_find_structures_by_id(self):
+        cached_id, missing_id = ObjectId(), ObjectId()
+        self.connection.structures.find_one.return_value = _structure_document(cached_id)
+        self.connection.get_structure(cached_id)
+
+        self.connection.structures.find.return_value = [_structure_document(missing_id)]
+        structures = self.connection.find_structures_by_id([cached_id, missing_id])
+        self.connection.structures.find.assert_called_once_with({'_id': {'$in': [missing_id]}})
+        self.assertItemsEqual([structure['_id'] for structure in structures], [cached_id, missing_id])
+        self.assertIn(missing_id, self.connection.structure_cache)
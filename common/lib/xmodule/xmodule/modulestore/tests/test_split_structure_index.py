@@ -0,0 +1,59 @@
+"""
+Tests for the secondary indexes over split modulestore structures.
+"""
+import re
+import unittest
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
+
+
+COURSE = BlockKey('course', 'course')
+CHAPTER = BlockKey('chapter', 'chapter')
+PROBLEM_1 = BlockKey('problem', 'problem_1')
+PROBLEM_2 = BlockKey('problem', 'problem_2')
+
+
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests of StructureIndex.
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        blocks = {
+            COURSE: BlockData(block_type='course', fields={'children': [CHAPTER]}),
+            CHAPTER: BlockData(block_type='chapter', fields={'children': [PROBLEM_1, PROBLEM_2]}),
+            PROBLEM_1: BlockData(block_type='problem', fields={'weight': 1, 'group_access': {1: [2]}}),
+            PROBLEM_2: BlockData(block_type='problem', fields={'weight': 2, 'tags': ['a', ['b']]}),
+        }
+        self.index = StructureIndex({'root': COURSE, 'blocks': blocks})
+
+    def test_block_type(self):
+        self.assertEqual(self.index.candidates({'block_type': 'problem'}, {}), {PROBLEM_1, PROBLEM_2})
+        self.assertEqual(self.index.candidates({'block_type': 'garbage'}, {}), set())
+        self.assertEqual(
+            self.index.candidates({'block_type': {'$in': ['course', 'chapter']}}, {}),
+            {COURSE, CHAPTER}
+        )
+
+    def test_settings(self):
+        self.assertEqual(self.index.candidates({'block_type': 'problem'}, {'weight': 2}), {PROBLEM_2})
+        self.assertEqual(self.index.candidates({}, {'tags': 'b'}), {PROBLEM_2})
+        # unhashable values are always candidates
+        self.assertEqual(self.index.candidates({}, {'group_access': 'x'}), {PROBLEM_1})
+
+    def test_unindexable_criteria(self):
+        self.assertIsNone(self.index.candidates({}, {}))
+        self.assertIsNone(self.index.candidates({'block_type': re.compile('prob')}, {}))
+        self.assertIsNone(self.index.candidates({}, {'weight': lambda weight: weight > 1}))
+        self.assertIsNone(self.index.candidates({}, {'group_access': {'$exists': True}}))
+        self.assertEqual(
+            self.index.candidates({'block_type': 'problem'}, {'weight': {'$nin': [1]}}),
+            {PROBLEM_1, PROBLEM_2}
+        )
+
+    def test_parents(self):
+        self.assertEqual(self.index.parents(PROBLEM_1), [CHAPTER])
+        self.assertEqual(self.index.parents(CHAPTER), [COURSE])
+        self.assertEqual(self.index.parents(COURSE), [])
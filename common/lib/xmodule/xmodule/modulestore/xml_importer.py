@@ -22,12 +22,17 @@ Modulestore virtual   |          XML physical (draft, published)
 """
 import logging
 from abc import abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+import itertools
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
 from path import path
 import json
 import re
+import time
 from lxml import etree
 
 from xmodule.modulestore.xml import XMLModuleStore, LibraryXMLModuleStore, ImportSystem
@@ -53,10 +58,87 @@ from xmodule.modulestore.tests.utils import LocationMixin
 log = logging.getLogger(__name__)
 
 
+# Static files bigger than this are streamed into the content store, in chunks
+# of STATIC_CONTENT_CHUNK_SIZE bytes, rather than read into memory first.
+STATIC_CONTENT_STREAM_THRESHOLD = 4 * 1024 * 1024
+STATIC_CONTENT_CHUNK_SIZE = 1024 * 1024
+
+# How often import_static_content logs its progress, in files.
+STATIC_CONTENT_PROGRESS_INTERVAL = 500
+
+
+def _read_in_chunks(content_path):
+    """
+    Yields the contents of the file at `content_path`, a chunk at a time.
+    """
+    with open(content_path, 'rb') as content_file:
+        while True:
+            chunk = content_file.read(STATIC_CONTENT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _import_static_file(
+        static_content_store, content_path, asset_key, displayname, mime_type,
+        fullname_with_subpath, locked):
+    """
+    Saves the static file at `content_path`, and its thumbnail, in the content store.
+
+    Returns the size of the file, or None if it was skipped.
+    """
+    try:
+        size = os.path.getsize(content_path)
+        if size > STATIC_CONTENT_STREAM_THRESHOLD:
+            data = _read_in_chunks(content_path)
+            tempfile_path = content_path
+        else:
+            with open(content_path, 'rb') as f:
+                data = f.read()
+            tempfile_path = None
+    except (IOError, OSError):
+        if os.path.basename(content_path).startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=fullname_with_subpath, locked=locked
+    )
+
+    # first let's save a thumbnail so we can get back a thumbnail location
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+        content, tempfile_path=tempfile_path
+    )
+
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
+
+    # then commit the content
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception(u'Error importing {0}, error={1}'.format(
+            fullname_with_subpath, err
+        ))
+
+    return size
+
+
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
+        target_id, subpath='static', verbose=False, workers=1):
+    """
+    Imports the static files under `course_data_path / subpath` into
+    `static_content_store`, and returns a dict mapping their paths to their
+    asset keys.
 
+    The files are saved by a pool of `workers` threads.  Files whose names map
+    to the same asset key are saved by one thread, in the order they're found.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -64,7 +146,7 @@ def import_static_content(
     try:
         with open(course_data_path / 'policies/assets.json') as f:
             policy = json.load(f)
-    except (IOError, ValueError) as err:
+    except (IOError, ValueError):
         # xml backed courses won't have this file, only exported courses;
         # so, its absence is not really an exception.
         policy = {}
@@ -75,6 +157,7 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    files_by_asset_key = OrderedDict()
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -85,20 +168,6 @@ def import_static_content(
                     log.debug('skipping static content %s...', content_path)
                 continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
-
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
             # strip away leading path from the name
             fullname_with_subpath = content_path.replace(static_dir, '')
             if fullname_with_subpath.startswith('/'):
@@ -113,29 +182,55 @@ def import_static_content(
             # Check extracted contentType in list of all valid mimetypes
             if not mime_type or mime_type not in mimetypes_list:
                 mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
-
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
-
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
-
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+            files_by_asset_key.setdefault(asset_key, []).append(
+                (content_path, asset_key, displayname, mime_type, fullname_with_subpath, locked)
+            )
 
+    def import_files(files):
+        """
+        Imports `files`, and returns the paths and sizes of the ones that weren't skipped.
+        """
+        imported = []
+        for static_file in files:
+            if verbose:
+                log.debug('importing static content %s...', static_file[0])
+            size = _import_static_file(static_content_store, *static_file)
+            if size is not None:
+                imported.append((static_file[4], static_file[1], size))
+        return imported
+
+    start = time.time()
+    file_count = sum(len(files) for files in files_by_asset_key.itervalues())
+    imported_count = 0
+    imported_size = 0
+    pool = ThreadPool(workers) if workers > 1 else None
+    try:
+        if pool is not None:
+            results = pool.imap_unordered(import_files, files_by_asset_key.values())
+        else:
+            results = itertools.imap(import_files, files_by_asset_key.values())
+        for imported in results:
+            for fullname_with_subpath, asset_key, size in imported:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[fullname_with_subpath] = asset_key
+                imported_size += size
+                imported_count += 1
+                if imported_count % STATIC_CONTENT_PROGRESS_INTERVAL == 0:
+                    log.info(
+                        u'Imported %d of %d static files from %s',
+                        imported_count, file_count, static_dir
+                    )
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    log.info(
+        u'Imported %d static files (%d bytes) from %s in %.1fs',
+        imported_count, imported_size, static_dir, time.time() - start
+    )
     return remap_dict
 
 
@@ -171,6 +266,10 @@ class ImportManager(object):
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_import_workers: the number of threads that save static files into static_content_store.
+
+    The time each phase of each import takes is logged, and kept in `import_times`.
     """
     store_class = XMLModuleStore
 
@@ -180,7 +279,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, static_import_workers=4
     ):
         self.store = store
         self.user_id = user_id
@@ -193,6 +292,9 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.static_import_workers = static_import_workers
+        # Maps each courselike key to an OrderedDict of the seconds each phase of its import took.
+        self.import_times = {}
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -221,7 +323,8 @@ class ImportManager(object):
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose,
+                workers=self.static_import_workers
             )
 
         elif self.verbose and not self.do_import_static:
@@ -244,7 +347,8 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose,
+                workers=self.static_import_workers
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -416,6 +520,17 @@ class ImportManager(object):
                 runtime=courselike.runtime,
             )
 
+    @contextmanager
+    def timed_phase(self, courselike_key, phase):
+        """
+        Records, in `import_times`, how long the code in the with block takes to import `phase` of a courselike.
+        """
+        start = time.time()
+        yield
+        elapsed = time.time() - start
+        self.import_times.setdefault(courselike_key, OrderedDict())[phase] = elapsed
+        log.info(u'Imported %s of %s in %.1fs', phase, courselike_key, elapsed)
+
     def run_imports(self):
         """
         Iterate over the given directories and yield courses.
@@ -428,27 +543,35 @@ class ImportManager(object):
                 continue
 
             # This bulk operation wraps all the operations to populate the published branch.
-            with self.store.bulk_operations(dest_id):
-                # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
+            with self.timed_phase(courselike_key, 'published branch'):
+                with self.store.bulk_operations(dest_id):
+                    # Retrieve the course itself.
+                    with self.timed_phase(courselike_key, 'course'):
+                        source_courselike, courselike, data_path = self.get_courselike(
+                            courselike_key, runtime, dest_id
+                        )
 
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                    # Import all static pieces.
+                    with self.timed_phase(courselike_key, 'static content'):
+                        self.import_static(data_path, dest_id)
 
-                # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                    # Import asset metadata stored in XML.
+                    with self.timed_phase(courselike_key, 'asset metadata'):
+                        self.import_asset_metadata(data_path, dest_id)
 
-                # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                    # Import all children
+                    with self.timed_phase(courselike_key, 'children'):
+                        self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
-            with self.store.bulk_operations(dest_id):
-                # Import all draft items into the courselike.
-                courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+            with self.timed_phase(courselike_key, 'draft branch'):
+                with self.store.bulk_operations(dest_id):
+                    # Import all draft items into the courselike.
+                    courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
             yield courselike
 
@@ -2,7 +2,7 @@
 Tests that check that we ignore the appropriate files when importing courses.
 """
 import unittest
-from mock import Mock
+from mock import Mock, patch
 from xmodule.modulestore.xml_importer import import_static_content
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -39,3 +39,42 @@ class IgnoredFilesTestCase(unittest.TestCase):
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+
+class StaticContentImportTestCase(unittest.TestCase):
+    "Tests for saving static content"
+    def test_import_with_workers(self):
+        course_dir = DATA_DIR / "dot-underscore"
+        course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = (None, "location")
+        remap_dict = import_static_content(course_dir, content_store, course_id, workers=4)
+        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        self.assertItemsEqual(
+            [sc.name for sc in saved_static_content],
+            ["example.txt", ".example.txt"]
+        )
+        self.assertEqual(
+            remap_dict,
+            {sc.import_path: sc.location for sc in saved_static_content}
+        )
+
+    @patch('xmodule.modulestore.xml_importer.STATIC_CONTENT_STREAM_THRESHOLD', 1)
+    @patch('xmodule.modulestore.xml_importer.STATIC_CONTENT_CHUNK_SIZE', 2)
+    def test_stream_large_files(self):
+        course_dir = DATA_DIR / "tilde"
+        course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = (None, "location")
+        # Files bigger than the threshold are saved a chunk at a time, and
+        # their thumbnails are made from the file
+        content_store.save.side_effect = lambda content: setattr(content, 'saved_data', list(content.data))
+        import_static_content(course_dir, content_store, course_id)
+        content = content_store.save.call_args[0][0]
+        self.assertEqual(content.name, "example.txt")
+        self.assertTrue(all(len(chunk) <= 2 for chunk in content.saved_data))
+        self.assertIn("GREEN", "".join(content.saved_data))
+        self.assertEqual(
+            content_store.generate_thumbnail.call_args[1],
+            {'tempfile_path': course_dir / "static" / "example.txt"}
+        )
@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -194,21 +197,7 @@ class CourseEmailTemplate(models.Model):
         Such encoding is left to the email code, which will use the value
         of settings.DEFAULT_CHARSET to encode the message.
         """
-
-        # Substitute all %%-encoded keywords in the message body
-        if 'user_id' in context and 'course_id' in context:
-            message_body = substitute_keywords_with_data(message_body, context)
-
-        result = format_string.format(**context)
-
-        # Note that the body tag in the template will now have been
-        # "formatted", so we need to do the same to the tag being
-        # searched for.
-        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
-        result = result.replace(message_body_tag, message_body, 1)
-
-        # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
-        return wrap_message(result)
+        return CompiledEmailTemplate(format_string, {}).render(message_body, context)
 
     def render_plaintext(self, plaintext, context):
         """
@@ -228,6 +217,79 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, shared_context):
+        """
+        Prepare the stored plain template for rendering to many recipients.
+
+        `shared_context` holds the values that are the same for every recipient.
+        """
+        return CompiledEmailTemplate(self.plain_template, shared_context)
+
+    def compile_htmltext(self, shared_context):
+        """
+        Prepare the stored HTML template for rendering to many recipients.
+
+        `shared_context` holds the values that are the same for every recipient.
+        """
+        return CompiledEmailTemplate(self.html_template, shared_context)
+
+
+class CompiledEmailTemplate(object):
+    """
+    A CourseEmailTemplate format string that has been parsed once.
+
+    Fields whose values come from the shared context are filled in when the
+    template is compiled.  Only the remaining fields (e.g. the recipient's
+    name and email) are formatted by render(), so sending the same email to
+    many recipients doesn't reparse and reformat the whole template each time.
+    """
+    def __init__(self, format_string, shared_context):
+        self._pieces = []
+        static_text = []
+        for literal_text, field_name, format_spec, conversion in Formatter().parse(format_string):
+            static_text.append(literal_text)
+            if field_name is None:
+                continue
+            field = u'{' + field_name
+            if conversion:
+                field += u'!' + conversion
+            if format_spec:
+                field += u':' + format_spec
+            field += u'}'
+            # The root of "a.b" or "a[0]" is "a".
+            if re.match(r'[^.[]*', field_name).group(0) in shared_context:
+                static_text.append(field.format(**shared_context))
+            else:
+                self._pieces.append((u''.join(static_text), False))
+                self._pieces.append((field, True))
+                static_text = []
+        self._pieces.append((u''.join(static_text), False))
+
+    def render(self, message_body, context):
+        """
+        Create a text message for one recipient.
+
+        `context` must supply the fields that were not in the shared context.
+        Rendering is otherwise the same as in CourseEmailTemplate._render().
+        """
+        # Substitute all %%-encoded keywords in the message body
+        if 'user_id' in context and 'course_id' in context:
+            message_body = substitute_keywords_with_data(message_body, context)
+
+        result = u''.join(
+            piece.format(**context) if is_field else piece
+            for piece, is_field in self._pieces
+        )
+
+        # Note that the body tag in the template will now have been
+        # "formatted", so we need to do the same to the tag being
+        # searched for.
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        result = result.replace(message_body_tag, message_body, 1)
+
+        # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
+        return wrap_message(result)
+
 
 class CourseAuthorization(models.Model):
     """
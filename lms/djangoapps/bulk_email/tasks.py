@@ -5,8 +5,10 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+import threading
+from time import sleep, time
 from collections import Counter
+from multiprocessing.pool import ThreadPool
 import logging
 
 import dogstats_wrapper as dog_stats_api
@@ -372,16 +374,17 @@ def _filter_optouts_from_recipients(to_list, course_id):
     Returns the filtered recipient list, as well as the number of optouts
     removed from the list.
     """
-    optouts = Optout.objects.filter(
+    # Match on user ids, so that the Optout table doesn't need to be joined
+    # with the User table to get email addresses.
+    optouts = set(Optout.objects.filter(
         course_id=course_id,
         user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
-    optouts = set(optouts)
+    ).values_list('user_id', flat=True))
     # Only count the num_optout for the first time the optouts are calculated.
     # We assume that the number will not change on retries, and so we don't need
     # to calculate it each time.
     num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
+    to_list = [recipient for recipient in to_list if recipient['pk'] not in optouts]
     return to_list, num_optout
 
 
@@ -407,6 +410,75 @@ def _get_source_address(course_id, course_title):
     return from_addr
 
 
+class _SMTPConnectionPool(object):
+    """
+    The SMTP connections that a send_course_email subtask sends through.
+
+    The connections are opened once and used for every message the subtask
+    sends.  With more than one connection, messages are sent in parallel,
+    one per connection.  If `max_per_second` is set, sends are spaced out
+    so that no more than that many messages are sent per second.
+    """
+    def __init__(self, size, max_per_second=None, stats_tags=None):
+        self.size = max(1, size)
+        self._min_interval = 1.0 / max_per_second if max_per_second else 0
+        self._next_send_time = 0
+        self._lock = threading.Lock()
+        self._stats_tags = stats_tags
+        self._connections = []
+        self._threads = None
+
+    def open(self):
+        """Opens the connections."""
+        for __ in range(self.size):
+            connection = get_connection()
+            self._connections.append(connection)
+            connection.open()
+        if self.size > 1:
+            self._threads = ThreadPool(self.size)
+
+    def close(self):
+        """Closes the connections."""
+        for connection in self._connections:
+            connection.close()
+        if self._threads is not None:
+            self._threads.terminate()
+
+    def send(self, messages):
+        """
+        Sends each of `messages`, of which there must be no more than `size`.
+
+        Returns a list with an entry for each message: None if it was sent,
+        or else the exception that sending it raised.
+        """
+        jobs = zip(self._connections, messages)
+        if self._threads is None:
+            return [self._send(job) for job in jobs]
+        return self._threads.map(self._send, jobs)
+
+    def _send(self, job):
+        """Sends one message over one connection, returning any exception raised."""
+        connection, message = job
+        self._wait_for_rate_limit()
+        try:
+            with dog_stats_api.timer('course_email.single_send.time.overall', tags=self._stats_tags):
+                connection.send_messages([message])
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc
+        return None
+
+    def _wait_for_rate_limit(self):
+        """Sleeps until this send is allowed by `max_per_second`."""
+        if not self._min_interval:
+            return
+        with self._lock:
+            now = time()
+            send_time = max(now, self._next_send_time)
+            self._next_send_time = send_time + self._min_interval
+        if send_time > now:
+            sleep(send_time - now)
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -480,53 +552,66 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     from_addr = course_email.from_addr if course_email.from_addr else \
         _get_source_address(course_email.course_id, course_title)
 
-    # use the CourseEmailTemplate that was associated with the CourseEmail
+    # use the CourseEmailTemplate that was associated with the CourseEmail.
+    # The parts of it that are the same for every recipient are rendered once, here.
     course_email_template = course_email.get_template()
+    plaintext_template = course_email_template.compile_plaintext(global_email_context)
+    html_template = course_email_template.compile_htmltext(global_email_context)
+
+    pool = _SMTPConnectionPool(
+        settings.BULK_EMAIL_SMTP_CONNECTIONS,
+        settings.BULK_EMAIL_MAX_SENDS_PER_SECOND,
+        stats_tags=[_statsd_tag(course_title)],
+    )
+    start_time = time()
     try:
-        connection = get_connection()
-        connection.open()
+        pool.open()
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Send to the users at the end of the list, one per connection.
+            # At the end of processing these users, they will be removed from the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
+            batch = list(reversed(to_list[-pool.size:]))
+            batch_recipient_nums = []
+            email_msgs = []
+            for current_recipient in batch:
+                recipient_num += 1
+                batch_recipient_nums.append(recipient_num)
+                email = current_recipient['email']
+                # Update context with user-specific values from the user.
+                email_context['email'] = email
+                email_context['name'] = current_recipient['profile__name']
+                email_context['user_id'] = current_recipient['pk']
+                email_context['course_id'] = course_email.course_id
+
+                # Construct message content using templates and context:
+                plaintext_msg = plaintext_template.render(course_email.text_message, email_context)
+                html_msg = html_template.render(course_email.html_message, email_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
+                email_msgs.append(email_msg)
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+                # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+                # but if a task has been retried for rate-limiting reasons, then we sleep
+                # for a period of time between all emails within this task.  Choice of
+                # the value depends on the number of workers that might be sending email in
+                # parallel, and what the SES throttle rate is.
+                if subtask_status.retried_nomax > 0:
+                    sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
 
-            try:
                 log.info(
                     "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
@@ -538,83 +623,120 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     current_recipient['profile__name'],
                     email
                 )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+
+            send_results = pool.send(email_msgs)
+
+            # The first error that should stop this task.  It is raised once the
+            # rest of the batch has been processed, so that the recipients that
+            # were sent to are not sent to again when the task is retried.
+            batch_exception = None
+            processed = []
+            for current_recipient, current_recipient_num, send_exception in zip(
+                    batch, batch_recipient_nums, send_results
+            ):
+                email = current_recipient['email']
+                try:
+                    if send_exception is not None:
+                        raise send_exception  # pylint: disable=raising-bad-type
+
+                except SMTPDataError as exc:
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        current_recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        batch_exception = batch_exception or exc
+                        processed.append(False)
+                        continue
+                    else:
+                        # This will fall through and not retry the message.
+                        log.warning(
+                            'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                            Email not delivered to %s due to error %s',
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            current_recipient_num,
+                            total_recipients,
+                            email,
+                            exc.smtp_error
+                        )
+                        dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                        subtask_status.increment(failed=1)
+
+                except SINGLE_EMAIL_FAILURE_ERRORS as exc:
                     # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                        EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
                         parent_task_id,
                         task_id,
                         email_id,
-                        recipient_num,
+                        current_recipient_num,
                         total_recipients,
                         email,
-                        exc.smtp_error
+                        exc
                     )
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                except Exception as exc:  # pylint: disable=broad-except
+                    # This will be handled by the outer handler, and the recipient left on the list.
+                    batch_exception = batch_exception or exc
+                    processed.append(False)
+                    continue
 
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    total_recipients_successful += 1
+                    log.info(
+                        "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s,",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        current_recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
+
+                recipients_info[email] += 1
+                processed.append(True)
 
-            # Pop the user that was emailed off the end of the list only once they have
+            # Remove the users that were emailed from the end of the list only once they have
             # successfully been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+            to_list[len(to_list) - len(batch):] = [
+                recipient for recipient, was_processed in reversed(zip(batch, processed)) if not was_processed
+            ]
+            if batch_exception is not None:
+                raise batch_exception  # pylint: disable=raising-bad-type
 
+        elapsed = time() - start_time
+        log.info(
+            "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Sent %s emails in %.2f seconds (%.1f per second)",
+            parent_task_id,
+            task_id,
+            email_id,
+            total_recipients_successful,
+            elapsed,
+            total_recipients_successful / elapsed if elapsed else 0.0,
+        )
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
             Failed Recipients: %s/%s",
@@ -692,7 +814,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        pool.close()
 
 
 def _get_current_task():
@@ -127,6 +127,20 @@ class CourseEmailTemplateTest(TestCase):
             with self.assertRaises(KeyError):
                 template.render_plaintext("My new plain text.", context)
 
+    def test_render_compiled(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        shared_context = dict(context)
+        del shared_context['email']
+        self.assertEquals(
+            template.compile_htmltext(shared_context).render("My new html text.", context),
+            template.render_htmltext("My new html text.", context)
+        )
+        self.assertEquals(
+            template.compile_plaintext(shared_context).render("My new plain text.", context),
+            template.render_plaintext("My new plain text.", context)
+        )
+
     def test_render_html(self):
         template = CourseEmailTemplate.get_template()
         context = self._get_sample_html_context()
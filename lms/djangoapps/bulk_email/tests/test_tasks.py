@@ -28,6 +28,7 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
 
@@ -237,6 +238,23 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, expected_succeeds, skipped=expected_skipped)
 
+    @override_settings(BULK_EMAIL_SMTP_CONNECTIONS=4, BULK_EMAIL_MAX_SENDS_PER_SECOND=1000)
+    def test_successful_with_connection_pool(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(get_conn.call_count, 4)
+        self.assertEquals(get_conn.return_value.send_messages.call_count, num_emails)
+
+    @override_settings(BULK_EMAIL_SMTP_CONNECTIONS=4)
+    def test_smtp_blacklisted_user_with_connection_pool(self):
+        # Failures within a batch of parallel sends are counted as with a single connection.
+        self._test_email_address_failures(SMTPDataError(554, "Email address is blacklisted"))
+
     def _test_email_address_failures(self, exception):
         """Test that celery handles bad address errors by failing and not retrying."""
         # Select number of emails to fit into a single subtask.
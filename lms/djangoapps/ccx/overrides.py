@@ -5,14 +5,22 @@ by the individual custom courses feature.
 import json
 import threading
 
+from collections import defaultdict
 from contextlib import contextmanager
 
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
 
+from capa.safe_exec.safe_exec import LRUCache
 from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
 from ccx import ACTIVE_CCX_KEY  # pylint: disable=import-error
 
-from .models import CcxMembership, CcxFieldOverride
+from .models import CcxMembership, CcxFieldOverride, CustomCourseForEdX, new_overrides_version
+
+
+# ccx id -> (overrides_version, overrides) of the overrides last loaded by the
+# process, for the most recently used CCXs
+_OVERRIDES_CACHE = LRUCache(max_size=float('inf'), max_count=1000)
 
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
@@ -81,30 +89,92 @@ def get_override_for_ccx(ccx, block, name, default=None):
     """
     if not hasattr(block, '_ccx_overrides'):
         block._ccx_overrides = {}  # pylint: disable=protected-access
-    overrides = block._ccx_overrides.get(ccx.id)  # pylint: disable=protected-access
+    key = (ccx.id, ccx.overrides_version)
+    overrides = block._ccx_overrides.get(key)  # pylint: disable=protected-access
     if overrides is None:
-        overrides = _get_overrides_for_ccx(ccx, block)
-        block._ccx_overrides[ccx.id] = overrides  # pylint: disable=protected-access
+        overrides = _get_overrides_for_block(ccx, block)
+        block._ccx_overrides[key] = overrides  # pylint: disable=protected-access
     return overrides.get(name, default)
 
 
-def _get_overrides_for_ccx(ccx, block):
+def _get_overrides_for_block(ccx, block):
     """
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
     """
     overrides = {}
-    query = CcxFieldOverride.objects.filter(
-        ccx=ccx,
-        location=block.location
-    )
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, value in _get_overrides_for_ccx(ccx).get(block.location, {}).iteritems():
+        overrides[name] = block.fields[name].from_json(value)
     return overrides
 
 
+def _get_overrides_for_ccx(ccx):
+    """
+    Returns a dictionary mapping the location of each block with overrides in
+    this CCX to a dictionary of its overridden fields' (json) values.
+
+    All of the overrides of a CCX are loaded with a single query, and cached
+    for the current version of the CCX's overrides (which is read along with
+    the CCX) on the CCX, in the process, and in the django cache.
+    """
+    overrides = getattr(ccx, '_field_overrides', None)
+    if overrides is not None:
+        return overrides
+
+    cached = _OVERRIDES_CACHE.get(ccx.id)
+    if cached is not None and cached[0] == ccx.overrides_version:
+        overrides = cached[1]
+    else:
+        cache_key = u'ccx.field_overrides.{}.{}'.format(ccx.id, ccx.overrides_version)
+        overrides = cache.get(cache_key)
+        if overrides is None:
+            overrides = defaultdict(dict)
+            for override in CcxFieldOverride.objects.filter(ccx=ccx):
+                location = override.location.map_into_course(ccx.course_id)
+                overrides[location][override.field] = json.loads(override.value)
+            overrides = dict(overrides)
+            cache.set(cache_key, overrides)
+        _OVERRIDES_CACHE.set(ccx.id, (ccx.overrides_version, overrides), 1)
+
+    ccx._field_overrides = overrides  # pylint: disable=protected-access
+    return overrides
+
+
+def _overrides_changed(ccx):
+    """
+    Invalidates the cached overrides of the `ccx`, after its overrides have
+    been changed, by changing the version of its overrides.
+
+    Within `bulk_overrides`, the new version is only saved once all of the
+    changes have been made.
+    """
+    ccx.overrides_version = new_overrides_version()
+    ccx._field_overrides = None  # pylint: disable=protected-access
+    if not getattr(ccx, '_overrides_bulk_depth', 0):
+        CustomCourseForEdX.objects.filter(id=ccx.id).update(overrides_version=ccx.overrides_version)
+    else:
+        ccx._overrides_bulk_changed = True  # pylint: disable=protected-access
+
+
+@contextmanager
+def bulk_overrides(ccx):
+    """
+    A context manager for making many changes to the overrides of the `ccx`
+    (e.g. saving its schedule), which saves the new version of its overrides
+    once, on exit, rather than after each change. Other processes keep using
+    the previous overrides until then.
+    """
+    # pylint: disable=protected-access
+    ccx._overrides_bulk_depth = getattr(ccx, '_overrides_bulk_depth', 0) + 1
+    try:
+        yield
+    finally:
+        ccx._overrides_bulk_depth -= 1
+        if not ccx._overrides_bulk_depth and getattr(ccx, '_overrides_bulk_changed', False):
+            ccx._overrides_bulk_changed = False
+            CustomCourseForEdX.objects.filter(id=ccx.id).update(overrides_version=ccx.overrides_version)
+
+
 @transaction.commit_on_success
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -115,7 +185,7 @@ def override_field_for_ccx(ccx, block, name, value):
     field = block.fields[name]
     value = json.dumps(field.to_json(value))
     try:
-        override = CcxFieldOverride.objects.create(
+        CcxFieldOverride.objects.create(
             ccx=ccx,
             location=block.location,
             field=name,
@@ -127,9 +197,8 @@ def override_field_for_ccx(ccx, block, name, value):
             location=block.location,
             field=name)
         override.value = value
-    override.save()
-    if hasattr(block, '_ccx_overrides'):
-        del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
+        override.save()
+    _overrides_changed(ccx)
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -145,8 +214,7 @@ def clear_override_for_ccx(ccx, block, name):
             location=block.location,
             field=name).delete()
 
-        if hasattr(block, '_ccx_overrides'):
-            del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
+        _overrides_changed(ccx)
 
     except CcxFieldOverride.DoesNotExist:
         pass
@@ -13,7 +13,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from ..models import CustomCourseForEdX
-from ..overrides import override_field_for_ccx
+from ..overrides import bulk_overrides, override_field_for_ccx, clear_override_for_ccx, get_override_for_ccx
 
 from .test_views import flatten, iter_blocks
 
@@ -91,7 +91,7 @@ class TestFieldOverrides(ModuleStoreTestCase):
         """
         ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
         chapter = self.course.get_children()[0]
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(3):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
             dummy = chapter.start
 
@@ -101,12 +101,55 @@ class TestFieldOverrides(ModuleStoreTestCase):
         """
         ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
         chapter = self.course.get_children()[0]
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(3):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
             dummy1 = chapter.start
             dummy2 = chapter.start
             dummy3 = chapter.start
 
+    def test_overrides_loaded_in_one_query(self):
+        """
+        Test that the overrides of all of the blocks are loaded with a single
+        query, and cached for later requests until they are changed.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.course.get_children()
+        for chapter in chapters:
+            override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+
+        # a fresh copy of the CCX, as loaded by a later request
+        self.get_ccx.return_value = ccx = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        with self.assertNumQueries(1):
+            for block in iter_blocks(self.course):
+                dummy = block.due
+
+        self.get_ccx.return_value = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_override_for_ccx(self.get_ccx.return_value, chapters[1], 'start'), ccx_start)
+
+        clear_override_for_ccx(ccx, chapters[1], 'start')
+        self.get_ccx.return_value = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        self.assertIsNone(get_override_for_ccx(self.get_ccx.return_value, chapters[1], 'start'))
+        self.assertEqual(get_override_for_ccx(self.get_ccx.return_value, chapters[0], 'start'), ccx_start)
+
+    def test_bulk_overrides_save_version_once(self):
+        """
+        Test that the version of the overrides is only saved once for the
+        changes made in bulk, while the changes are visible right away.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.course.get_children()
+        version = self.ccx.overrides_version
+        # one insert per override, the check of the saved version, and one
+        # update of the version
+        with self.assertNumQueries(len(chapters) + 2):
+            with bulk_overrides(self.ccx):
+                for chapter in chapters:
+                    override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+                self.assertEqual(CustomCourseForEdX.objects.get(id=self.ccx.id).overrides_version, version)
+        self.assertEqual(CustomCourseForEdX.objects.get(id=self.ccx.id).overrides_version, self.ccx.overrides_version)
+        self.assertEqual(chapters[0].start, ccx_start)
+
     def test_override_is_inherited(self):
         """
         Test that sequentials inherit overridden start date from chapter.
@@ -42,6 +42,7 @@ from instructor.views.tools import get_student_from_identifier  # pylint: disabl
 
 from .models import CustomCourseForEdX, CcxMembership
 from .overrides import (
+    bulk_overrides,
     clear_override_for_ccx,
     get_override_for_ccx,
     override_field_for_ccx,
@@ -128,19 +129,20 @@ def create_ccx(request, course):
         display_name=name)
     ccx.save()
 
-    # Make sure start/due are overridden for entire course
-    start = TODAY().replace(tzinfo=pytz.UTC)
-    override_field_for_ccx(ccx, course, 'start', start)
-    override_field_for_ccx(ccx, course, 'due', None)
-
-    # Hide anything that can show up in the schedule
-    hidden = 'visible_to_staff_only'
-    for chapter in course.get_children():
-        override_field_for_ccx(ccx, chapter, hidden, True)
-        for sequential in chapter.get_children():
-            override_field_for_ccx(ccx, sequential, hidden, True)
-            for vertical in sequential.get_children():
-                override_field_for_ccx(ccx, vertical, hidden, True)
+    with bulk_overrides(ccx):
+        # Make sure start/due are overridden for entire course
+        start = TODAY().replace(tzinfo=pytz.UTC)
+        override_field_for_ccx(ccx, course, 'start', start)
+        override_field_for_ccx(ccx, course, 'due', None)
+
+        # Hide anything that can show up in the schedule
+        hidden = 'visible_to_staff_only'
+        for chapter in course.get_children():
+            override_field_for_ccx(ccx, chapter, hidden, True)
+            for sequential in chapter.get_children():
+                override_field_for_ccx(ccx, sequential, hidden, True)
+                for vertical in sequential.get_children():
+                    override_field_for_ccx(ccx, vertical, hidden, True)
 
     url = reverse('ccx_coach_dashboard', kwargs={'course_id': course.id})
     return redirect(url)
@@ -189,25 +191,26 @@ def save_ccx(request, course):
                 override_fields(block, children, graded, earliest)
         return earliest
 
-    graded = {}
-    earliest = override_fields(course, json.loads(request.body), graded)
-    if earliest:
-        override_field_for_ccx(ccx, course, 'start', earliest)
-
-    # Attempt to automatically adjust grading policy
-    changed = False
-    policy = get_override_for_ccx(
-        ccx, course, 'grading_policy', course.grading_policy
-    )
-    policy = deepcopy(policy)
-    grader = policy['GRADER']
-    for section in grader:
-        count = graded.get(section.get('type'), 0)
-        if count < section['min_count']:
-            changed = True
-            section['min_count'] = count
-    if changed:
-        override_field_for_ccx(ccx, course, 'grading_policy', policy)
+    with bulk_overrides(ccx):
+        graded = {}
+        earliest = override_fields(course, json.loads(request.body), graded)
+        if earliest:
+            override_field_for_ccx(ccx, course, 'start', earliest)
+
+        # Attempt to automatically adjust grading policy
+        changed = False
+        policy = get_override_for_ccx(
+            ccx, course, 'grading_policy', course.grading_policy
+        )
+        policy = deepcopy(policy)
+        grader = policy['GRADER']
+        for section in grader:
+            count = graded.get(section.get('type'), 0)
+            if count < section['min_count']:
+                changed = True
+                section['min_count'] = count
+        if changed:
+            override_field_for_ccx(ccx, course, 'grading_policy', policy)
 
     return HttpResponse(
         json.dumps({
@@ -5,9 +5,10 @@ from util.json_request import JsonResponse
 import json
 
 from courseware import models
-from django.db.models import Count
 from django.utils.translation import ugettext as _
 
+from class_dashboard.models import ProblemGradeCount, SequentialOpenCount
+
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.inheritance import own_metadata
 from instructor_analytics.csvs import create_csv_response
@@ -32,12 +33,11 @@ def get_problem_grade_distribution(course_id):
         attempting the problem
     """
 
-    # Aggregate query on studentmodule table for grade data for all problems in course
-    db_query = models.StudentModule.objects.filter(
+    # Grade counts for all problems in course
+    db_query = ProblemGradeCount.objects.filter(
         course_id__exact=course_id,
-        grade__isnull=False,
-        module_type__exact="problem",
-    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+        count__gt=0,
+    ).values('module_state_key', 'grade', 'max_grade', 'count')
 
     prob_grade_distrib = {}
     total_student_count = {}
@@ -48,7 +48,7 @@ def get_problem_grade_distribution(course_id):
 
         # Build set of grade distributions for each problem that has student responses
         if curr_problem in prob_grade_distrib:
-            prob_grade_distrib[curr_problem]['grade_distrib'].append((row['grade'], row['count_grade']))
+            prob_grade_distrib[curr_problem]['grade_distrib'].append((row['grade'], row['count']))
 
             if (prob_grade_distrib[curr_problem]['max_grade'] != row['max_grade']) and \
                     (prob_grade_distrib[curr_problem]['max_grade'] < row['max_grade']):
@@ -57,11 +57,11 @@ def get_problem_grade_distribution(course_id):
         else:
             prob_grade_distrib[curr_problem] = {
                 'max_grade': row['max_grade'],
-                'grade_distrib': [(row['grade'], row['count_grade'])]
+                'grade_distrib': [(row['grade'], row['count'])]
             }
 
         # Build set of total students attempting each problem
-        total_student_count[curr_problem] = total_student_count.get(curr_problem, 0) + row['count_grade']
+        total_student_count[curr_problem] = total_student_count.get(curr_problem, 0) + row['count']
 
     return prob_grade_distrib, total_student_count
 
@@ -75,17 +75,17 @@ def get_sequential_open_distrib(course_id):
     Outputs a dict mapping the 'module_id' to the number of students that have opened that subsection/sequential.
     """
 
-    # Aggregate query on studentmodule table for "opening a subsection" data
-    db_query = models.StudentModule.objects.filter(
+    # Counts of "opening a subsection" data
+    db_query = SequentialOpenCount.objects.filter(
         course_id__exact=course_id,
-        module_type__exact="sequential",
-    ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
+        count__gt=0,
+    ).values('module_state_key', 'count')
 
     # Build set of "opened" data for each subsection that has "opened" data
     sequential_open_distrib = {}
     for row in db_query:
         row_loc = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
-        sequential_open_distrib[row_loc] = row['count_sequential']
+        sequential_open_distrib[row_loc] = row['count']
 
     return sequential_open_distrib
 
@@ -105,17 +105,17 @@ def get_problem_set_grade_distrib(course_id, problem_set):
       'grade_distrib' - array of tuples (`grade`,`count`) ordered by `grade`
     """
 
-    # Aggregate query on studentmodule table for grade data for set of problems in course
-    db_query = models.StudentModule.objects.filter(
+    # Grade counts for set of problems in course
+    db_query = ProblemGradeCount.objects.filter(
         course_id__exact=course_id,
-        grade__isnull=False,
-        module_type__exact="problem",
         module_state_key__in=problem_set,
+        count__gt=0,
     ).values(
         'module_state_key',
         'grade',
         'max_grade',
-    ).annotate(count_grade=Count('grade')).order_by('module_state_key', 'grade')
+        'count',
+    ).order_by('module_state_key', 'grade')
 
     prob_grade_distrib = {}
 
@@ -129,7 +129,7 @@ def get_problem_set_grade_distrib(course_id, problem_set):
             }
 
         curr_grade_distrib = prob_grade_distrib[row_loc]
-        curr_grade_distrib['grade_distrib'].append((row['grade'], row['count_grade']))
+        curr_grade_distrib['grade_distrib'].append((row['grade'], row['count']))
 
         if curr_grade_distrib['max_grade'] < row['max_grade']:
             curr_grade_distrib['max_grade'] = row['max_grade']
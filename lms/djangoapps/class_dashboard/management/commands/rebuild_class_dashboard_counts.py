@@ -0,0 +1,41 @@
+"""
+django management command: recompute the class dashboard's aggregate counts
+(see class_dashboard.models) from the student module table
+"""
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.models import StudentModule
+from class_dashboard.models import rebuild_course_counts
+
+
+class Command(BaseCommand):
+    args = "[course_id ...]"
+    help = (
+        "Recompute the class dashboard's grade distribution and subsection open counts of the given "
+        "courses (or of all courses) from the student module table."
+    )
+
+    def handle(self, *args, **options):
+        if args:
+            course_keys = []
+            for course_id in args:
+                try:
+                    course_keys.append(CourseKey.from_string(course_id))
+                except InvalidKeyError:
+                    try:
+                        course_keys.append(SlashSeparatedCourseKey.from_deprecated_string(course_id))
+                    except InvalidKeyError:
+                        raise CommandError("Invalid course id: {}".format(course_id))
+        else:
+            # values_list returns the keys as they're stored
+            course_keys = [
+                CourseKey.from_string(course_id)
+                for course_id in StudentModule.objects.values_list('course_id', flat=True).distinct()
+            ]
+
+        for course_key in course_keys:
+            self.stdout.write("Rebuilding class dashboard counts for {}\n".format(course_key))
+            rebuild_course_counts(course_key)
@@ -0,0 +1,35 @@
+"""
+django management command: recompute the class dashboard's aggregate counts (see
+class_dashboard.models) of the problems and subsections whose student modules changed recently, or
+were deleted since its last run.
+
+Run it periodically (e.g. from cron), more often than its --minutes, so that the runs overlap.
+"""
+from datetime import datetime, timedelta
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from pytz import UTC
+
+from class_dashboard.models import update_changed_counts
+
+
+class Command(NoArgsCommand):
+    help = (
+        "Recompute the class dashboard's grade distribution and subsection open counts of the problems "
+        "and subsections whose student modules changed in the last --minutes, or were deleted since the last run."
+    )
+
+    option_list = NoArgsCommand.option_list + (
+        make_option(
+            '--minutes',
+            type='int',
+            default=15,
+            help="Recompute the counts of the student modules changed in this many minutes.",
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        since = datetime.now(UTC) - timedelta(minutes=options['minutes'])
+        for course_key in update_changed_counts(since):
+            self.stdout.write("Updated class dashboard counts for {}\n".format(course_key))
@@ -0,0 +1,164 @@
+"""
+Aggregate tables of the student module data displayed by the class dashboard (the Metrics tab of
+the instructor dashboard), so that the dashboard doesn't aggregate the whole
+courseware_studentmodule table on each load.
+
+The counts are updated periodically, rather than as each StudentModule is saved, so that grading
+a problem doesn't have to update (and lock) a row shared by all of the problem's students: the
+update_class_dashboard_counts management command, run from cron, recomputes the counts of the
+problems and subsections whose StudentModules changed recently, or were deleted (which is recorded
+in StaleCount, as a deleted StudentModule leaves no trace in its own table). The
+rebuild_class_dashboard_counts management command recomputes all of the counts of courses (e.g. to
+compute them for existing data).
+
+WE'RE USING MIGRATIONS!
+
+If you make changes to this model, be sure to create an appropriate migration
+file and check it in at the same time as your model changes. To do that,
+
+1. Go to the edx-platform dir
+2. ./manage.py schemamigration class_dashboard --auto description_of_your_change
+3. Add the migration file created in edx-platform/lms/djangoapps/class_dashboard/migrations/
+"""
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from opaque_keys.edx.keys import CourseKey
+
+from courseware.models import StudentModule
+from xmodule_django.models import CourseKeyField, LocationKeyField
+
+# the module types whose StudentModules are counted
+COUNTED_MODULE_TYPES = ('problem', 'sequential')
+
+
+class ProblemGradeCount(models.Model):
+    """
+    The number of students who have each grade (out of max_grade) for a problem.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255, db_column='module_id')
+    grade = models.FloatField()
+    max_grade = models.FloatField(null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'module_state_key', 'grade', 'max_grade'),)
+
+
+class SequentialOpenCount(models.Model):
+    """
+    The number of students who have opened a subsection (sequential).
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255, db_column='module_id')
+    count = models.IntegerField(default=0)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'module_state_key'),)
+
+
+class StaleCount(models.Model):
+    """
+    A problem or subsection whose counts are stale because one of its StudentModules was deleted.
+
+    Rows are added as StudentModules are deleted and removed by update_changed_counts once it has
+    recomputed the counts. A problem may have several rows, so that deleting doesn't contend on them.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255, db_column='module_id')
+
+
+@receiver(post_delete, sender=StudentModule)
+def mark_counts_stale(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Records that the counts of the problem or subsection of the StudentModule being deleted are stale.
+    """
+    if instance.module_type in COUNTED_MODULE_TYPES:
+        StaleCount.objects.create(course_id=instance.course_id, module_state_key=instance.module_state_key)
+
+
+@transaction.commit_on_success
+def rebuild_course_counts(course_id, module_state_keys=None):
+    """
+    Recomputes the counts of the course from its StudentModules: those of the problems and
+    subsections with the given `module_state_keys`, or all of them.
+    """
+    problem_counts = ProblemGradeCount.objects.filter(course_id=course_id)
+    open_counts = SequentialOpenCount.objects.filter(course_id=course_id)
+    student_modules = StudentModule.objects.filter(course_id=course_id)
+    if module_state_keys is not None:
+        module_state_keys = list(module_state_keys)
+        problem_counts = problem_counts.filter(module_state_key__in=module_state_keys)
+        open_counts = open_counts.filter(module_state_key__in=module_state_keys)
+        student_modules = student_modules.filter(module_state_key__in=module_state_keys)
+    problem_counts.delete()
+    open_counts.delete()
+
+    grades = student_modules.filter(
+        grade__isnull=False,
+        module_type='problem',
+    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+    ProblemGradeCount.objects.bulk_create([
+        ProblemGradeCount(
+            course_id=course_id,
+            module_state_key=course_id.make_usage_key_from_deprecated_string(row['module_state_key']),
+            grade=row['grade'],
+            max_grade=row['max_grade'],
+            count=row['count_grade'],
+        )
+        for row in grades
+    ])
+
+    opens = student_modules.filter(
+        module_type='sequential',
+    ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
+    SequentialOpenCount.objects.bulk_create([
+        SequentialOpenCount(
+            course_id=course_id,
+            module_state_key=course_id.make_usage_key_from_deprecated_string(row['module_state_key']),
+            count=row['count_sequential'],
+        )
+        for row in opens
+    ])
+
+
+def update_changed_counts(since):
+    """
+    Recomputes the counts of the problems and subsections whose StudentModules were created or
+    modified since the datetime `since`, or were deleted since the last call.
+
+    Returns the keys of the courses whose counts were recomputed.
+    """
+    changed = StudentModule.objects.filter(
+        modified__gte=since,
+        module_type__in=COUNTED_MODULE_TYPES,
+    ).values_list('course_id', 'module_state_key').distinct()
+
+    # only drain the stale rows read here: modules deleted while the counts are recomputed will
+    # be picked up by the next call
+    last_stale_id = StaleCount.objects.aggregate(last_id=Max('id'))['last_id']
+    stale = StaleCount.objects.filter(id__lte=last_stale_id).values_list(
+        'course_id', 'module_state_key'
+    ).distinct() if last_stale_id is not None else []
+
+    # values_list returns the keys as they're stored
+    changed_keys = defaultdict(set)
+    for course_id, module_state_key in list(changed) + list(stale):
+        changed_keys[course_id].add(module_state_key)
+
+    course_keys = []
+    for course_id, module_state_keys in changed_keys.iteritems():
+        course_key = CourseKey.from_string(course_id)
+        rebuild_course_counts(course_key, [
+            course_key.make_usage_key_from_deprecated_string(module_state_key)
+            for module_state_key in module_state_keys
+        ])
+        course_keys.append(course_key)
+
+    if last_stale_id is not None:
+        StaleCount.objects.filter(id__lte=last_stale_id).delete()
+    return course_keys
@@ -3,11 +3,13 @@ Tests for class dashboard (Metrics tab in instructor dashboard)
 """
 
 import json
+from datetime import datetime, timedelta
 
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
+from pytz import UTC
 
 from capa.tests.response_xml_factory import StringResponseXMLFactory
 from courseware.tests.factories import StudentModuleFactory
@@ -22,6 +24,9 @@ from class_dashboard.dashboard_data import (
     get_section_display_name, get_array_section_has_problem,
     get_students_opened_subsection, get_students_problem_grades,
 )
+from class_dashboard.models import (
+    ProblemGradeCount, SequentialOpenCount, StaleCount, rebuild_course_counts, update_changed_counts
+)
 from class_dashboard.views import has_instructor_access_for_class
 
 USER_COUNT = 11
@@ -94,6 +99,8 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
                     module_state_key=self.item.location,
                 )
 
+        rebuild_course_counts(self.course.id)
+
     def test_get_problem_grade_distribution(self):
 
         prob_grade_distrib, total_student_count = get_problem_grade_distribution(self.course.id)
@@ -318,3 +325,47 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
         """
         ret_val = has_instructor_access_for_class(self.instructor, self.course.id)
         self.assertEquals(ret_val, True)
+
+    def test_update_changed_counts(self):
+        since = datetime.now(UTC) - timedelta(seconds=1)
+        other_problem = self.item.location.replace(block_id='other_problem')
+        student_module = StudentModuleFactory.create(
+            grade=0,
+            max_grade=1,
+            student=self.users[0],
+            course_id=self.course.id,
+            module_state_key=other_problem,
+        )
+        self.assertNotIn(other_problem, get_problem_grade_distribution(self.course.id)[0])
+        unchanged_distrib = get_problem_grade_distribution(self.course.id)[0][self.item.location]
+
+        self.assertEqual([unicode(course_key) for course_key in update_changed_counts(since)], [unicode(self.course.id)])
+        prob_grade_distrib = get_problem_grade_distribution(self.course.id)[0]
+        self.assertEqual(prob_grade_distrib[other_problem]['grade_distrib'], [(0, 1)])
+        self.assertEqual(prob_grade_distrib[self.item.location], unchanged_distrib)
+
+        student_module.grade = 1
+        student_module.save()
+        update_changed_counts(since)
+        self.assertEqual(
+            get_problem_grade_distribution(self.course.id)[0][other_problem]['grade_distrib'], [(1, 1)]
+        )
+
+        # a deleted module's count is corrected on the next update, even though no module changed
+        student_module.delete()
+        self.assertEqual(StaleCount.objects.count(), 1)
+        update_changed_counts(datetime.now(UTC))
+        self.assertNotIn(other_problem, get_problem_grade_distribution(self.course.id)[0])
+        self.assertEqual(StaleCount.objects.count(), 0)
+
+    def test_rebuild_course_counts(self):
+        grade_counts = set(ProblemGradeCount.objects.values_list('module_state_key', 'grade', 'max_grade', 'count'))
+        open_counts = set(SequentialOpenCount.objects.values_list('module_state_key', 'count'))
+        ProblemGradeCount.objects.all().delete()
+
+        rebuild_course_counts(self.course.id)
+        self.assertEqual(
+            set(ProblemGradeCount.objects.values_list('module_state_key', 'grade', 'max_grade', 'count')),
+            grade_counts
+        )
+        self.assertEqual(set(SequentialOpenCount.objects.values_list('module_state_key', 'count')), open_counts)
@@ -19,6 +19,7 @@ from xmodule.course_module import (
     CourseDescriptor, CATALOG_VISIBILITY_CATALOG_AND_ABOUT,
     CATALOG_VISIBILITY_ABOUT)
 from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore.django import modulestore
 from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.split_test_module import get_split_user_partitions
 from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPartitionGroupError
@@ -33,6 +34,7 @@ from student.roles import (
     OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
 )
 from util.milestones_helpers import get_pre_requisite_courses_not_completed
+from openedx.core.djangoapps.content.course_structures.outline import outline_date
 
 import dogstats_wrapper as dog_stats_api
 
@@ -457,6 +459,36 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     return _dispatch(checkers, action, user, descriptor)
 
 
+class _OutlineBlock(object):
+    """
+    The attributes of a block of a precomputed course outline (or video index)
+    which are used to check access to its descriptor.
+    """
+    # the outline only has blocks without group access restrictions
+    user_partitions = []
+
+    def __init__(self, block, course_key):
+        self.location = UsageKey.from_string(block['usage_key']).map_into_course(course_key)
+        self.start = outline_date(block['start'])
+        self.days_early_for_beta = block['days_early_for_beta']
+        self.visible_to_staff_only = block['visible_to_staff_only']
+        self._class_tags = {'detached'} if block['detached'] else set()
+
+
+def has_access_to_outline_block(user, block, course_key):
+    """
+    Check whether `user` can 'load' a chapter or section of a precomputed
+    course outline (see course_structures.outline), or a video of a video
+    index, without loading it from the modulestore, if possible.
+
+    block: the block's dict in the outline or index
+    """
+    if block['group_access']:
+        descriptor = modulestore().get_item(UsageKey.from_string(block['usage_key']).map_into_course(course_key))
+        return has_access(user, 'load', descriptor, course_key)
+    return _has_access_descriptor(user, 'load', _OutlineBlock(block, course_key), course_key)
+
+
 def _has_access_xmodule(user, action, xmodule, course_key):
     """
     Check if user has access to this xmodule.
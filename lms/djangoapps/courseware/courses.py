@@ -200,8 +200,8 @@ def get_course_about_section(course, section_key):
 
             loc = course.location.replace(category='about', name=section_key)
 
-            # Use an empty cache
-            field_data_cache = FieldDataCache([], course.id, request.user)
+            # Use the (initially empty) cache shared by the request
+            field_data_cache = FieldDataCache.for_request(request, course.id)
             about_module = get_module(
                 request.user,
                 request,
@@ -252,8 +252,8 @@ def get_course_info_section_module(request, course, section_key):
     """
     usage_key = course.id.make_usage_key('course_info', section_key)
 
-    # Use an empty cache
-    field_data_cache = FieldDataCache([], course.id, request.user)
+    # Use the (initially empty) cache shared by the request
+    field_data_cache = FieldDataCache.for_request(request, course.id)
 
     return get_module(
         request.user,
@@ -1,13 +1,15 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import hashlib
+import itertools
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
@@ -20,7 +22,7 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import StudentModule, StudentSectionGrade, StudentSectionGradeBlock
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
@@ -29,6 +31,9 @@ from opaque_keys.edx.keys import CourseKey
 
 log = logging.getLogger("edx.courseware")
 
+# The state needed to grade a student, as fetched in bulk by `prefetch_scores`
+PrefetchedScores = namedtuple('PrefetchedScores', ['submissions_scores', 'student_modules'])
+
 
 def answer_distributions(course_key):
     """
@@ -122,16 +127,16 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, prefetched_scores=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, prefetched_scores)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, prefetched_scores=None):
     """
     Unwrapped version of "grade"
 
@@ -149,18 +154,24 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - prefetched_scores : an optional PrefetchedScores for this student, as
+      returned by `prefetch_scores`, used instead of querying for the
+      student's StudentModules and submissions API scores
 
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
     raw_scores = []
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
-    )
+    if prefetched_scores is not None:
+        submissions_scores = prefetched_scores.submissions_scores
+    else:
+        # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+        # scores that were registered with the submissions API, which for the moment
+        # means only openassessment (edx-ora2)
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -187,7 +198,12 @@ def _grade(student, request, course, keep_raw_scores):
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
+            if not should_grade_section and prefetched_scores is not None:
+                should_grade_section = any(
+                    descriptor.location in prefetched_scores.student_modules
+                    for descriptor in section['xmoduledescriptors']
+                )
+            elif not should_grade_section:
                 with manual_transaction():
                     should_grade_section = StudentModule.objects.filter(
                         student=student,
@@ -199,37 +215,9 @@ def _grade(student, request, course, keep_raw_scores):
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
             if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
-
+                scores = _get_section_scores(
+                    student, request, course, section, submissions_scores, prefetched_scores
+                )
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -265,6 +253,171 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def _get_section_scores(student, request, course, section, submissions_scores, prefetched_scores=None):
+    """
+    Returns the list of Scores for every scorable block in the given graded
+    section (an entry of `course.grading_context['graded_sections']`).
+
+    When the ENABLE_PERSISTENT_SECTION_GRADES feature is on, scores are read
+    from the StudentSectionGrade table if a row exists for the current content
+    version of the section, and written back to it after being recomputed,
+    unless the student was denied access to any of the section's blocks.
+    """
+    section_descriptor = section['section_descriptor']
+    content_version = None
+    if settings.FEATURES.get('ENABLE_PERSISTENT_SECTION_GRADES'):
+        content_version = _section_content_version(section, submissions_scores)
+
+    if content_version is not None:
+        with manual_transaction():
+            section_grades = list(StudentSectionGrade.objects.filter(
+                student=student,
+                course_id=course.id,
+                usage_key=section_descriptor.location,
+                content_version=content_version,
+            ))
+        if section_grades:
+            return [Score(*score) for score in json.loads(section_grades[0].scores)]
+
+    scores = []
+    block_keys = [section_descriptor.location]
+
+    # The data for all of the section's problems is queried together, when the first module is created
+    field_data_cache = FieldDataCache(section['xmoduledescriptors'], course.id, student, lazy=True)
+
+    # Blocks the student can't access yet (e.g. not yet released) are left out of the scores, so
+    # scores computed without them must not be reused once the student gains access.
+    access_denied = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        field_data_cache.add_descriptors_to_cache([descriptor])
+        with manual_transaction():
+            module = get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+        if module is None:
+            access_denied.append(descriptor.location)
+        return module
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+        block_keys.append(module_descriptor.location)
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+            student_modules=prefetched_scores.student_modules if prefetched_scores is not None else None
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+
+    if content_version is not None and not access_denied:
+        _save_section_grade(student, course.id, section_descriptor.location, content_version, block_keys, scores)
+
+    return scores
+
+
+def _save_section_grade(student, course_key, usage_key, content_version, block_keys, scores):
+    """
+    Persists the `scores` of the section `usage_key` for the student, as
+    computed against `content_version` by visiting the blocks `block_keys`.
+
+    If another process saves the same section's grade at the same time, the
+    grade it saves is kept.
+    """
+    try:
+        section_grade, created = StudentSectionGrade.objects.get_or_create(
+            student=student,
+            course_id=course_key,
+            usage_key=usage_key,
+            defaults={
+                'content_version': content_version,
+                'scores': json.dumps([list(score) for score in scores]),
+            },
+        )
+        if not created:
+            section_grade.content_version = content_version
+            section_grade.scores = json.dumps([list(score) for score in scores])
+            section_grade.save()
+            section_grade.blocks.all().delete()
+        StudentSectionGradeBlock.objects.bulk_create([
+            StudentSectionGradeBlock(section_grade=section_grade, usage_key=block_key)
+            for block_key in set(block_keys)
+        ])
+    except IntegrityError:
+        # Roll back all of the changes, so that the scores are never saved
+        # without the blocks they depend on.
+        transaction.rollback()
+        log.info(u"Section grade for %s, %s was saved concurrently", student.id, usage_key)
+    except Exception:
+        transaction.rollback()
+        raise
+    else:
+        transaction.commit()
+
+
+def _section_content_version(section, submissions_scores):
+    """
+    Returns a string identifying the version of the section's content and of
+    the submissions API scores within it, or None if the section's grade must
+    not be persisted.
+
+    Sections containing blocks that always recalculate their grades are never
+    persisted, nor are sections whose edit time is unknown to the modulestore.
+    Neither are sections whose blocks depend on the student's groups, as the
+    student's groups may change without the section being edited: those
+    restricted to groups (by themselves or by any of their ancestors), and
+    those with children chosen per student, such as split_test and
+    library_content.
+    """
+    if settings.GENERATE_PROFILE_SCORES:
+        return None
+    if any(descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']):
+        return None
+    if any(descriptor.merged_group_access for descriptor in section['xmoduledescriptors']):
+        return None
+    if section['section_descriptor'].merged_group_access:
+        return None
+    # The scored descriptors don't include the containers which choose children per student.
+    if _has_dynamic_descendants(section['section_descriptor']):
+        return None
+    subtree_edited_on = section['section_descriptor'].subtree_edited_on
+    if subtree_edited_on is None:
+        return None
+
+    section_submissions_scores = sorted(
+        (location, submissions_scores[location])
+        for location in (
+            descriptor.location.to_deprecated_string() for descriptor in section['xmoduledescriptors']
+        )
+        if location in submissions_scores
+    )
+    fingerprint = hashlib.sha1(json.dumps(section_submissions_scores)).hexdigest()
+    return u'{}:{}'.format(subtree_edited_on.isoformat(), fingerprint)
+
+
+def _has_dynamic_descendants(descriptor):
+    """
+    Returns whether the descriptor or any of its descendants has children
+    chosen per student.
+    """
+    if descriptor.has_dynamic_children():
+        return True
+    return any(_has_dynamic_descendants(child) for child in descriptor.get_children())
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -391,7 +544,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_modules=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -405,6 +558,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_modules: An optional dict of locations to the user's StudentModules
+           in this course. If given, it is used instead of querying for the
+           problem's StudentModule.
     """
     scores_cache = scores_cache or {}
 
@@ -431,14 +587,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_modules is not None:
+        student_module = student_modules.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -484,7 +643,7 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_or_id, students):
+def iterate_grades_for(course_or_id, students, batch_size=None):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -492,6 +651,11 @@ def iterate_grades_for(course_or_id, students):
     If an error occurred, gradeset will be an empty dict and err_msg will be an
     exception message. If there was no error, err_msg is an empty string.
 
+    If `batch_size` is given, students are graded in batches of that size, and
+    the StudentModules and submissions API scores of each batch are fetched
+    with a few bulk queries (see `prefetch_scores`) instead of being queried
+    for section by section and problem by problem.
+
     The gradeset is a dictionary with the following fields:
 
     - grade : A final letter grade.
@@ -512,7 +676,7 @@ def iterate_grades_for(course_or_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
+    for student, prefetched_scores in _iterate_prefetched_scores(course, students, batch_size):
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
                 request.user = student
@@ -521,7 +685,10 @@ def iterate_grades_for(course_or_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                if prefetched_scores is not None:
+                    gradeset = grade(student, request, course, prefetched_scores=prefetched_scores)
+                else:
+                    gradeset = grade(student, request, course)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -534,3 +701,73 @@ def iterate_grades_for(course_or_id, students):
                     exc.message
                 )
                 yield student, {}, exc.message
+
+
+def _iterate_prefetched_scores(course, students, batch_size):
+    """
+    Yields (student, prefetched_scores) tuples for each of the given students.
+
+    If `batch_size` is None, nothing is prefetched and prefetched_scores is
+    always None.
+    """
+    if batch_size is None:
+        for student in students:
+            yield student, None
+        return
+
+    students = iter(students)
+    while True:
+        batch = list(itertools.islice(students, batch_size))
+        if not batch:
+            return
+        with dog_stats_api.timer('lms.grades.prefetch_scores', tags=[u'action:{}'.format(course.id)]):
+            with manual_transaction():
+                prefetched = prefetch_scores(course, batch)
+        for student in batch:
+            yield student, prefetched[student.id]
+
+
+def prefetch_scores(course, students):
+    """
+    Fetches, in bulk, everything needed to grade the given students except
+    the state of problems that must be instantiated to be scored, and their
+    submissions API scores, which are fetched per student.
+
+    Returns a dict mapping each student's id to a PrefetchedScores holding:
+
+    - submissions_scores : a dict of location names to (earned, possible)
+      point tuples from the submissions API, as returned by `sub_api.get_scores`
+    - student_modules : a dict of locations to the student's StudentModules
+      for the scorable blocks of the course's graded sections. Only the
+      fields needed for grading are loaded.
+    """
+    graded_locations = set(
+        descriptor.location
+        for sections in course.grading_context['graded_sections'].itervalues()
+        for section in sections
+        for descriptor in section['xmoduledescriptors']
+    )
+
+    # The submissions API only gets the scores of one student at a time
+    prefetched = {
+        student.id: PrefetchedScores(
+            submissions_scores=sub_api.get_scores(
+                course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id, save=False)
+            ),
+            student_modules={},
+        )
+        for student in students
+    }
+    if not prefetched:
+        return prefetched
+
+    student_modules = StudentModule.objects.filter(
+        student__in=prefetched.keys(),
+        course_id=course.id,
+        module_state_key__in=list(graded_locations),
+    ).only('student', 'course_id', 'module_state_key', 'grade', 'max_grade')
+    for student_module in student_modules:
+        location = student_module.module_state_key.map_into_course(course.id)
+        prefetched[student_module.student_id].student_modules[location] = student_module
+
+    return prefetched
@@ -5,7 +5,10 @@ Middleware for the courseware app
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
 
+import dogstats_wrapper as dog_stats_api
 from courseware.courses import UserNotEnrolled
+from courseware.model_data import QUERY_COUNT_KEY
+from request_cache.middleware import RequestCache
 
 
 class RedirectUnenrolledMiddleware(object):
@@ -22,3 +25,14 @@ class RedirectUnenrolledMiddleware(object):
                     args=[course_key.to_deprecated_string()]
                 )
             )
+
+
+class FieldDataCacheQueryCountMiddleware(object):
+    """
+    Report the number of queries made by FieldDataCaches while handling each request
+    """
+    def process_response(self, _request, response):
+        num_queries = RequestCache.get_request_cache().data.pop(QUERY_COUNT_KEY, None)
+        if num_queries:
+            dog_stats_api.histogram('lms.courseware.field_data_cache.queries', num_queries)
+        return response
@@ -23,9 +23,15 @@ from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
 from xblock.fields import Scope, UserScope
 from xmodule.modulestore.django import modulestore
 from xblock.core import XBlockAside
+from request_cache.middleware import RequestCache
 
 log = logging.getLogger(__name__)
 
+# Attribute of the request holding the FieldDataCaches shared by the request
+REQUEST_CACHE_ATTRIBUTE = '_field_data_caches'
+# Key in the request cache of the number of queries made by FieldDataCaches during the request
+QUERY_COUNT_KEY = 'courseware.field_data_cache_queries'
+
 
 class InvalidWriteError(Exception):
     """
@@ -34,6 +40,16 @@ class InvalidWriteError(Exception):
     """
 
 
+def _request_cache():
+    """
+    Return the dict cached for the current request.
+    """
+    request_cache = RequestCache.get_request_cache()
+    if not hasattr(request_cache, 'data'):
+        request_cache.data = {}
+    return request_cache.data
+
+
 def chunks(items, chunk_size):
     """
     Yields the values from items in chunks of size chunk_size
@@ -47,7 +63,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, lazy=False):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -60,9 +76,18 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
         asides: The list of aside types to load, or None to prefetch no asides.
+        lazy: If True, the objects for each scope are only queried when a field in that scope is
+            first accessed (and the descriptors added before then are queried together).
         '''
         self.cache = {}
         self.select_for_update = select_for_update
+        self.lazy = lazy
+        self.num_queries = 0
+
+        # scope -> {usage_id: descriptor} of the descriptors whose objects haven't been queried yet
+        self._pending = defaultdict(dict)
+        # scope -> set of the usage_ids of the descriptors whose objects have been queried
+        self._loaded = defaultdict(set)
 
         if asides is None:
             self.asides = []
@@ -75,14 +100,50 @@ class FieldDataCache(object):
 
         self.add_descriptors_to_cache(descriptors)
 
+    @classmethod
+    def for_request(cls, request, course_id, user=None, asides=None):
+        """
+        Return the lazy FieldDataCache shared by everything that renders `user`'s (by default,
+        the requesting user's) modules in `course_id` during `request`, so that the objects for
+        all of those modules are queried in as few queries as possible.
+        """
+        if user is None:
+            user = request.user
+        if not hasattr(request, REQUEST_CACHE_ATTRIBUTE):
+            setattr(request, REQUEST_CACHE_ATTRIBUTE, {})
+        caches = getattr(request, REQUEST_CACHE_ATTRIBUTE)
+        key = (course_id, user.id, tuple(asides or ()))
+        if key not in caches:
+            caches[key] = cls([], course_id, user, asides=asides, lazy=True)
+        return caches[key]
+
     def add_descriptors_to_cache(self, descriptors):
         """
         Add all `descriptors` to this FieldDataCache.
         """
         if self.user.is_authenticated():
-            for scope, fields in self._fields_to_cache(descriptors).items():
-                for field_object in self._retrieve_fields(scope, fields, descriptors):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+            for scope in self._fields_to_cache(descriptors):
+                pending = self._pending[scope]
+                for descriptor in descriptors:
+                    usage_id = descriptor.scope_ids.usage_id
+                    if usage_id not in self._loaded[scope]:
+                        pending[usage_id] = descriptor
+                if not self.lazy:
+                    self._load_scope(scope)
+
+    def _load_scope(self, scope):
+        """
+        Query the objects in `scope` for all of the descriptors added to this cache since the
+        objects in `scope` were last queried.
+        """
+        pending = self._pending.pop(scope, None)
+        if not pending:
+            return
+        descriptors = pending.values()
+        fields = self._fields_to_cache(descriptors)[scope]
+        for field_object in self._retrieve_fields(scope, fields, descriptors):
+            self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+        self._loaded[scope].update(pending)
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -127,7 +188,7 @@ class FieldDataCache(object):
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         select_for_update=False, asides=None):
+                                         select_for_update=False, asides=None, request=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -137,8 +198,13 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return wether the StudentModule
             should be cached
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
+        request: If given (and not select_for_update), add the descendents to (and return) the
+            FieldDataCache shared by `request`
         """
-        cache = FieldDataCache([], course_id, user, select_for_update, asides=asides)
+        if request is not None and not select_for_update:
+            cache = cls.for_request(request, course_id, user, asides=asides)
+        else:
+            cache = FieldDataCache([], course_id, user, select_for_update, asides=asides)
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
@@ -147,6 +213,10 @@ class FieldDataCache(object):
         Queries model_class with **kwargs, optionally adding select_for_update if
         self.select_for_update is set
         """
+        self.num_queries += 1
+        request_cache = _request_cache()
+        request_cache[QUERY_COUNT_KEY] = request_cache.get(QUERY_COUNT_KEY, 0) + 1
+
         query = model_class.objects
         if self.select_for_update:
             query = query.select_for_update()
@@ -280,6 +350,7 @@ class FieldDataCache(object):
             # user we were constructed for.
             assert key.user_id == self.user.id
 
+        self._load_scope(key.scope)
         return self.cache.get(self._cache_key_from_kvs_key(key))
 
     def find_or_create(self, key):
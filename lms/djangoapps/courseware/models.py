@@ -15,7 +15,7 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from model_utils.models import TimeStampedModel
@@ -248,3 +248,64 @@ class StudentFieldOverride(TimeStampedModel):
 
     field = models.CharField(max_length=255)
     value = models.TextField(default='null')
+
+
+class StudentSectionGrade(TimeStampedModel):
+    """
+    Persisted subgrade for a single graded section (sequential) of a course for
+    a given student.  This is used by `courseware.grades` to avoid recomputing
+    sections whose scores cannot have changed since they were last graded.
+
+    A row is only valid for the `content_version` it was computed against (the
+    section's subtree edit time plus a fingerprint of any submissions API
+    scores in the section).  Rows are deleted whenever a StudentModule for one
+    of the blocks in its `StudentSectionGradeBlock`s is saved or deleted.
+    """
+    student = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('student', 'course_id', 'usage_key'),)
+
+    content_version = models.CharField(max_length=255)
+
+    # JSON list of [earned, possible, graded, display_name] score entries
+    scores = models.TextField(default='[]')
+
+    def __unicode__(self):
+        return u"[StudentSectionGrade] {}: {} {} ({})".format(
+            self.student_id, self.course_id, self.usage_key, self.content_version
+        )
+
+
+class StudentSectionGradeBlock(models.Model):
+    """
+    A block that was visited while computing a StudentSectionGrade, so that
+    the grade depends on the student's StudentModule for that block.
+    """
+    section_grade = models.ForeignKey(StudentSectionGrade, db_index=True, related_name='blocks')
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('section_grade', 'usage_key'),)
+
+    def __unicode__(self):
+        return u"[StudentSectionGradeBlock] {}: {}".format(self.section_grade_id, self.usage_key)
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+def invalidate_section_grades(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deletes any persisted section grades for the student that depend on the
+    StudentModule being saved or deleted.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_SECTION_GRADES'):
+        return
+
+    StudentSectionGrade.objects.filter(
+        student_id=instance.student_id,
+        course_id=instance.course_id,
+        blocks__usage_key=instance.module_state_key.map_into_course(instance.course_id),
+    ).delete()
@@ -27,7 +27,7 @@ from django.test.client import RequestFactory
 from django.views.decorators.csrf import csrf_exempt
 
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import has_access, get_user_role
+from courseware.access import has_access, get_user_role, has_access_to_outline_block
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from courseware.entrance_exams import (
@@ -70,6 +70,7 @@ from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from util import milestones_helpers
 from util.module_utils import yield_dynamic_descriptor_descendents
 from verify_student.services import ReverificationService
+from openedx.core.djangoapps.content.course_structures.outline import get_course_outline, outline_date
 
 from .field_overrides import OverrideFieldData
 
@@ -129,6 +130,10 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
 
     chapters with name 'hidden' are skipped.
 
+    The chapters and sections are read from the course's precomputed outline
+    when possible, so that only the user's access to them is checked here,
+    instead of binding each of them.
+
     NOTE: assumes that if we got this far, user has access to course.  Returns
     None if this is not the case.
 
@@ -140,8 +145,16 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
         if course_module is None:
             return None
 
+        outline = None
+        if not settings.FIELD_OVERRIDE_PROVIDERS:
+            # the outline doesn't include overrides of the fields (e.g. due dates) for individual users
+            outline = get_course_outline(course)
+        if outline is not None:
+            chapters = _outline_chapters(request.user, course, outline)
+        else:
+            chapters = _module_chapters(course_module)
+
         toc_chapters = list()
-        chapters = course_module.get_display_items()
 
         # See if the course is gated by one or more content milestones
         required_content = milestones_helpers.get_required_content(course, request.user)
@@ -155,36 +168,85 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
             # chapter.hide_from_toc is read-only (boo)
             local_hide_from_toc = False
             if required_content:
-                if unicode(chapter.location) not in required_content:
+                if chapter['usage_key'] not in required_content:
                     local_hide_from_toc = True
 
             # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+            if chapter['hide_from_toc'] or local_hide_from_toc:
                 continue
 
             sections = list()
-            for section in chapter.get_display_items():
+            for section in chapter['sections']:
 
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
+                active = (chapter['url_name'] == active_chapter and
+                          section['url_name'] == active_section)
 
-                if not section.hide_from_toc:
-                    sections.append({'display_name': section.display_name_with_default,
-                                     'url_name': section.url_name,
-                                     'format': section.format if section.format is not None else '',
-                                     'due': section.due,
+                if not section['hide_from_toc']:
+                    sections.append({'display_name': section['display_name'],
+                                     'url_name': section['url_name'],
+                                     'format': section['format'] if section['format'] is not None else '',
+                                     'due': section['due'],
                                      'active': active,
-                                     'graded': section.graded,
+                                     'graded': section['graded'],
                                      })
             toc_chapters.append({
-                'display_name': chapter.display_name_with_default,
-                'url_name': chapter.url_name,
+                'display_name': chapter['display_name'],
+                'url_name': chapter['url_name'],
                 'sections': sections,
-                'active': chapter.url_name == active_chapter
+                'active': chapter['url_name'] == active_chapter
             })
         return toc_chapters
 
 
+def _module_chapters(course_module):
+    """
+    Returns the chapters (and their sections) of the bound `course_module` which
+    are displayed to its user, in the format of `_outline_chapters`.
+    """
+    chapters = []
+    for chapter in course_module.get_display_items():
+        chapters.append({
+            'usage_key': unicode(chapter.location),
+            'url_name': chapter.url_name,
+            'display_name': chapter.display_name_with_default,
+            'hide_from_toc': chapter.hide_from_toc,
+            'sections': [
+                {
+                    'url_name': section.url_name,
+                    'display_name': section.display_name_with_default,
+                    'hide_from_toc': section.hide_from_toc,
+                    'format': section.format,
+                    'due': section.due,
+                    'graded': section.graded,
+                }
+                for section in chapter.get_display_items()
+            ],
+        })
+    return chapters
+
+
+def _outline_chapters(user, course, outline):
+    """
+    Returns the chapters (and their sections) of the precomputed `outline` of
+    `course` which `user` has access to.
+    """
+    chapters = []
+    for chapter in outline['chapters']:
+        if not has_access_to_outline_block(user, chapter, course.id):
+            continue
+        chapter = dict(
+            chapter,
+            usage_key=unicode(UsageKey.from_string(chapter['usage_key']).map_into_course(course.id)),
+            sections=[
+                dict(section, due=outline_date(section['due']))
+                for section in chapter['sections']
+                if has_access_to_outline_block(user, section, course.id)
+            ]
+        )
+        chapters.append(chapter)
+    return chapters
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -1,15 +1,23 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError
 from django.http import Http404
+from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from pytz import UTC
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import grade, iterate_grades_for, prefetch_scores
+from courseware.models import StudentModule, StudentSectionGrade
+from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.partitions.partitions import Group, UserPartition
 
 
 def _grade_with_errors(student, request, course, keep_raw_scores=False):
@@ -106,8 +114,41 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_batched_grades_match_unbatched(self):
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        sequential = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        problem = ItemFactory.create(parent=sequential, category='problem')
+        for earned, student in enumerate(self.students):
+            StudentModuleFactory.create(
+                student=student,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                grade=earned,
+                max_grade=len(self.students),
+            )
+
+        unbatched, _ = self._gradesets_and_errors_for(self.course.id, self.students)
+        batched, _ = self._gradesets_and_errors_for(self.course.id, self.students, batch_size=2)
+        for student in self.students:
+            self.assertEqual(batched[student]['percent'], unbatched[student]['percent'])
+
+    def test_batched_grades_do_not_query_per_problem(self):
+        with patch('courseware.grades.StudentModule.objects.get') as mock_get:
+            all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students, batch_size=2)
+        self.assertFalse(mock_get.called)
+        self.assertEqual(len(all_gradesets), 5)
+        self.assertEqual(len(all_errors), 0)
+
+    def test_prefetched_submissions_scores(self):
+        scores = {'i4x://edX/1000/openassessment/essay': (1, 2)}
+        with patch('courseware.grades.sub_api.get_scores', return_value=scores) as mock_get_scores:
+            prefetched = prefetch_scores(self.course, self.students)
+        self.assertEqual(mock_get_scores.call_count, len(self.students))
+        for student in self.students:
+            self.assertEqual(prefetched[student.id].submissions_scores, scores)
+
     ################################# Helpers #################################
-    def _gradesets_and_errors_for(self, course_id, students):
+    def _gradesets_and_errors_for(self, course_id, students, batch_size=None):
         """Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
         gradesets, and one that has only students that could not be graded and
@@ -115,9 +156,167 @@ class TestGradeIteration(ModuleStoreTestCase):
         students_to_gradesets = {}
         students_to_errors = {}
 
-        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, batch_size=batch_size):
             students_to_gradesets[student] = gradeset
             if err_msg:
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@attr('shard_1')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SECTION_GRADES': True})
+class TestPersistentSectionGrades(ModuleStoreTestCase):
+    """
+    Test that section subgrades are persisted and invalidated.
+    """
+    def setUp(self):
+        super(TestPersistentSectionGrades, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequential = ItemFactory.create(
+            parent=chapter, category='sequential', graded=True, format='Homework'
+        )
+        self.problem = ItemFactory.create(parent=self.sequential, category='problem')
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _grade(self):
+        """
+        Grades the student, returning the totaled score of the sequential.
+        """
+        course = self.store.get_course(self.course.id)
+        return grade(self.student, self.request, course)['totaled_scores']['Homework'][0]
+
+    def _set_problem_grade(self, earned, possible):
+        """
+        Saves a StudentModule with the given grade for the problem.
+        """
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=earned,
+            max_grade=possible,
+        )
+
+    def test_section_grade_is_persisted(self):
+        self._set_problem_grade(1, 2)
+        self.assertEqual(self._grade().earned, 1)
+        self.assertEqual(StudentSectionGrade.objects.filter(student=self.student).count(), 1)
+
+        with patch('courseware.grades.get_score') as mock_get_score:
+            self.assertEqual(self._grade().earned, 1)
+            self.assertFalse(mock_get_score.called)
+
+    def test_student_module_save_invalidates(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        student_module = StudentModule.objects.get(student=self.student)
+        student_module.grade = 2
+        student_module.save()
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student).exists())
+        self.assertEqual(self._grade().earned, 2)
+
+    def test_unrelated_student_module_does_not_invalidate(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.course.location,
+            module_type='course',
+        )
+        self.assertTrue(StudentSectionGrade.objects.filter(student=self.student).exists())
+
+    def test_blocks_are_persisted(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        section_grade = StudentSectionGrade.objects.get(student=self.student)
+        self.assertItemsEqual(
+            [block.usage_key for block in section_grade.blocks.all()],
+            [self.sequential.location, self.problem.location]
+        )
+
+    def test_regrade_updates_section_grade(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        scores = {self.problem.location.to_deprecated_string(): (2, 2)}
+        with patch('courseware.grades.sub_api.get_scores', return_value=scores):
+            self._grade()
+        section_grade = StudentSectionGrade.objects.get(student=self.student)
+        self.assertEqual(section_grade.blocks.count(), 2)
+
+        with patch('courseware.grades.sub_api.get_scores', return_value=scores):
+            with patch('courseware.grades.get_score') as mock_get_score:
+                self.assertEqual(self._grade().earned, 2)
+                self.assertFalse(mock_get_score.called)
+
+    def test_concurrent_save(self):
+        self._set_problem_grade(1, 2)
+        with patch('courseware.grades.StudentSectionGradeBlock.objects.bulk_create') as mock_bulk_create:
+            mock_bulk_create.side_effect = IntegrityError
+            self.assertEqual(self._grade().earned, 1)
+
+    def test_invalidation_disabled(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SECTION_GRADES': False}):
+            with patch('courseware.models.StudentSectionGrade.objects.filter') as mock_filter:
+                StudentModule.objects.get(student=self.student).save()
+                self.assertFalse(mock_filter.called)
+
+    def test_submissions_scores_change_invalidates(self):
+        self._set_problem_grade(1, 2)
+        self._grade()
+
+        scores = {self.problem.location.to_deprecated_string(): (2, 2)}
+        with patch('courseware.grades.sub_api.get_scores', return_value=scores):
+            self.assertEqual(self._grade().earned, 2)
+
+    def test_access_denied_is_not_persisted(self):
+        self._set_problem_grade(1, 2)
+        ItemFactory.create(
+            parent=self.sequential, category='problem', start=datetime.now(UTC) + timedelta(days=1)
+        )
+        self._grade()
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student).exists())
+
+    def test_group_restricted_is_not_persisted(self):
+        self._set_problem_grade(1, 2)
+        ItemFactory.create(parent=self.sequential, category='problem', group_access={0: [1]})
+        self._grade()
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student).exists())
+
+    def test_group_restricted_vertical_is_not_persisted(self):
+        self._set_problem_grade(1, 2)
+        vertical = ItemFactory.create(parent=self.sequential, category='vertical', group_access={0: [1]})
+        ItemFactory.create(parent=vertical, category='problem')
+        self._grade()
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student).exists())
+
+    def test_split_test_is_not_persisted(self):
+        course = self.store.get_course(self.course.id)
+        course.user_partitions = [
+            UserPartition(0, 'first_partition', 'First Partition', [Group(0, 'alpha'), Group(1, 'beta')])
+        ]
+        self.store.update_item(course, self.user.id)
+        self._set_problem_grade(1, 2)
+        vertical = ItemFactory.create(parent=self.sequential, category='vertical')
+        split_test = ItemFactory.create(parent=vertical, category='split_test', user_partition_id='0')
+        conditions = {}
+        for group_id in ('0', '1'):
+            conditions[group_id] = ItemFactory.create(parent=split_test, category='vertical').location
+            ItemFactory.create(parent_location=conditions[group_id], category='problem')
+        split_test = self.store.get_item(split_test.location)
+        split_test.group_id_to_child = conditions
+        self.store.update_item(split_test, self.user.id)
+        self._grade()
+        self.assertFalse(StudentSectionGrade.objects.filter(student=self.student).exists())
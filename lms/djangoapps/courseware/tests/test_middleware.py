@@ -4,12 +4,15 @@ Tests for courseware middleware
 
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
-from django.http import Http404
+from django.http import Http404, HttpResponse
+from django.test import TestCase
 from mock import patch
 from nose.plugins.attrib import attr
 
 import courseware.courses as courses
-from courseware.middleware import RedirectUnenrolledMiddleware
+from courseware.middleware import RedirectUnenrolledMiddleware, FieldDataCacheQueryCountMiddleware
+from courseware.model_data import QUERY_COUNT_KEY
+from request_cache.middleware import RequestCache
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -52,3 +55,18 @@ class CoursewareMiddlewareTestCase(ModuleStoreTestCase):
             request, Http404()
         )
         self.assertIsNone(response)
+
+
+class FieldDataCacheQueryCountMiddlewareTestCase(TestCase):
+    """Tests that the number of FieldDataCache queries made by each request is reported"""
+
+    @patch('courseware.middleware.dog_stats_api')
+    def test_report_query_count(self, mock_dog_stats_api):
+        request = RequestFactory().get("dummy_url")
+        RequestCache().process_request(request)
+        RequestCache.get_request_cache().data[QUERY_COUNT_KEY] = 3
+        FieldDataCacheQueryCountMiddleware().process_response(request, HttpResponse())
+        mock_dog_stats_api.histogram.assert_called_once_with('lms.courseware.field_data_cache.queries', 3)
+
+        FieldDataCacheQueryCountMiddleware().process_response(request, HttpResponse())
+        self.assertEqual(mock_dog_stats_api.histogram.call_count, 1)
@@ -20,6 +20,7 @@ from xblock.fields import Scope, BlockScope, ScopeIds
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.core import XBlock
 from django.test import TestCase
+from django.test.client import RequestFactory
 from django.db import DatabaseError
 
 
@@ -402,3 +403,50 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr('shard_1')
+class TestLazyFieldDataCache(TestCase):
+    """Tests for lazily loaded and request scoped FieldDataCaches"""
+    def setUp(self):
+        super(TestLazyFieldDataCache, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+        self.other_descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.other_descriptor.scope_ids = ScopeIds('user1', 'mock_problem', location('def_id'), location('other_id'))
+        StudentModuleFactory(
+            student=self.user, module_state_key=location('other_id'), state=json.dumps({'a_field': 'other_value'})
+        )
+
+    def test_lazy_loading(self):
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache(
+                [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user, lazy=True
+            )
+        kvs = DjangoKeyValueStore(field_data_cache)
+
+        # descriptors added before the scope is accessed are queried together
+        field_data_cache.add_descriptors_to_cache([self.other_descriptor])
+        with self.assertNumQueries(1):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertEquals('other_value', kvs.get(
+                DjangoKeyValueStore.Key(Scope.user_state, 1, location('other_id'), 'a_field')
+            ))
+
+        # descriptors which are already loaded aren't queried again
+        field_data_cache.add_descriptors_to_cache([self.other_descriptor])
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+        self.assertEquals(field_data_cache.num_queries, 1)
+
+    def test_for_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        field_data_cache = FieldDataCache.for_request(request, course_id)
+        self.assertIs(FieldDataCache.for_request(request, course_id, self.user), field_data_cache)
+        self.assertIsNot(FieldDataCache.for_request(request, course_id, UserFactory.create()), field_data_cache)
+        other_request = RequestFactory().get('/')
+        other_request.user = self.user
+        self.assertIsNot(FieldDataCache.for_request(other_request, course_id), field_data_cache)
+        self.assertTrue(field_data_cache.lazy)
@@ -5,6 +5,7 @@ Test for lms courseware app, module render unit
 import ddt
 import itertools
 import json
+from datetime import datetime, timedelta
 from nose.plugins.attrib import attr
 from functools import partial
 
@@ -19,6 +20,7 @@ from mock import MagicMock, patch, Mock
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from pyquery import PyQuery
+from pytz import UTC
 from courseware.module_render import hash_resource
 from xblock.field_data import FieldData
 from xblock.runtime import Runtime
@@ -33,11 +35,16 @@ from courseware.field_overrides import OverrideFieldData
 from courseware.model_data import FieldDataCache
 from courseware.module_render import hash_resource, get_module_for_descriptor
 from courseware.models import StudentModule
-from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
+from courseware.tests.factories import (
+    BetaTesterFactory, GlobalStaffFactory, StaffFactory, StudentModuleFactory, UserFactory
+)
 from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
+from openedx.core.djangoapps.content.course_structures.outline import get_course_outline
+import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
+from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from student.models import anonymous_id_for_user
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_MIXED_TOY_MODULESTORE,
@@ -48,6 +55,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import ItemFactory, CourseFactory, check_mongo_calls
+from xmodule.partitions.partitions import Group, UserPartition
 from xmodule.x_module import XModuleDescriptor, XModule, STUDENT_VIEW, CombinedSystem
 
 TEST_DATA_DIR = settings.COMMON_TEST_DATA_ROOT
@@ -600,6 +608,91 @@ class TestTOC(ModuleStoreTestCase):
                 self.assertIn(toc_section, actual)
 
 
+@attr('shard_1')
+@ddt.ddt
+@patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+class TestOutlineTOC(ModuleStoreTestCase):
+    """
+    Check that the Table of Contents computed from a course's precomputed outline
+    is the one computed from its modules
+    """
+    def setup_course(self):
+        """
+        Create a course whose chapters and sections are only shown to some users.
+        """
+        now = datetime.now(UTC)
+        self.partition = UserPartition(  # pylint: disable=attribute-defined-outside-init
+            0, 'Partition', 'Partition for the outline', [Group(0, 'Group A'), Group(1, 'Group B')],
+            scheme_id='random'
+        )
+        self.course = CourseFactory.create(  # pylint: disable=attribute-defined-outside-init
+            start=now - timedelta(days=30), user_partitions=[self.partition]
+        )
+        chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Open Chapter')
+        for display_name, fields in (
+                ('Open Section', {}),
+                ('Future Section', {'start': now + timedelta(days=10)}),
+                ('Beta Section', {'start': now + timedelta(days=2), 'days_early_for_beta': 5}),
+                ('Staff Section', {'visible_to_staff_only': True}),
+                ('Group A Section', {'group_access': {0: [0]}}),
+                ('Group B Section', {'group_access': {0: [1]}}),
+        ):
+            ItemFactory.create(parent=chapter, category='sequential', display_name=display_name, **fields)
+        future_chapter = ItemFactory.create(
+            parent=self.course, category='chapter', display_name='Future Chapter', start=now + timedelta(days=10)
+        )
+        ItemFactory.create(parent=future_chapter, category='sequential', display_name='Future Chapter Section')
+        group_chapter = ItemFactory.create(
+            parent=self.course, category='chapter', display_name='Group B Chapter', group_access={0: [1]}
+        )
+        ItemFactory.create(parent=group_chapter, category='sequential', display_name='Group B Chapter Section')
+
+    def toc(self, user, use_outline):
+        """
+        Returns the toc of the course for `user`, computed from the course's outline or its modules.
+        """
+        request = RequestFactory().get('/courses/{}/courseware'.format(self.course.id))
+        request.user = user
+        course = self.store.get_course(self.course.id, depth=2)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, user, course, depth=2)
+        with patch('courseware.module_render.get_course_outline') as mock_get_course_outline:
+            mock_get_course_outline.side_effect = get_course_outline if use_outline else lambda course: None
+            toc = render.toc_for_course(request, course, None, None, field_data_cache)
+        self.assertTrue(mock_get_course_outline.called)
+        return toc
+
+    @ddt.data(*itertools.product(
+        (ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split),
+        ('student', 'beta', 'staff'),
+    ))
+    @ddt.unpack
+    def test_outline_toc(self, default_ms, user_kind):
+        with self.store.default_store(default_ms):
+            self.setup_course()
+        user = {
+            'student': UserFactory,
+            'beta': partial(BetaTesterFactory, course_key=self.course.id),
+            'staff': partial(StaffFactory, course_key=self.course.id),
+        }[user_kind]()
+        partition_key = RandomUserPartitionScheme.key_for_partition(self.partition)
+        course_tag_api.set_course_tag(user, self.course.id, partition_key, 0)
+        expected_sections = {
+            'student': ['Open Section', 'Group A Section'],
+            'beta': ['Open Section', 'Beta Section', 'Group A Section'],
+            'staff': [
+                'Open Section', 'Future Section', 'Beta Section', 'Staff Section', 'Group A Section',
+                'Group B Section', 'Future Chapter Section', 'Group B Chapter Section',
+            ],
+        }[user_kind]
+
+        toc = self.toc(user, use_outline=True)
+        self.assertEqual(
+            [section['display_name'] for chapter in toc for section in chapter['sections']],
+            expected_sections
+        )
+        self.assertEqual(toc, self.toc(user, use_outline=False))
+
+
 @attr('shard_1')
 @ddt.ddt
 class TestHtmlModifiers(ModuleStoreTestCase):
@@ -401,7 +401,7 @@ def _index_bulk_op(request, course_key, chapter, section, position):
 
     try:
         field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-            course_key, user, course, depth=2)
+            course_key, user, course, depth=2, request=request)
 
         course_module = get_module_for_descriptor(user, request, course, field_data_cache, course_key)
         if course_module is None:
@@ -1176,7 +1176,7 @@ def get_static_tab_contents(request, course, tab):
         tab.url_slug,
     )
     field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-        course.id, request.user, modulestore().get_item(loc), depth=0
+        course.id, request.user, modulestore().get_item(loc), depth=0, request=request
     )
     tab_module = get_module(
         request.user, request, loc, field_data_cache, static_asset_path=course.static_asset_path
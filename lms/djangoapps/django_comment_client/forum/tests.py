@@ -17,6 +17,8 @@ from django_comment_client.tests.group_id import (
 from django_comment_client.tests.unicode import UnicodeTestMixin
 from django_comment_client.tests.utils import CohortedTestCase, ContentGroupTestCase
 from django_comment_client.utils import strip_none
+from django_comment_common.models import PERMISSIONS_REQUEST_CACHE_KEY
+from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from util.testing import UrlResetMixin
 from xmodule.modulestore import ModuleStoreEnum
@@ -315,12 +317,13 @@ class SingleThreadQueryCountTestCase(ModuleStoreTestCase):
     MODULESTORE = TEST_DATA_MONGO_MODULESTORE
 
     @ddt.data(
-        # old mongo with cache: 15
-        (ModuleStoreEnum.Type.mongo, 1, 21, 15, 40, 27),
-        (ModuleStoreEnum.Type.mongo, 50, 315, 15, 628, 27),
-        # split mongo: 3 queries, regardless of thread response size.
-        (ModuleStoreEnum.Type.split, 1, 3, 3, 40, 27),
-        (ModuleStoreEnum.Type.split, 50, 3, 3, 628, 27),
+        # the user's forum permissions are resolved once per request, regardless of thread response size.
+        # old mongo: 7 queries, 6 with cache
+        (ModuleStoreEnum.Type.mongo, 1, 7, 6, 12, 9),
+        (ModuleStoreEnum.Type.mongo, 50, 7, 6, 12, 9),
+        # split mongo: 3 queries
+        (ModuleStoreEnum.Type.split, 1, 3, 3, 12, 9),
+        (ModuleStoreEnum.Type.split, 50, 3, 3, 12, 9),
     )
     @ddt.unpack
     def test_number_of_mongo_queries(
@@ -378,7 +381,8 @@ class SingleThreadQueryCountTestCase(ModuleStoreTestCase):
         ]
         for single_thread_cache, expected_mongo_calls, expected_sql_queries in cached_calls:
             single_thread_cache.clear()
-            with patch("django_comment_client.permissions.CACHE", single_thread_cache):
+            RequestCache.get_request_cache().data.pop(PERMISSIONS_REQUEST_CACHE_KEY, None)
+            with patch("django_comment_common.models.cache", single_thread_cache):
                 with self.assertNumQueries(expected_sql_queries):
                     with check_mongo_calls(expected_mongo_calls):
                         call_single_thread()
@@ -4,35 +4,22 @@ Module for checking permissions with the comment_client backend
 
 import logging
 from types import NoneType
-from django.core import cache
+from django_comment_common.models import get_user_permissions
 from lms.lib.comment_client import Thread
 from opaque_keys.edx.keys import CourseKey
 
-CACHE = cache.get_cache('default')
-CACHE_LIFESPAN = 60
-
 
 def cached_has_permission(user, permission, course_id=None):
     """
-    Call has_permission if it's not cached. A change in a user's role or
-    a role's permissions will only become effective after CACHE_LIFESPAN seconds.
+    Call has_permission. The user's permissions in the course are resolved
+    once per request, and cached (see get_user_permissions).
     """
-    assert isinstance(course_id, (NoneType, CourseKey))
-    key = u"permission_{user_id:d}_{course_id}_{permission}".format(
-        user_id=user.id, course_id=course_id, permission=permission)
-    val = CACHE.get(key, None)
-    if val not in [True, False]:
-        val = has_permission(user, permission, course_id=course_id)
-        CACHE.set(key, val, CACHE_LIFESPAN)
-    return val
+    return has_permission(user, permission, course_id=course_id)
 
 
 def has_permission(user, permission, course_id=None):
     assert isinstance(course_id, (NoneType, CourseKey))
-    for role in user.roles.filter(course_id=course_id):
-        if role.has_permission(permission):
-            return True
-    return False
+    return permission in get_user_permissions(user, course_id)
 
 
 CONDITIONS = ['is_open', 'is_author', 'is_question_author']
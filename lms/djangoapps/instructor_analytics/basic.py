@@ -15,6 +15,8 @@ from django.core.urlresolvers import reverse
 import xmodule.graders as xmgraders
 from django.core.exceptions import ObjectDoesNotExist
 from microsite_configuration import microsite
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup
+from util.query import use_read_replica_if_available
 
 
 STUDENT_FEATURES = ('id', 'username', 'first_name', 'last_name', 'is_staff', 'email')
@@ -35,6 +37,9 @@ AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at')
 COUPON_FEATURES = ('code', 'course_id', 'percentage_discount', 'description', 'expiration_date', 'is_active')
 
+# The number of students whose features are read from the database at once
+ENROLLED_STUDENTS_CHUNK_SIZE = 1000
+
 
 def sale_order_record_features(course_id, features):
     """
@@ -159,54 +164,80 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features))
+
+
+def iter_enrolled_students_features(course_key, features, chunk_size=ENROLLED_STUDENTS_CHUNK_SIZE):
+    """
+    Yield the features of each enrolled student as a dictionary (see
+    enrolled_students_features), ordered by username.
+
+    The students are read (from the read replica, if there is one) in chunks
+    of `chunk_size`, paginated by username, and only the requested columns are
+    read, so that memory use doesn't grow with the number of students.
+    """
     include_cohort_column = 'cohort' in features
+    student_features = [x for x in STUDENT_FEATURES if x in features]
+    profile_features = [x for x in PROFILE_FEATURES if x in features]
+
+    # For data extractions on the 'meta' field
+    # the feature name should be in the format of 'meta.foo' where
+    # 'foo' is the keyname in the meta dictionary
+    meta_features = []
+    for feature in features:
+        if 'meta.' in feature:
+            meta_key = feature.split('.')[1]
+            meta_features.append((feature, meta_key))
+
+    # the students are paginated by username, and their cohorts are looked up by id
+    columns = set(student_features) | {'id', 'username'}
+    columns.update('profile__' + feature for feature in profile_features)
+    if meta_features:
+        columns.add('profile__meta')
 
     students = User.objects.filter(
         courseenrollment__course_id=course_key,
         courseenrollment__is_active=1,
-    ).order_by('username').select_related('profile')
-
-    if include_cohort_column:
-        students = students.prefetch_related('course_groups')
-
-    def extract_student(student, features):
-        """ convert student to dictionary """
-        student_features = [x for x in STUDENT_FEATURES if x in features]
-        profile_features = [x for x in PROFILE_FEATURES if x in features]
-
-        # For data extractions on the 'meta' field
-        # the feature name should be in the format of 'meta.foo' where
-        # 'foo' is the keyname in the meta dictionary
-        meta_features = []
-        for feature in features:
-            if 'meta.' in feature:
-                meta_key = feature.split('.')[1]
-                meta_features.append((feature, meta_key))
-
-        student_dict = dict((feature, getattr(student, feature))
-                            for feature in student_features)
-        profile = student.profile
-        if profile is not None:
-            profile_dict = dict((feature, getattr(profile, feature))
-                                for feature in profile_features)
-            student_dict.update(profile_dict)
-
-            # now featch the requested meta fields
-            meta_dict = json.loads(profile.meta) if profile.meta else {}
-            for meta_feature, meta_key in meta_features:
-                student_dict[meta_feature] = meta_dict.get(meta_key)
+    ).order_by('username')
+
+    last_username = None
+    while True:
+        chunk = students if last_username is None else students.filter(username__gt=last_username)
+        chunk = list(use_read_replica_if_available(chunk).values(*columns)[:chunk_size])
+        if not chunk:
+            return
+        last_username = chunk[-1]['username']
 
         if include_cohort_column:
-            # Note that we use student.course_groups.all() here instead of
-            # student.course_groups.filter(). The latter creates a fresh query,
-            # therefore negating the performance gain from prefetch_related().
-            student_dict['cohort'] = next(
-                (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
-                "[unassigned]"
+            cohort_names = {}
+            memberships = use_read_replica_if_available(
+                CourseUserGroup.users.through.objects.filter(
+                    user__in=[student['id'] for student in chunk],
+                    courseusergroup__course_id=course_key,
+                )
+            ).values_list('user', 'courseusergroup__name')
+            for user_id, cohort_name in memberships:
+                cohort_names.setdefault(user_id, cohort_name)
+
+        for student in chunk:
+            student_dict = dict((feature, student[feature]) for feature in student_features)
+            student_dict.update(
+                (feature, student['profile__' + feature]) for feature in profile_features
             )
-        return student_dict
 
-    return [extract_student(student, features) for student in students]
+            # now fetch the requested meta fields
+            if meta_features:
+                meta = student['profile__meta']
+                meta_dict = json.loads(meta) if meta else {}
+                for meta_feature, meta_key in meta_features:
+                    student_dict[meta_feature] = meta_dict.get(meta_key)
+
+            if include_cohort_column:
+                student_dict['cohort'] = cohort_names.get(student['id'], "[unassigned]")
+            yield student_dict
+
+        if len(chunk) < chunk_size:
+            return
 
 
 def coupon_codes_features(features, coupons_list):
@@ -15,7 +15,7 @@ from shoppingcart.models import (
 from course_modes.models import CourseMode
 from instructor_analytics.basic import (
     sale_record_features, sale_order_record_features, enrolled_students_features, course_registration_features,
-    coupon_codes_features, AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES
+    coupon_codes_features, iter_enrolled_students_features, AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES
 )
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from courseware.tests.factories import InstructorFactory
@@ -95,9 +95,8 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
 
         query_features = ('username', 'cohort')
         # There should be a constant of 2 SQL queries when calling
-        # enrolled_students_features.  The first query comes from the call to
-        # User.objects.filter(...), and the second comes from
-        # prefetch_related('course_groups').
+        # enrolled_students_features.  The first query reads the students, and
+        # the second reads their cohorts.
         with self.assertNumQueries(2):
             userreports = enrolled_students_features(course.id, query_features)
         self.assertEqual(len([r for r in userreports if r['username'] in cohorted_usernames]), len(cohorted_students))
@@ -109,6 +108,15 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
             else:
                 self.assertEqual(report['cohort'], '[unassigned]')
 
+    def test_iter_enrolled_students_features_chunks(self):
+        query_features = ('username', 'email', 'meta.position')
+        userreports = list(iter_enrolled_students_features(self.course_key, query_features, chunk_size=7))
+        self.assertEqual(userreports, enrolled_students_features(self.course_key, query_features))
+        self.assertEqual(
+            [report['username'] for report in userreports],
+            sorted(user.username for user in self.users)
+        )
+
     def test_available_features(self):
         self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES))
         self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES))
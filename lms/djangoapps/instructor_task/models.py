@@ -19,6 +19,7 @@ import csv
 import json
 import hashlib
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -35,6 +36,11 @@ from xmodule_django.models import CourseKeyField
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 
+# The process's umask (which can only be read by setting it), for giving the
+# reports LocalFSReportStore writes to temporary files the usual permissions.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 class InstructorTask(models.Model):
     """
@@ -193,9 +199,10 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows()` accepts any iterable of rows, including
+    generators, and writes them out incrementally, so callers never need to
+    hold a whole report in memory. A file only becomes visible in
+    `links_for()` once all of its rows have been written.
     """
     @classmethod
     def from_config(cls):
@@ -218,6 +225,14 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing utf-8 encoded CSV data, yield
+        its rows as lists of unicode strings.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -231,6 +246,11 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # Once this much gzip'd data has been buffered, it is uploaded as a part
+    # of a multipart upload. S3 requires all parts but the last to be at least
+    # 5MB.
+    MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -309,7 +329,9 @@ class S3ReportStore(ReportStore):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
         strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        that buffer. If the gzip'd data grows beyond `MULTIPART_CHUNK_SIZE`, it
+        is instead sent in chunks as a multipart upload, which S3 only makes
+        visible once it is completed.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
@@ -317,10 +339,43 @@ class S3ReportStore(ReportStore):
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
-
-        self.store(course_id, filename, output_buffer)
+        multipart_upload = None
+        num_parts = 0
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= self.MULTIPART_CHUNK_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            self.key_for(course_id, filename).key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+                        )
+                    num_parts += 1
+                    self._upload_part(multipart_upload, num_parts, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, output_buffer)
+            else:
+                num_parts += 1
+                self._upload_part(multipart_upload, num_parts, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            # Discard the parts uploaded so far; they are never visible
+            # as a key in the bucket.
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def _upload_part(self, multipart_upload, part_number, output_buffer):
+        """
+        Upload the contents of `output_buffer` as part `part_number` of
+        `multipart_upload`, then empty the buffer.
+        """
+        output_buffer.seek(0)
+        multipart_upload.upload_part_from_file(output_buffer, part_number)
+        output_buffer.seek(0)
+        output_buffer.truncate()
 
     def links_for(self, course_id):
         """
@@ -328,11 +383,30 @@ class S3ReportStore(ReportStore):
         can be plugged straight into an href
         """
         course_dir = self.key_for(course_id, '')
+        # Listing with a delimiter returns "subdirectories" (such as those
+        # holding partial reports) as Prefix objects, which we skip.
+        keys = [key for key in self.bucket.list(prefix=course_dir.key, delimiter='/') if isinstance(key, Key)]
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
-            for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            for key in sorted(keys, reverse=True, key=lambda k: k.last_modified)
         ]
 
+    def rows_for(self, course_id, filename):
+        """
+        Yield the rows of the CSV file previously stored by `store_rows()` for
+        the given `course_id` and `filename`, as lists of unicode strings.
+        """
+        key = self.key_for(course_id, filename)
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        for row in self._get_utf8_decoded_rows(gzip_file):
+            yield row
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file stored for the given `course_id` and `filename`.
+        """
+        self.key_for(course_id, filename).delete()
+
 
 class LocalFSReportStore(ReportStore):
     """
@@ -344,6 +418,10 @@ class LocalFSReportStore(ReportStore):
     This lets us do the cheap thing locally for debugging without having to open
     up a separate URL that would only be used to send files in dev.
     """
+    # Subdirectory of each course's directory where reports are written
+    # before being moved into place.
+    TEMP_DIRECTORY = '.tmp'
+
     def __init__(self, root_path):
         """
         Initialize with root_path where we're going to store our files. We
@@ -381,7 +459,7 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -390,12 +468,28 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
-        """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
 
-        self.store(course_id, filename, output_buffer)
+        Rows are appended to a temporary file as they are generated, which is
+        renamed to `filename` once complete.
+        """
+        full_path = self.path_to(course_id, filename)
+        temp_directory = self.path_to(course_id, self.TEMP_DIRECTORY)
+        for directory in (os.path.dirname(full_path), temp_directory):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        temp_fd, temp_path = tempfile.mkstemp(dir=temp_directory)
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                csvwriter = csv.writer(temp_file)
+                for row in self._get_utf8_encoded_rows(rows):
+                    csvwriter.writerow(row)
+            # mkstemp creates the file readable by its owner only
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+            os.rename(temp_path, full_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
 
     def links_for(self, course_id):
         """
@@ -408,10 +502,29 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if os.path.isfile(os.path.join(course_dir, filename))
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
             (filename, ("file://" + urllib.quote(full_path)))
             for filename, full_path in files
         ]
+
+    def rows_for(self, course_id, filename):
+        """
+        Yield the rows of the CSV file previously stored by `store_rows()` for
+        the given `course_id` and `filename`, as lists of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as csv_file:
+            for row in self._get_utf8_decoded_rows(csv_file):
+                yield row
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file stored for the given `course_id` and `filename`.
+        """
+        os.remove(self.path_to(course_id, filename))
@@ -35,6 +35,7 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    run_grade_report_shard,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -155,6 +156,22 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(  # pylint: disable=not-callable
+    routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    default_retry_delay=settings.GRADES_DOWNLOAD_SHARD_DEFAULT_RETRY_DELAY,
+    max_retries=settings.GRADES_DOWNLOAD_SHARD_MAX_RETRIES,
+)
+def calculate_grades_csv_shard(entry_id, action_name, user_ids, subtask_status_dict):
+    """
+    Grade a range of the students enrolled in a course, as a subtask of
+    `calculate_grades_csv`, and store the partial grade report.
+
+    `user_ids` are the ids of the students to grade, and `subtask_status_dict`
+    is the initial status of this subtask, as created by SubtaskStatus.to_dict().
+    """
+    return run_grade_report_shard(entry_id, action_name, user_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -4,14 +4,20 @@ running state of a course.
 
 """
 import json
+import random
+import sys
+import traceback
 from datetime import datetime
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.exceptions import RetryTaskError
+from celery.states import SUCCESS, FAILURE, RETRY
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -28,9 +34,16 @@ from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iter_enrolled_students_features
+from instructor_analytics.csvs import iter_dictlist_rows
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -536,6 +549,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows may be given. Generators are consumed as
+            the CSV is written, without building the whole list in memory.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -551,7 +566,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -560,15 +575,18 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If more students are enrolled than `settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD`,
+    the students are instead split into ranges that are graded by
+    `calculate_grades_csv_shard` subtasks (see `run_grade_report_shard`).
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -579,7 +597,52 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    students_per_shard = settings.GRADES_DOWNLOAD_STUDENTS_PER_SHARD
+    if students_per_shard and total_enrolled_students > students_per_shard:
+        return _queue_grade_report_shards(
+            _entry_id, action_name, enrolled_students, total_enrolled_students, students_per_shard
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
     course = get_course_by_id(course_id)
+    current_step = {'step': 'Calculating Grades'}
+    err_rows = [["id", "username", "error_msg"]]
+    rows = _grade_report_rows(
+        course, enrolled_students, task_progress, current_step, task_info_string, err_rows
+    )
+
+    # Rows are uploaded as they are generated, so that we never hold the
+    # whole report in memory.
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # By this point, every student has been graded and the grade report is
+    # uploaded. If there are any error rows (don't count the header), write
+    # them out as well
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course, students, task_progress, current_step, task_info_string, err_rows):  # pylint: disable=too-many-statements
+    """
+    Grade each of `students` in `course`, yielding their grade report rows
+    as they are graded, and appending an error report row to `err_rows` for
+    each student that could not be graded.
+
+    The first row yielded is the header, unless no student could be graded,
+    in which case nothing is yielded. The counts of `task_progress` are
+    updated as students are graded.
+    """
+    course_id = course.id
+    action_name = task_progress.action_name
+    status_interval = 100
+
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
 
@@ -590,22 +653,22 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
+    # Loop over all our students and generate our CSV rows
     header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
         action_name,
         current_step,
-        total_enrolled_students
+        total_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    graded_students = iterate_grades_for(
+        course, students, batch_size=settings.GRADES_DOWNLOAD_BATCH_SIZE
+    )
+    for student, gradeset, err_msg in graded_students:
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -620,7 +683,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
                 action_name,
                 current_step,
                 student_counter,
-                total_enrolled_students
+                total_students
             )
 
         if gradeset:
@@ -628,7 +691,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.succeeded += 1
             if not header:
                 header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
+                yield (
                     ["id", "email", "username", "grade"] + header + cohorts_header +
                     group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
                 )
@@ -669,7 +732,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
+            yield (
                 [student.id, student.email, student.username, gradeset['percent']] +
                 row_percents + cohorts_group_name + group_configs_group_names +
                 [enrollment_mode] + [verification_status] + certificate_info
@@ -685,24 +748,262 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         action_name,
         current_step,
         student_counter,
-        total_enrolled_students
+        total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+def _grade_report_part_filename(entry, subtask_id, csv_name):
+    """
+    Return the ReportStore filename of the partial `csv_name` report written
+    by the grade report shard `subtask_id` of the InstructorTask `entry`.
 
-    # If there are any error rows (don't count the header), write them out as well
+    Partial reports are kept in a subdirectory so that they are not listed by
+    `ReportStore.links_for()`.
+    """
+    return u"parts/{task_id}/{subtask_id}_{csv_name}.csv".format(
+        task_id=entry.task_id, subtask_id=subtask_id, csv_name=csv_name
+    )
+
+
+def _queue_grade_report_shards(entry_id, action_name, enrolled_students, total_num_students, students_per_shard):
+    """
+    Queue `calculate_grades_csv_shard` subtasks to grade ranges of at most
+    `students_per_shard` of the `enrolled_students`, in order of user id.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    # Import here to avoid a circular import.
+    from instructor_task.tasks import calculate_grades_csv_shard
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, this task may be rerun if the connection to the
+    # broker is lost while it is being queued. If the shards have already
+    # been queued, there's nothing more to do.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued grade report shards. InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    def _create_grade_report_subtask(to_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `to_list`."""
+        return calculate_grades_csv_shard.subtask(
+            (
+                entry_id,
+                action_name,
+                [item['pk'] for item in to_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students.order_by('id')],
+        [],
+        students_per_shard,
+        total_num_students,
+    )
+
+
+def run_grade_report_shard(entry_id, action_name, user_ids, subtask_status_dict):
+    """
+    Grade the students with the given `user_ids` for the course of the
+    InstructorTask `entry_id`, and store their grade report rows and error
+    report rows as partial reports in the `ReportStore`.
+
+    If grading the shard fails unexpectedly (e.g. the report store is
+    unavailable), the subtask is retried with increasing delays, up to
+    GRADES_DOWNLOAD_SHARD_MAX_RETRIES times, before it is counted as failed.
+
+    Like bulk email's subtasks, the shard takes the subtask's lock (in
+    check_subtask_is_valid), so that a shard which Celery delivers again
+    while it's running, or after it's done, is rejected instead of writing
+    its partial reports and counts a second time.
+
+    The subtask's status is then recorded on the InstructorTask, which
+    aggregates the counts of all of its shards. The shard that completes
+    last merges the partial reports into the final ones, and only then is
+    the InstructorTask marked as succeeded.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_info_string = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Shard: {shard}'.format(
+        task_id=entry.task_id, entry_id=entry_id, course_id=course_id, shard=current_task_id
+    )
+
+    try:
+        task_progress = TaskProgress(action_name, len(user_ids), time())
+        course = get_course_by_id(course_id)
+        students = User.objects.filter(id__in=user_ids).order_by('id')
+        err_rows = [["id", "username", "error_msg"]]
+        rows = _grade_report_rows(
+            course, students, task_progress, {'step': 'Calculating Grades'}, task_info_string, err_rows
+        )
+
+        # The first row of each partial grade report is its header. If no
+        # student in the shard could be graded, the partial report is empty.
+        report_store = ReportStore.from_config()
+        report_store.store_rows(
+            course_id, _grade_report_part_filename(entry, current_task_id, 'grade_report'), rows
+        )
+        report_store.store_rows(
+            course_id, _grade_report_part_filename(entry, current_task_id, 'grade_report_err'), err_rows
+        )
+    except Exception as exc:  # pylint: disable=broad-except
+        exc_info = sys.exc_info()
+        retry_error = _retry_grade_report_shard(entry_id, action_name, user_ids, subtask_status, exc)
+        if retry_error is not None:
+            TASK_LOG.warning(u'%s, Task type: %s, Failed to grade shard, retrying', task_info_string, action_name)
+            raise retry_error  # pylint: disable=raising-bad-type
+
+        # Unexpected exception, and no retries left. Since we don't know how
+        # far the shard got, we count all of its students as having failed.
+        TASK_LOG.exception(u'%s, Task type: %s, Failed to grade shard', task_info_string, action_name)
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status, mark_parent_done=False)
+        _merge_grade_report_parts(entry_id)
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status, mark_parent_done=False)
+    _merge_grade_report_parts(entry_id)
+    return subtask_status.to_dict()
+
+
+def _retry_grade_report_shard(entry_id, action_name, user_ids, subtask_status, exception):
+    """
+    Requeue the `calculate_grades_csv_shard` subtask grading `user_ids`,
+    after it failed with `exception`.
+
+    As with bulk email, the delay doubles with each retry and is skewed by a
+    random factor, so that not all retries are deferred by the same amount.
+
+    Returns the RetryTaskError that needs to be raised back to Celery, or
+    None if the subtask has already been retried its maximum number of times.
+    """
+    # Import here to avoid a circular import.
+    from instructor_task.tasks import calculate_grades_csv_shard
+
+    if subtask_status.retried_withmax >= calculate_grades_csv_shard.max_retries:
+        return None
+
+    countdown = (
+        (2 ** subtask_status.retried_withmax) * calculate_grades_csv_shard.default_retry_delay
+    ) * random.uniform(.75, 1.25)
+    subtask_status.increment(retried_withmax=1, state=RETRY)
+
+    # Update the InstructorTask with the current subtask status *before*
+    # calling retry(), so that there is no race condition between this update
+    # and the update made by the retried task.
+    update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+
+    try:
+        calculate_grades_csv_shard.retry(
+            args=[entry_id, action_name, user_ids, subtask_status.to_dict()],
+            exc=exception,
+            countdown=countdown,
+            throw=True,
+        )
+    except RetryTaskError as retry_error:
+        return retry_error
+
+
+def _merge_grade_report_parts(entry_id):
+    """
+    If all grade report shards of the InstructorTask `entry_id` are done,
+    concatenate their partial reports into the final grade report (and error
+    report, if there were errors), then delete the partial reports.
+
+    Only one shard performs the merge, even if several of them see that all
+    shards are done. Once the final reports are stored, the InstructorTask is
+    marked as succeeded. If the merge fails, the InstructorTask is marked as
+    failed and the partial reports are deleted; the report has to be
+    requested again.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+    lock_key = 'grade-report-merge-{}'.format(entry_id)
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    try:
+        _merge_grade_report_part_files(entry, subtask_dict)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u'Task: %s, Failed to merge grade report shards', entry.task_id)
+        entry.task_state = FAILURE
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.save_now()
+        _delete_grade_report_part_files(entry, subtask_dict['status'].keys())
+    else:
+        entry.task_state = SUCCESS
+        entry.save_now()
+
+
+def _merge_grade_report_part_files(entry, subtask_dict):
+    """
+    Concatenate the partial reports of the succeeded grade report shards of
+    the InstructorTask `entry`, whose subtasks are `subtask_dict`, into the
+    final reports, then delete the partial reports.
+    """
+    course_id = entry.course_id
+    start_date = datetime.fromtimestamp(json.loads(entry.task_output)['start_time'], UTC)
+    report_store = ReportStore.from_config()
+
+    # Shards that failed outright don't have partial reports.
+    subtask_ids = sorted(
+        subtask_id for subtask_id, status in subtask_dict['status'].iteritems()
+        if status['state'] == SUCCESS
+    )
+
+    def _part_rows(csv_name):
+        """Yield the header row of the first partial report, then the body rows of all of them."""
+        header = None
+        for subtask_id in subtask_ids:
+            part_rows = report_store.rows_for(course_id, _grade_report_part_filename(entry, subtask_id, csv_name))
+            part_header = next(part_rows, [])
+            if part_header and header is None:
+                header = part_header
+                yield header
+            for row in part_rows:
+                yield row
+
+    upload_csv_to_report_store(_part_rows('grade_report'), 'grade_report', course_id, start_date)
+    err_rows = list(_part_rows('grade_report_err'))
     if len(err_rows) > 1:
         upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    for subtask_id in subtask_ids:
+        for csv_name in ('grade_report', 'grade_report_err'):
+            report_store.delete(course_id, _grade_report_part_filename(entry, subtask_id, csv_name))
+    TASK_LOG.info(u'Task: %s, Merged %s grade report shards', entry.task_id, len(subtask_ids))
+
+
+def _delete_grade_report_part_files(entry, subtask_ids):
+    """
+    Delete whichever partial reports of the grade report shards `subtask_ids`
+    of the InstructorTask `entry` are still stored, after a failed merge.
+    """
+    report_store = ReportStore.from_config()
+    for subtask_id in subtask_ids:
+        for csv_name in ('grade_report', 'grade_report_err'):
+            filename = _grade_report_part_filename(entry, subtask_id, csv_name)
+            try:
+                report_store.delete(entry.course_id, filename)
+            except Exception:  # pylint: disable=broad-except
+                # Shards that failed outright have no partial reports, and a
+                # merge may have deleted some before failing.
+                TASK_LOG.info(u'Task: %s, No partial grade report %s to delete', entry.task_id, filename)
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -717,21 +1018,25 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # stream the student features table, formatting each row as it's read
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
+    header = query_features
+    rows = iter_dictlist_rows(iter_enrolled_students_features(course_id, query_features), query_features)
 
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    def _counted_rows():
+        """Yield the header and rows of the report, counting the rows as they are uploaded."""
+        yield header
+        for row in rows:
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            yield row
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    upload_csv_to_report_store(_counted_rows(), 'student_profile_info', course_id, start_date)
+    task_progress.skipped = task_progress.total - task_progress.attempted
 
     return task_progress.update_task_state(extra_meta=current_step)
 
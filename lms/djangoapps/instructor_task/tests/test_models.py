@@ -4,6 +4,8 @@ Tests for instructor_task/models.py.
 
 from cStringIO import StringIO
 import mock
+import os
+import stat
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -20,16 +22,49 @@ class MockKey(object):
     def __init__(self, bucket):
         self.last_modified = datetime.now()
         self.bucket = bucket
+        self.key = None
+        self.contents = None
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
+        self.contents = contents
         self.bucket.store_key(self)
 
+    def get_contents_as_string(self):
+        """ Expected method on a Key object. """
+        return self.bucket.get_key(self.key).contents
+
+    def delete(self):
+        """ Expected method on a Key object. """
+        self.bucket.keys.remove(self.bucket.get_key(self.key))
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, bucket, key_name):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.parts = {}
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts[part_num] = fp.read()
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        key = MockKey(self.bucket)
+        key.key = self.key_name
+        key.set_contents_from_string(''.join(self.parts[num] for num in sorted(self.parts)), headers={})
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts = {}
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
@@ -37,12 +72,21 @@ class MockBucket(object):
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
+        self.keys = [stored_key for stored_key in self.keys if stored_key.key != key.key]
         self.keys.append(key)
 
-    def list(self, prefix):  # pylint: disable=unused-argument
+    def get_key(self, key_name):
+        """ Expected method on a Bucket object. """
+        return next(key for key in self.keys if key.key == key_name)
+
+    def list(self, prefix, delimiter=None):  # pylint: disable=unused-argument
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        return MockMultiPartUpload(self, key_name)
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -84,6 +128,30 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows given as a generator are stored, and read back by
+        ReportStore.rows_for().
+        """
+        rows = [[u'id', u'name'], [u'1', u'ni\xf1o'], [u'2', u'student']]
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', (row for row in rows))
+        self.assertEqual(list(report_store.rows_for(self.course_id, 'report.csv')), rows)
+
+    def test_store_rows_failure(self):
+        """
+        Test that a report whose rows fail to be generated is not stored.
+        """
+        def failing_rows():
+            """Yield a row, then fail."""
+            yield [u'id']
+            raise ValueError()
+
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', failing_rows())
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +161,17 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_store_rows_permissions(self):
+        """
+        Test that reports are created with the usual permissions, rather than
+        those of the temporary file they're written to.
+        """
+        report_store = self.create_report_store()
+        with mock.patch('instructor_task.models._UMASK', 0o022):
+            report_store.store_rows(self.course_id, 'report.csv', iter([[u'row']]))
+        mode = os.stat(report_store.path_to(self.course_id, 'report.csv')).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o644)
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +184,15 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+    @mock.patch('instructor_task.models.S3ReportStore.MULTIPART_CHUNK_SIZE', 16)
+    def test_store_rows_multipart(self):
+        """
+        Test that large reports are sent as a multipart upload.
+        """
+        rows = [[unicode(index), u'student{}'.format(index)] for index in range(100)]
+        report_store = self.create_report_store()
+        with mock.patch.object(report_store, 'store') as mock_store:
+            report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+        self.assertFalse(mock_store.called)
+        self.assertEqual(list(report_store.rows_for(self.course_id, 'report.csv')), rows)
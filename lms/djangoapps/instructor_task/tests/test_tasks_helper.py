@@ -6,7 +6,12 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+import json
+
 import ddt
+from celery.states import SUCCESS, FAILURE
+from django.core.cache import cache
+from django.test.utils import override_settings
 from mock import Mock, patch
 import tempfile
 import unicodecsv
@@ -14,8 +19,12 @@ import unicodecsv
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.models import InstructorTask, LocalFSReportStore, ReportStore, PROGRESS
+from instructor_task.subtasks import DuplicateTaskException
+from instructor_task.tasks_helper import (
+    cohort_students_and_upload, run_grade_report_shard, upload_grades_csv, upload_students_csv
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
@@ -53,6 +62,155 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         num_students = len(emails)
         self.assertDictContainsSubset({'attempted': num_students, 'succeeded': num_students, 'failed': 0}, result)
 
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SHARD=2)
+    def test_sharded_grade_report(self):
+        """
+        Test that a grade report split into shards is merged into a single
+        report, and that progress is aggregated across the shards.
+        """
+        students = [self.create_student(u'student{}'.format(i)) for i in range(5)]
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-course-task'
+        )
+
+        with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+            mock_current_task.return_value = Mock()
+            upload_grades_csv({'task_id': entry.task_id}, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5},
+            json.loads(entry.task_output)
+        )
+
+        # Only the merged report is listed; the partial reports are removed.
+        self.assertEqual(len(ReportStore.from_config().links_for(self.course.id)), 1)
+        self.verify_rows_in_csv(
+            [{'id': unicode(student.id), 'username': student.username} for student in students],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SHARD=2)
+    def test_sharded_grade_report_retry(self):
+        """
+        Test that a grade report shard that fails unexpectedly is retried, and
+        that its students are only counted once.
+        """
+        students = [self.create_student(u'student{}'.format(i)) for i in range(3)]
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-course-task'
+        )
+
+        store_rows = LocalFSReportStore.store_rows
+        stored_filenames = []
+
+        def _store_rows_failing_once(report_store, course_id, filename, rows):
+            """Fail to store the first partial report."""
+            stored_filenames.append(filename)
+            if len(stored_filenames) == 1:
+                raise IOError('Report store unavailable')
+            return store_rows(report_store, course_id, filename, rows)
+
+        with patch.object(LocalFSReportStore, 'store_rows', _store_rows_failing_once):
+            with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+                mock_current_task.return_value = Mock()
+                upload_grades_csv({'task_id': entry.task_id}, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['succeeded'], 2)
+        self.assertItemsEqual([status['retried_withmax'] for status in subtasks['status'].values()], [0, 1])
+        self.assertDictContainsSubset(
+            {'attempted': 3, 'succeeded': 3, 'failed': 0},
+            json.loads(entry.task_output)
+        )
+        self.verify_rows_in_csv(
+            [{'id': unicode(student.id), 'username': student.username} for student in students],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SHARD=2)
+    def test_sharded_grade_report_in_progress_until_merged(self):
+        """
+        Test that a sharded grade report isn't marked as succeeded when its
+        last shard completes, but only once its partial reports are merged.
+        """
+        for i in range(3):
+            self.create_student(u'student{}'.format(i))
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-course-task'
+        )
+
+        with patch('instructor_task.tasks_helper._merge_grade_report_parts'):
+            with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+                mock_current_task.return_value = Mock()
+                upload_grades_csv({'task_id': entry.task_id}, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, PROGRESS)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 2)
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SHARD=2)
+    def test_sharded_grade_report_merge_failure(self):
+        """
+        Test that a failure to merge the partial grade reports is recorded on
+        the InstructorTask, and that the partial reports are deleted.
+        """
+        for i in range(3):
+            self.create_student(u'student{}'.format(i))
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-course-task'
+        )
+
+        with patch('instructor_task.tasks_helper.upload_csv_to_report_store') as mock_upload:
+            mock_upload.side_effect = IOError('Report store unavailable')
+            with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+                mock_current_task.return_value = Mock()
+                upload_grades_csv({'task_id': entry.task_id}, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset(
+            {'exception': 'IOError', 'message': 'Report store unavailable'},
+            json.loads(entry.task_output)
+        )
+        report_store = ReportStore.from_config()
+        for subtask_id in json.loads(entry.subtasks)['status']:
+            with self.assertRaises(OSError):
+                report_store.delete(self.course.id, u'parts/{}/{}_grade_report.csv'.format(entry.task_id, subtask_id))
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SHARD=2)
+    def test_duplicate_grade_report_shard(self):
+        """
+        Test that a grade report shard delivered again while it's running is
+        rejected without storing its partial reports.
+        """
+        for i in range(3):
+            self.create_student(u'student{}'.format(i))
+        entry = InstructorTaskFactory.create(
+            task_type='grade_course', course_id=self.course.id, task_id='grade-course-task'
+        )
+
+        # Queue the shards without running them.
+        with patch('instructor_task.tasks.calculate_grades_csv_shard.subtask'):
+            with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
+                mock_current_task.return_value = Mock()
+                upload_grades_csv({'task_id': entry.task_id}, entry.id, self.course.id, None, 'graded')
+        entry = InstructorTask.objects.get(pk=entry.id)
+        subtask_id, subtask_status = json.loads(entry.subtasks)['status'].items()[0]
+        # The shard is already being run by another worker.
+        cache.add('subtask-{}'.format(subtask_id), 'true')
+
+        with patch.object(LocalFSReportStore, 'store_rows') as mock_store_rows:
+            with self.assertRaises(DuplicateTaskException):
+                run_grade_report_shard(entry.id, 'graded', [], subtask_status)
+        self.assertFalse(mock_store_rows.called)
+
     @patch('instructor_task.tasks_helper._get_current_task')
     @patch('instructor_task.tasks_helper.iterate_grades_for')
     def test_grading_failure(self, mock_iterate_grades_for, _mock_current_task):
@@ -3,10 +3,12 @@ Serializer for video outline
 """
 from rest_framework.reverse import reverse
 
+from opaque_keys.edx.keys import UsageKey
 from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
-from courseware.access import has_access
+from courseware.access import has_access, has_access_to_outline_block
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor
+from openedx.core.djangoapps.content.course_structures.video_index import video_fields
 from util.module_utils import get_dynamic_descriptor_children
 
 from edxval.api import (
@@ -24,13 +26,7 @@ class BlockOutline(object):
         self.block_types = block_types
         self.course_id = course_id
         self.request = request  # needed for making full URLS
-        self.local_cache = {}
-        try:
-            self.local_cache['course_videos'] = get_video_info_for_course_and_profiles(
-                unicode(course_id), video_profiles
-            )
-        except ValInternalError:  # pragma: nocover
-            self.local_cache['course_videos'] = {}
+        self.local_cache = {'course_videos': get_course_videos(course_id, video_profiles)}
 
     def __iter__(self):
         def parent_or_requested_block_type(usage_key):
@@ -47,7 +43,7 @@ class BlockOutline(object):
             Factory method for creating and binding a module for the given descriptor.
             """
             field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-                self.course_id, self.request.user, descriptor, depth=0,
+                self.course_id, self.request.user, descriptor, depth=0, request=self.request,
             )
             return get_module_for_descriptor(
                 self.request.user, self.request, descriptor, field_data_cache, self.course_id
@@ -94,6 +90,56 @@ class BlockOutline(object):
                     child_to_parent[block] = curr_block
 
 
+class VideoIndexOutline(object):
+    """
+    Serializes course videos, pulling data from VAL and the course's precomputed video index (see
+    course_structures.video_index), in the same format as BlockOutline.
+    """
+    def __init__(self, course_id, video_index, request, video_profiles):
+        self.course_id = course_id
+        self.video_index = video_index
+        self.request = request
+        self.video_profiles = video_profiles
+        self.local_cache = {'course_videos': get_course_videos(course_id, video_profiles)}
+
+    def __iter__(self):
+        def map_into_course(usage_key):
+            """
+            Returns the `usage_key` string of the index's course as a usage key string of this course.
+            """
+            return unicode(UsageKey.from_string(usage_key).map_into_course(self.course_id))
+
+        for video in self.video_index['videos']:
+            if not has_access_to_outline_block(self.request.user, video, self.course_id):
+                continue
+
+            video = dict(video, usage_key=map_into_course(video['usage_key']))
+            block_path = [dict(block, id=map_into_course(block['id'])) for block in video['path']]
+            unit_url, section_url = courseware_urls(
+                self.course_id, video['chapter'], video['section'], video['position'], self.request
+            )
+
+            yield {
+                "path": block_path,
+                "named_path": [b["name"] for b in block_path],
+                "unit_url": unit_url,
+                "section_url": section_url,
+                "summary": indexed_video_summary(
+                    self.video_profiles, self.course_id, video, self.request, self.local_cache
+                ),
+            }
+
+
+def get_course_videos(course_id, video_profiles):
+    """
+    Returns the VAL data of the videos of the course, for the given profiles.
+    """
+    try:
+        return get_video_info_for_course_and_profiles(unicode(course_id), video_profiles)
+    except ValInternalError:  # pragma: nocover
+        return {}
+
+
 def path(block, child_to_parent, start_block):
     """path for block"""
     block_path = []
@@ -138,17 +184,29 @@ def find_urls(course_id, block, child_to_parent, request):
                 break
             position += 1
 
+    return courseware_urls(course_id, chapter_id, section.url_name if section else None, position, request)
+
+
+def courseware_urls(course_id, chapter_id, section_url_name, position, request):
+    """
+    Returns the unit and section urls of the given position in the courseware.
+
+    Returns:
+        unit_url, section_url:
+            unit_url (str): The url of a unit
+            section_url (str): The url of a section
+    """
     kwargs = {'course_id': unicode(course_id)}
     if chapter_id is None:
         no_chapter_url = reverse("courseware", kwargs=kwargs, request=request)
         return no_chapter_url, no_chapter_url
 
     kwargs['chapter'] = chapter_id
-    if section is None:
+    if section_url_name is None:
         no_section_url = reverse("courseware_chapter", kwargs=kwargs, request=request)
         return no_section_url, no_section_url
 
-    kwargs['section'] = section.url_name
+    kwargs['section'] = section_url_name
     if position is None:
         no_position_url = reverse("courseware_section", kwargs=kwargs, request=request)
         return no_position_url, no_position_url
@@ -163,14 +221,21 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
     """
     returns summary dict for the given video module
     """
+    return indexed_video_summary(video_profiles, course_id, video_fields(video_descriptor), request, local_cache)
+
+
+def indexed_video_summary(video_profiles, course_id, video, request, local_cache):
+    """
+    returns summary dict for the given video of a video index (see course_structures.video_index)
+    """
     always_available_data = {
-        "name": video_descriptor.display_name,
-        "category": video_descriptor.category,
-        "id": unicode(video_descriptor.scope_ids.usage_id),
-        "only_on_web": video_descriptor.only_on_web,
+        "name": video['display_name'],
+        "category": "video",
+        "id": video['usage_key'],
+        "only_on_web": video['only_on_web'],
     }
 
-    if video_descriptor.only_on_web:
+    if video['only_on_web']:
         ret = {
             "video_url": None,
             "video_thumbnail_url": None,
@@ -183,7 +248,7 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
         return ret
 
     # Get encoded videos
-    video_data = local_cache['course_videos'].get(video_descriptor.edx_video_id, {})
+    video_data = local_cache['course_videos'].get(video['edx_video_id'], {})
 
     # Get highest priority video to populate backwards compatible field
     default_encoded_video = {}
@@ -197,29 +262,26 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
     if default_encoded_video:
         video_url = default_encoded_video['url']
     # Then fall back to VideoDescriptor fields for video URLs
-    elif video_descriptor.html5_sources:
-        video_url = video_descriptor.html5_sources[0]
     else:
-        video_url = video_descriptor.source
+        video_url = video['video_url']
 
     # Get duration/size, else default
     duration = video_data.get('duration', None)
     size = default_encoded_video.get('file_size', 0)
 
     # Transcripts...
-    transcript_langs = video_descriptor.available_translations(verify_assets=False)
-
+    block_id = UsageKey.from_string(video['usage_key']).block_id
     transcripts = {
         lang: reverse(
             'video-transcripts-detail',
             kwargs={
                 'course_id': unicode(course_id),
-                'block_id': video_descriptor.scope_ids.usage_id.block_id,
+                'block_id': block_id,
                 'lang': lang
             },
             request=request,
         )
-        for lang in transcript_langs
+        for lang in video['transcript_languages']
     }
 
     ret = {
@@ -228,7 +290,7 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
         "duration": duration,
         "size": size,
         "transcripts": transcripts,
-        "language": video_descriptor.get_default_transcript_language(),
+        "language": video['transcript_language'],
         "encoded_videos": video_data.get('profiles')
     }
     ret.update(always_available_data)
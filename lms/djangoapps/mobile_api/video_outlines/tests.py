@@ -5,6 +5,7 @@ Tests for video outline API
 # pylint: disable=no-member
 import ddt
 import itertools
+from mock import patch
 from uuid import uuid4
 from collections import namedtuple
 
@@ -17,6 +18,8 @@ from xmodule.partitions.partitions import Group, UserPartition
 
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
+import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
+from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 
 from ..testutils import MobileAPITestCase, MobileAuthTestMixin, MobileEnrolledCourseAccessTestMixin
 
@@ -602,6 +605,52 @@ class TestVideoSummaryList(
         self.assertEqual(course_outline[2]['summary']['size'], 0)
         self.assertFalse(course_outline[2]['summary']['only_on_web'])
 
+    def test_video_index(self):
+        self.login_and_enroll()
+        self._create_video_with_subs()
+        ItemFactory.create(
+            parent=self.other_unit,
+            category="video",
+            display_name=u"test video omega 2 \u03a9",
+            html5_sources=[self.html5_video_url]
+        )
+        ItemFactory.create(
+            parent=self.sub_section,
+            category="video",
+            display_name=u"test video omega 3 \u03a9",
+            visible_to_staff_only=True,
+        )
+
+        # the outline from the course's video index is the same as the one from its modules
+        course_outline = self.api_response().data
+        self.assertEqual(len(course_outline), 2)
+        with patch('mobile_api.video_outlines.views.get_video_index', return_value=None):
+            self.assertEqual(self.api_response().data, course_outline)
+
+    def test_video_index_with_group_restricted_vertical(self):
+        self.login_and_enroll()
+        self._setup_course_partitions()
+        vertical = ItemFactory.create(
+            parent=self.sub_section,
+            category="vertical",
+            display_name=u"vertical for group 1",
+        )
+        self._setup_group_access(vertical, self.partition_id, [1])
+        ItemFactory.create(
+            parent=vertical,
+            category="video",
+            display_name=u"video for group 1",
+        )
+        course_tag_api.set_course_tag(
+            self.user, self.course.id, RandomUserPartitionScheme.key_for_partition(self.course.user_partitions[0]), 0
+        )
+
+        # the video is hidden from users outside of its vertical's group, as in the outline from the course's modules
+        course_outline = self.api_response().data
+        self.assertEqual(course_outline, [])
+        with patch('mobile_api.video_outlines.views.get_video_index', return_value=None):
+            self.assertEqual(self.api_response().data, course_outline)
+
     def test_with_nameless_unit(self):
         self.login_and_enroll()
         ItemFactory.create(
@@ -17,9 +17,10 @@ from opaque_keys.edx.locator import BlockUsageLocator
 
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import modulestore
+from openedx.core.djangoapps.content.course_structures.video_index import get_video_index
 
 from ..utils import mobile_view, mobile_course_access
-from .serializers import BlockOutline, video_summary
+from .serializers import BlockOutline, VideoIndexOutline, video_summary
 
 
 @mobile_view()
@@ -77,18 +78,24 @@ class VideoSummaryList(generics.ListAPIView):
                 * size: The size of the video file
     """
 
-    @mobile_course_access(depth=None)
+    @mobile_course_access()
     def list(self, request, course, *args, **kwargs):
         video_profiles = MobileApiConfig.get_video_profiles()
-        video_outline = list(
-            BlockOutline(
-                course.id,
-                course,
-                {"video": partial(video_summary, video_profiles)},
-                request,
-                video_profiles,
+        video_index = get_video_index(course)
+        if video_index is not None:
+            video_outline = list(VideoIndexOutline(course.id, video_index, request, video_profiles))
+        else:
+            # the course has content which differs for each user, so its modules are traversed
+            course = modulestore().get_course(course.id, depth=None)
+            video_outline = list(
+                BlockOutline(
+                    course.id,
+                    course,
+                    {"video": partial(video_summary, video_profiles)},
+                    request,
+                    video_profiles,
+                )
             )
-        )
         return Response(video_outline)
 
 
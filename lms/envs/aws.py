@@ -206,6 +206,8 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_SMTP_CONNECTIONS = ENV_TOKENS.get('BULK_EMAIL_SMTP_CONNECTIONS', BULK_EMAIL_SMTP_CONNECTIONS)
+BULK_EMAIL_MAX_SENDS_PER_SECOND = ENV_TOKENS.get('BULK_EMAIL_MAX_SENDS_PER_SECOND', BULK_EMAIL_MAX_SENDS_PER_SECOND)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -402,6 +404,7 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+STATIC_CONTENT_DISK_CACHE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE', STATIC_CONTENT_DISK_CACHE)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -477,6 +480,16 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_BATCH_SIZE = ENV_TOKENS.get("GRADES_DOWNLOAD_BATCH_SIZE", GRADES_DOWNLOAD_BATCH_SIZE)
+GRADES_DOWNLOAD_STUDENTS_PER_SHARD = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_STUDENTS_PER_SHARD", GRADES_DOWNLOAD_STUDENTS_PER_SHARD
+)
+GRADES_DOWNLOAD_SHARD_DEFAULT_RETRY_DELAY = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_SHARD_DEFAULT_RETRY_DELAY", GRADES_DOWNLOAD_SHARD_DEFAULT_RETRY_DELAY
+)
+GRADES_DOWNLOAD_SHARD_MAX_RETRIES = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_SHARD_MAX_RETRIES", GRADES_DOWNLOAD_SHARD_MAX_RETRIES
+)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
@@ -586,6 +599,10 @@ ECOMMERCE_API_URL = ENV_TOKENS.get('ECOMMERCE_API_URL', ECOMMERCE_API_URL)
 ECOMMERCE_API_SIGNING_KEY = AUTH_TOKENS.get('ECOMMERCE_API_SIGNING_KEY', ECOMMERCE_API_SIGNING_KEY)
 ECOMMERCE_API_TIMEOUT = ENV_TOKENS.get('ECOMMERCE_API_TIMEOUT', ECOMMERCE_API_TIMEOUT)
 
+### This enables the Metrics tab for the Instructor dashboard ###########
+if FEATURES.get('CLASS_DASHBOARD'):
+    INSTALLED_APPS += ('class_dashboard',)
+
 ##### Custom Courses for EdX #####
 if FEATURES.get('CUSTOM_COURSES_EDX'):
     INSTALLED_APPS += ('ccx',)
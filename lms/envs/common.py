@@ -383,6 +383,12 @@ FEATURES = {
 
     # Course discovery feature
     'ENABLE_COURSE_DISCOVERY': False,
+
+    # Persist per-section subgrades so that grading only recomputes sections
+    # whose student state or content has changed since they were last graded.
+    # Persisted subgrades aren't invalidated while this is off, so empty the
+    # courseware_studentsectiongrade table before turning it back on.
+    'ENABLE_PERSISTENT_SECTION_GRADES': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -679,6 +685,13 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Local disk cache for static content too large to cache in memcached. DIRECTORY (None to
+# disable the disk cache) should be on local disk, and MAX_SIZE is its size bound in bytes.
+STATIC_CONTENT_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -739,6 +752,19 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Warm sandbox processes, see capa/safe_exec/sandbox_pool.py.  Their
+    # children inherit the preloaded modules, so a 'VMEM' limit must leave
+    # room for numpy and scipy.
+    'pool': {
+        # How many sandbox processes can each LMS process use?  0 disables the pool.
+        'size': 0,
+        # How many executions before a sandbox process is replaced?
+        'max_executions': 100,
+        # How much memory (in bytes) can a sandbox process grow to before
+        # it is replaced?  None means no limit.
+        'max_memory': None,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1107,6 +1133,7 @@ MIDDLEWARE_CLASSES = (
 
     # to redirected unenrolled students to the course info page
     'courseware.middleware.RedirectUnenrolledMiddleware',
+    'courseware.middleware.FieldDataCacheQueryCountMiddleware',
 
     'course_wiki.middleware.WikiAccessMiddleware',
 
@@ -1577,6 +1604,14 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections each bulk email subtask keeps open and sends
+# through in parallel.
+BULK_EMAIL_SMTP_CONNECTIONS = 1
+
+# Maximum number of messages per second that each bulk email subtask sends,
+# across all of its connections.  If None, sends are not rate limited.
+BULK_EMAIL_MAX_SENDS_PER_SECOND = None
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1926,6 +1961,24 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Number of students graded together when generating a grade report. The
+# StudentModules and submissions scores of each batch are fetched in bulk.
+GRADES_DOWNLOAD_BATCH_SIZE = 100
+
+# If set, grade reports for courses with more enrolled students than this are
+# split into subtasks grading at most this many students each, so that they can
+# run in parallel on several workers. Each subtask writes a partial report which
+# is merged into the final one once all of them are done.
+GRADES_DOWNLOAD_STUDENTS_PER_SHARD = None
+
+# Initial delay, in seconds, before a grade report subtask that failed
+# unexpectedly is retried. The delay doubles with each further retry.
+GRADES_DOWNLOAD_SHARD_DEFAULT_RETRY_DELAY = 30
+
+# Maximum number of retries of a grade report subtask before its students are
+# counted as failed.
+GRADES_DOWNLOAD_SHARD_MAX_RETRIES = 5
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
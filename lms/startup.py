@@ -29,6 +29,8 @@ def run():
 
     add_mimetypes()
 
+    configure_sandbox_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
@@ -58,6 +60,15 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def configure_sandbox_pool():
+    """
+    Configure the pool of warm sandbox processes used to run capa problem code.
+    """
+    from capa.safe_exec import sandbox_pool
+
+    sandbox_pool.configure(**settings.CODE_JAIL.get('pool', {}))
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
@@ -20,12 +20,30 @@ class CourseStructure(TimeStampedModel):
     # we'd have to be careful about caching.
     structure_json = CompressedTextField(verbose_name='Structure JSON', blank=True, null=True)
 
+    # The outline of the published course (see outline.py)
+    outline_json = CompressedTextField(verbose_name='Outline JSON', blank=True, null=True)
+
+    # The video index of the published course (see video_index.py)
+    video_index_json = CompressedTextField(verbose_name='Video index JSON', blank=True, null=True)
+
     @property
     def structure(self):
         if self.structure_json:
             return json.loads(self.structure_json)
         return None
 
+    @property
+    def outline(self):
+        if self.outline_json:
+            return json.loads(self.outline_json)
+        return None
+
+    @property
+    def video_index(self):
+        if self.video_index_json:
+            return json.loads(self.video_index_json)
+        return None
+
 # Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
 # at the end of this file to avoid circular dependencies.
 import signals  # pylint: disable=unused-import
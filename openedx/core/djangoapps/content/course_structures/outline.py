@@ -0,0 +1,149 @@
+"""
+Precomputed course outlines: the chapters and sections of a course, with the fields needed to
+render its table of contents and to check each user's access to them, without loading (or
+binding) the chapters and sections themselves.
+
+Outlines are computed (from the published branch) when a course is published, and stored with
+its CourseStructure. They are identified by the version of the course they were computed from, so
+an outline is only used for the version of the course it describes.
+"""
+import logging
+
+from django.core.cache import cache
+
+from xmodule.fields import Date
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+DATE_FIELD = Date()
+
+
+def course_version(course):
+    """
+    Returns a string which identifies the version of `course` (as loaded from the modulestore),
+    or None if the version of the course can't be determined.
+    """
+    # split courses have an immutable structure per version
+    course_entry = getattr(course.runtime, 'course_entry', None)
+    if course_entry is not None:
+        return unicode(course_entry.structure['_id'])
+
+    # old mongo courses record when anything in the course was last edited (or published)
+    try:
+        edited_on = course.runtime.get_subtree_edited_on(course)
+    except (AttributeError, NotImplementedError):
+        edited_on = None
+    if edited_on is not None:
+        return edited_on.isoformat()
+    return None
+
+
+def generate_course_outline(course):
+    """
+    Returns the outline of `course`, or None if the table of contents of the course can't be
+    computed from its outline (when its children aren't all chapters, and their children aren't all
+    sequentials, so that the modules' displayable items may differ from their children).
+    """
+    outline = {
+        'version': course_version(course),
+        'chapters': [],
+    }
+    course_group_access = bool(getattr(course, 'group_access', None))
+    for chapter in course.get_children():
+        if chapter.category != 'chapter':
+            return None
+        chapter_group_access = course_group_access or bool(getattr(chapter, 'group_access', None))
+        chapter_outline = _block_outline(chapter, chapter_group_access)
+        chapter_outline['sections'] = []
+        for section in chapter.get_children():
+            if section.category != 'sequential':
+                return None
+            section_outline = _block_outline(section, chapter_group_access)
+            section_outline.update({
+                'format': section.format,
+                'due': DATE_FIELD.to_json(section.due),
+                'graded': section.graded,
+            })
+            chapter_outline['sections'].append(section_outline)
+        outline['chapters'].append(chapter_outline)
+    return outline
+
+
+def _block_outline(block, ancestor_group_access):
+    """
+    Returns the outline of a chapter or section.
+    """
+    return {
+        'usage_key': unicode(block.location),
+        'url_name': block.url_name,
+        'display_name': block.display_name_with_default,
+        'hide_from_toc': getattr(block, 'hide_from_toc', False),
+        'start': DATE_FIELD.to_json(block.start),
+        'days_early_for_beta': block.days_early_for_beta,
+        'visible_to_staff_only': block.visible_to_staff_only,
+        'detached': 'detached' in block._class_tags,  # pylint: disable=protected-access
+        # whether the block, or any of its ancestors, restricts access to groups of users
+        'group_access': ancestor_group_access or bool(getattr(block, 'group_access', None)),
+    }
+
+
+def generate_published_course_outline(course_key):
+    """
+    Returns the outline of the published version of the course with `course_key`.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        course = store.get_course(course_key, depth=2)
+        if course is None:
+            return None
+        return generate_course_outline(course)
+
+
+def get_course_outline(course):
+    """
+    Returns the outline of (the version of) `course`, or None if there is none.
+    """
+    return get_course_version_data(course, 'outline', generate_course_outline)
+
+
+def get_course_version_data(course, name, generate):
+    """
+    Returns the data called `name` (e.g. 'outline') for (the version of) `course`, or None if there
+    is none. `generate(course)` computes the data, as a dict which includes the 'version' it was
+    computed from (or None).
+
+    The data is cached in the django cache. If it isn't cached, it's read from the attribute `name`
+    of the course's CourseStructure, or computed if the CourseStructure's data is for another
+    version of the course.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructure
+
+    version = course_version(course)
+    if version is None:
+        # the data can't be cached, as it can't be invalidated
+        return generate(course)
+
+    cache_key = u'course_structures.{}.{}.{}'.format(name, course.id, version)
+    data = cache.get(cache_key)
+    if data is not None:
+        return data or None
+
+    data = None
+    for course_structure in CourseStructure.objects.filter(course_id=course.id):
+        data = getattr(course_structure, name)
+    if data is None or data['version'] != version:
+        data = generate(course)
+
+    # cache courses without any data as {}
+    cache.set(cache_key, data or {})
+    return data
+
+
+def outline_date(value):
+    """
+    Returns the datetime for a date in an outline.
+    """
+    return DATE_FIELD.from_json(value)
@@ -53,6 +53,8 @@ def update_course_structure(course_key):
     """
     # Import here to avoid circular import.
     from .models import CourseStructure
+    from .outline import generate_published_course_outline
+    from .video_index import generate_published_video_index
 
     # Ideally we'd like to accept a CourseLocator; however, CourseLocator is not JSON-serializable (by default) so
     # Celery's delayed tasks fail to start. For this reason, callers should pass the course key as a Unicode string.
@@ -63,17 +65,27 @@ def update_course_structure(course_key):
 
     try:
         structure = _generate_course_structure(course_key)
+        outline = generate_published_course_outline(course_key)
+        video_index = generate_published_video_index(course_key)
     except Exception as ex:
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
 
     structure_json = json.dumps(structure)
+    outline_json = json.dumps(outline) if outline is not None else None
+    video_index_json = json.dumps(video_index) if video_index is not None else None
 
     cs, created = CourseStructure.objects.get_or_create(
         course_id=course_key,
-        defaults={'structure_json': structure_json}
+        defaults={
+            'structure_json': structure_json,
+            'outline_json': outline_json,
+            'video_index_json': video_index_json,
+        }
     )
 
     if not created:
         cs.structure_json = structure_json
+        cs.outline_json = outline_json
+        cs.video_index_json = video_index_json
         cs.save()
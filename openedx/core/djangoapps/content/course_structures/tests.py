@@ -4,6 +4,12 @@ from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.outline import (
+    generate_published_course_outline, get_course_outline
+)
+from openedx.core.djangoapps.content.course_structures.video_index import (
+    generate_published_video_index, get_video_index
+)
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
 
@@ -128,3 +134,103 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         cs = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(cs.course_id, course_id)
         self.assertEqual(cs.structure, structure)
+
+
+class CourseOutlineTests(ModuleStoreTestCase):
+    """
+    Tests of the precomputed course outlines.
+    """
+    def setUp(self):
+        super(CourseOutlineTests, self).setUp()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.sequential = ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Sequential', format='Homework', graded=True
+        )
+        CourseStructure.objects.all().delete()
+
+    def test_generate_course_outline(self):
+        outline = generate_published_course_outline(self.course.id)
+        self.assertEqual(len(outline['chapters']), 1)
+        chapter = outline['chapters'][0]
+        self.assertEqual(chapter['display_name'], 'Chapter')
+        self.assertEqual(chapter['url_name'], self.chapter.url_name)
+        self.assertFalse(chapter['group_access'])
+        section = chapter['sections'][0]
+        self.assertEqual(section['display_name'], 'Sequential')
+        self.assertEqual(section['format'], 'Homework')
+        self.assertTrue(section['graded'])
+        self.assertIsNone(section['due'])
+
+    def test_outline_without_chapters(self):
+        ItemFactory.create(parent=self.course, category='html')
+        self.assertIsNone(generate_published_course_outline(self.course.id))
+
+    def test_update_course_structure(self):
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertEqual(cs.outline, generate_published_course_outline(self.course.id))
+
+    def test_get_course_outline(self):
+        course = self.store.get_course(self.course.id, depth=2)
+        outline = get_course_outline(course)
+        self.assertEqual(outline['chapters'][0]['sections'][0]['display_name'], 'Sequential')
+
+        # a new version of the course has a new outline
+        self.sequential.display_name = 'Renamed'
+        self.store.update_item(self.sequential, self.user.id)
+        course = self.store.get_course(self.course.id, depth=2)
+        outline = get_course_outline(course)
+        self.assertEqual(outline['chapters'][0]['sections'][0]['display_name'], 'Renamed')
+
+
+class VideoIndexTests(ModuleStoreTestCase):
+    """
+    Tests of the precomputed video indexes.
+    """
+    def setUp(self):
+        super(VideoIndexTests, self).setUp()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.sequential = ItemFactory.create(parent=self.chapter, category='sequential', display_name='Sequential')
+        self.vertical = ItemFactory.create(parent=self.sequential, category='vertical', display_name='Vertical')
+        self.video = ItemFactory.create(
+            parent=self.vertical, category='video', display_name='Video', edx_video_id='video-id'
+        )
+        CourseStructure.objects.all().delete()
+
+    def test_generate_video_index(self):
+        video_index = generate_published_video_index(self.course.id)
+        self.assertEqual(len(video_index['videos']), 1)
+        video = video_index['videos'][0]
+        self.assertEqual(video['display_name'], 'Video')
+        self.assertEqual(video['edx_video_id'], 'video-id')
+        self.assertEqual([block['name'] for block in video['path']], ['Chapter', 'Sequential', 'Vertical'])
+        self.assertEqual(video['chapter'], self.chapter.location.block_id)
+        self.assertEqual(video['section'], self.sequential.url_name)
+        self.assertEqual(video['position'], 1)
+
+    def test_hidden_videos(self):
+        hidden = ItemFactory.create(parent=self.chapter, category='sequential', hide_from_toc=True)
+        ItemFactory.create(parent=hidden, category='video')
+        self.assertEqual(len(generate_published_video_index(self.course.id)['videos']), 1)
+
+    def test_dynamic_children(self):
+        ItemFactory.create(parent=self.vertical, category='split_test')
+        self.assertIsNone(generate_published_video_index(self.course.id))
+
+    def test_update_course_structure(self):
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertEqual(cs.video_index, generate_published_video_index(self.course.id))
+
+    def test_get_video_index(self):
+        course = self.store.get_course(self.course.id)
+        self.assertEqual(get_video_index(course)['videos'][0]['display_name'], 'Video')
+
+        # a new version of the course has a new video index
+        self.video.display_name = 'Renamed'
+        self.store.update_item(self.video, self.user.id)
+        self.store.publish(self.video.location, self.user.id)
+        course = self.store.get_course(self.course.id)
+        self.assertEqual(get_video_index(course)['videos'][0]['display_name'], 'Renamed')
@@ -0,0 +1,137 @@
+"""
+Precomputed video indexes: the videos of a course, with their position in the course and the
+fields needed to describe them (e.g. in the mobile video outline) and to check each user's access
+to them, without loading the course's blocks.
+
+Like outlines (see outline.py), video indexes are computed from the published branch when a course
+is published, stored with its CourseStructure, and identified by the version of the course they
+were computed from.
+"""
+from xmodule.fields import Date
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
+
+from .outline import course_version, get_course_version_data
+
+DATE_FIELD = Date()
+
+
+def generate_video_index(course):
+    """
+    Returns the video index of `course`, or None if the videos of the course can't be indexed
+    (when it has blocks with dynamic children, such as content experiments or randomized content
+    blocks, which have different children for each user).
+    """
+    videos = []
+    stack = [(course, [], False)]
+    while stack:
+        block, ancestors, ancestor_group_access = stack.pop()
+
+        if getattr(block, 'hide_from_toc', False):
+            # hidden blocks (and their descendants) aren't listed
+            continue
+
+        # whether the block, or any of its ancestors, restricts access to groups of users
+        group_access = ancestor_group_access or bool(getattr(block, 'group_access', None))
+
+        if block.location.block_type == 'video':
+            videos.append(_video_entry(block, ancestors, group_access))
+
+        if block.has_children:
+            if block.has_dynamic_children():
+                return None
+            children = block.get_children(
+                lambda usage_key: usage_key.block_type == 'video' or usage_key.block_type in BLOCK_TYPES_WITH_CHILDREN
+            )
+            for child in reversed(children):
+                stack.append((child, ancestors + [block], group_access))
+
+    return {
+        'version': course_version(course),
+        'videos': videos,
+    }
+
+
+def _video_entry(video, ancestors, group_access):
+    """
+    Returns the index entry of `video`, whose ancestors (starting with the course) are `ancestors`.
+    `group_access` is whether the video or any of its ancestors restricts access to groups of users.
+    """
+    # the chapter, section and vertical which contain the video
+    chapter, section, vertical = (ancestors[1:4] + [None, None, None])[:3]
+    position = None
+    if vertical is not None:
+        position = 1
+        for child in section.children:
+            if child.block_id == vertical.location.block_id:
+                break
+            position += 1
+
+    entry = {
+        'path': [
+            {
+                'name': block.display_name_with_default,
+                'category': block.category,
+                'id': unicode(block.location),
+            }
+            for block in ancestors[1:]
+        ],
+        'chapter': chapter.location.block_id if chapter is not None else None,
+        'section': section.url_name if section is not None else None,
+        'position': position,
+        # access
+        'start': DATE_FIELD.to_json(video.start),
+        'days_early_for_beta': video.days_early_for_beta,
+        'visible_to_staff_only': video.visible_to_staff_only,
+        'detached': False,
+        'group_access': group_access,
+    }
+    entry.update(video_fields(video))
+    return entry
+
+
+def video_fields(video):
+    """
+    Returns the fields of `video` which describe it in a video index.
+    """
+    if video.html5_sources:
+        video_url = video.html5_sources[0]
+    else:
+        video_url = video.source
+
+    return {
+        'usage_key': unicode(video.location),
+        'display_name': video.display_name,
+        'only_on_web': video.only_on_web,
+        'edx_video_id': video.edx_video_id,
+        'video_url': video_url,
+        'transcript_languages': sorted(video.available_translations(verify_assets=False)),
+        'transcript_language': video.get_default_transcript_language(),
+    }
+
+
+def generate_published_video_index(course_key):
+    """
+    Returns the video index of the published version of the course with `course_key`.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        course = store.get_course(course_key, depth=None)
+        if course is None:
+            return None
+        return generate_video_index(course)
+
+
+def get_video_index(course):
+    """
+    Returns the video index of (the version of) `course`, or None if there is none. `course` needn't
+    have its descendants loaded.
+    """
+    def generate(course):
+        """
+        Computes the video index of `course`, loading all of its descendants at once.
+        """
+        return generate_video_index(modulestore().get_course(course.id, depth=None))
+
+    return get_course_version_data(course, 'video_index', generate)